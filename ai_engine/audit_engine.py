@@ -1,13 +1,28 @@
+import base64
+import html
+import json
 import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import ee
-import geemap
 import rasterio
 import numpy as np
 from scipy.ndimage import zoom, median_filter, center_of_mass
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
 from fpdf import FPDF
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.colors import ListedColormap
+from ai_engine.terrain_mesh import decimate_surface
+
+# The Earth Engine export cache is shared with the backend services
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../backend"))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+from app.services.ee_export_cache import EE_EXPORT_CACHE, sentinel2_red_nir_request, srtm_dem_request
 
 # Inside ai_engine/audit_engine.py
 
@@ -38,54 +53,77 @@ def initialize_gee():
     except Exception as e:
         print(f"❌ GEE Auth Error: {e}")
 
-def run_audit_pipeline(params, output_base_path="public"):
-    # Unpack Parameters
-    lat = params.get('lat')
-    lon = params.get('lon')
-    length_m = params.get('length_m') or 5000  # Default to 5km if not provided
-    width_m = params.get('width_m') or 8000    # Default to 8km if not provided
-    project_name = params.get('project_name', 'Mining_Audit')
+# --- ARTIFACTS ---
+# Rendered files per audit, generated from the saved analysis state on demand.
+ARTIFACT_FILES = {
+    "model_3d": "{name}_3D_Model.html",
+    "map_2d": "{name}_Evidence_Map.png",
+    "report": "{name}_Report.pdf",
+}
+STATE_FILE = "audit_state.npz"
 
-    print(f"🚀 ENGINE: Processing {project_name}...")
-    
-    # Validate required parameters
-    if not lat or not lon:
-        raise ValueError("Latitude and Longitude are required for audit")
-    
-    initialize_gee()
+# 3D model output: "lean" writes an adaptively decimated mesh in binary form and
+# loads the shared plotly.js; "full" embeds plotly.js and the whole surface.
+MODEL_3D_MODE = os.getenv("AUDIT_3D_MODEL_MODE", "lean")
+MESH_TOLERANCE_M = float(os.getenv("AUDIT_MESH_TOLERANCE_M", "3.0"))  # Max RMS deviation of merged terrain from a plane
+STATIC_URL_PREFIX = os.getenv("AUDIT_STATIC_URL_PREFIX", "/static")  # URL where output_base_path is served
 
-    # --- 1. SETUP PATHS ---
-    safe_name = project_name.replace(" ", "_")
-    task_dir = os.path.join(output_base_path, f"audit_{safe_name}")
-    os.makedirs(task_dir, exist_ok=True)
+MODEL_COLORSCALE = [
+    [0.0, 'rgb(34, 139, 34)'], [0.3, 'rgb(139, 69, 19)'], [0.35, 'rgb(139, 69, 19)'], 
+    [0.3501, 'rgb(100, 120, 100)'], [0.5, 'rgb(100, 120, 100)'],
+    [0.5001, 'rgb(10, 10, 20)'], [0.8, 'rgb(10, 10, 20)'],
+    [0.8001, 'rgb(255, 0, 0)'], [1.0, 'rgb(255, 0, 0)']
+]
 
-    DEM_FILE = os.path.join(task_dir, "dem.tif")
-    SAT_FILE = os.path.join(task_dir, "sat.tif")
-    HTML_FILE = os.path.join(task_dir, f"{safe_name}_3D_Model.html")
-    PNG_FILE = os.path.join(task_dir, f"{safe_name}_Evidence_Map.png")
-    PDF_FILE = os.path.join(task_dir, f"{safe_name}_Report.pdf")
+LEAN_MODEL_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotlyjs}"></script>
+<style>html, body, #model {{ margin: 0; width: 100%; height: 100%; }}</style>
+</head>
+<body>
+<div id="model"></div>
+<script>
+const types = {{u1: Uint8Array, u2: Uint16Array, u4: Uint32Array, f4: Float32Array}};
+const decode = ([type, data]) => new types[type](Uint8Array.from(atob(data), c => c.charCodeAt(0)).buffer);
+const figure = {figure};
+const mesh = {mesh};
+for (const key in mesh) figure.data[0][key] = decode(mesh[key]);
+Plotly.newPlot("model", figure.data, figure.layout, {{responsive: true}});
+</script>
+</body>
+</html>
+"""
 
-    # --- 2. DOWNLOAD DATA ---
-    # Buffer size to ensure legal zone is well-represented while staying within download limits
-    buffer_size = max(length_m, width_m) * 5.0
-    roi = ee.Geometry.Point([lon, lat]).buffer(buffer_size).bounds()
+_render_locks = {}
+_render_locks_guard = threading.Lock()
 
-    if os.path.exists(DEM_FILE): os.remove(DEM_FILE)
-    geemap.ee_export_image(
-        ee.Image("USGS/SRTMGL1_003").clip(roi),
-        filename=DEM_FILE, scale=30, region=roi, crs='EPSG:3857', file_per_band=False
-    )
 
-    if os.path.exists(SAT_FILE): os.remove(SAT_FILE)
-    s2 = (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
-          .filterBounds(roi).sort('CLOUDY_PIXEL_PERCENTAGE')
-          .first().select(['B4', 'B8']))
-    geemap.ee_export_image(
-        s2.clip(roi), filename=SAT_FILE, scale=30, region=roi, crs='EPSG:3857', file_per_band=False
-    )
+class StaleAuditError(Exception):
+    """Raised when an artifact is requested for an analysis that has since been re-run."""
 
-    # --- 3. PROCESSING ---
-    with rasterio.open(SAT_FILE) as src:
+
+def artifact_path(task_dir, kind, project_name):
+    safe_name = project_name.replace(" ", "_")
+    return os.path.join(task_dir, ARTIFACT_FILES[kind].format(name=safe_name))
+
+
+def load_audit_state(task_dir):
+    with np.load(os.path.join(task_dir, STATE_FILE)) as data:
+        state = {key: data[key] for key in data.files}
+    for key in ("project_name", "run_id"):
+        state[key] = str(state[key])
+    for key in ("legal_ha", "illegal_ha"):
+        state[key] = float(state[key])
+    state["box"] = [int(v) for v in state["box"]]
+    return state
+
+
+def _detect_mining(sat_file):
+    """Mining mask from the red/NIR scene: low-NDVI (bare or disturbed) ground."""
+    with rasterio.open(sat_file) as src:
         red = src.read(1).astype(float)
         nir = src.read(2).astype(float)
         ndvi = (nir - red) / (nir + red + 1e-5)
@@ -99,13 +137,61 @@ def run_audit_pipeline(params, output_base_path="public"):
         # Debug info
         print(f"📊 NDVI Stats: min={np.min(ndvi):.3f}, max={np.max(ndvi):.3f}, mean={np.mean(ndvi):.3f}")
         print(f"📊 Mining pixels detected: {np.sum(mine_mask)} out of {mine_mask.size}")
+    return mine_mask
+
 
-    with rasterio.open(DEM_FILE) as src:
+def _read_elevation(dem_file):
+    """Elevation grid with voids filled, and its pixel size in metres."""
+    with rasterio.open(dem_file) as src:
         elevation = src.read(1)
         elevation = np.where(elevation < -100, np.min(elevation[elevation > -100]), elevation)
         res_x = src.transform[0]
         res_y = -src.transform[4]
+    return elevation, res_x, res_y
+
+
+def analyze_site(params, output_base_path="public"):
+    """
+    Download the rasters, detect mining and compute the compliance stats.
+    The grids needed by the renderers are saved next to the artifacts so each
+    artifact can be rendered later, independently of the others.
+    """
+    # Unpack Parameters
+    lat = params.get('lat')
+    lon = params.get('lon')
+    length_m = params.get('length_m') or 5000  # Default to 5km if not provided
+    width_m = params.get('width_m') or 8000    # Default to 8km if not provided
+    project_name = params.get('project_name', 'Mining_Audit')
+
+    print(f"🚀 ENGINE: Processing {project_name}...")
+    
+    # Validate required parameters
+    if not lat or not lon:
+        raise ValueError("Latitude and Longitude are required for audit")
+    
+    initialize_gee()
+
+    # --- 1. SETUP PATHS ---
+    safe_name = project_name.replace(" ", "_")
+    task_dir = os.path.join(output_base_path, f"audit_{safe_name}")
+    os.makedirs(task_dir, exist_ok=True)
+
+    # --- 2. DOWNLOAD & PROCESS DATA ---
+    # Buffer size to ensure legal zone is well-represented while staying within download limits
+    # Exports are cached by location, so re-audits of a site skip the downloads.
+    # Both exports run at once; each raster is processed as soon as it arrives.
+    buffer_size = max(length_m, width_m) * 5.0
+    exports = {
+        "sat": sentinel2_red_nir_request(lat, lon, buffer_size),
+        "dem": srtm_dem_request(lat, lon, buffer_size),
+    }
+    for name, path in EE_EXPORT_CACHE.fetch_all(exports):
+        if name == "sat":
+            mine_mask = _detect_mining(path)
+        else:
+            elevation, res_x, res_y = _read_elevation(path)
 
+    # --- 3. PROCESSING ---
     DOWNSAMPLE = 0.5
     z = zoom(elevation, DOWNSAMPLE, order=1)
     mine_m = zoom(mine_mask, DOWNSAMPLE, order=0)
@@ -177,28 +263,108 @@ def run_audit_pipeline(params, output_base_path="public"):
     print(f"📊 Mining in box: {legal_pixels}/{total_box_pixels} = {100*legal_pixels/max(total_box_pixels,1):.1f}%")
     print(f"📊 Results: Legal={legal_ha:.2f}Ha, Illegal={illegal_ha:.2f}Ha")
     
-    stats = {"legal_ha": legal_ha, "illegal_ha": illegal_ha}
+    stats = {"legal_ha": float(legal_ha), "illegal_ha": float(illegal_ha)}
 
-    # --- 6. GENERATE FILES ---
-    
-    # HTML
-    custom_colorscale = [
-        [0.0, 'rgb(34, 139, 34)'], [0.3, 'rgb(139, 69, 19)'], [0.35, 'rgb(139, 69, 19)'], 
-        [0.3501, 'rgb(100, 120, 100)'], [0.5, 'rgb(100, 120, 100)'],
-        [0.5001, 'rgb(10, 10, 20)'], [0.8, 'rgb(10, 10, 20)'],
-        [0.8001, 'rgb(255, 0, 0)'], [1.0, 'rgb(255, 0, 0)']
-    ]
-    fig = go.Figure(data=[go.Surface(z=z, surfacecolor=plot_values, cmin=0, cmax=3, colorscale=custom_colorscale, showscale=False)])
+    # --- 6. SAVE STATE FOR THE RENDERERS ---
+    run_id = uuid.uuid4().hex
+    state_path = os.path.join(task_dir, STATE_FILE)
+    staging = os.path.join(task_dir, f".{STATE_FILE}.{run_id}.tmp")
+    with open(staging, "wb") as handle:
+        np.savez_compressed(
+            handle, z=z, plot_values=plot_values, box=np.array([r_start, r_end, c_start, c_end]),
+            project_name=np.array(project_name), run_id=np.array(run_id),
+            legal_ha=np.array(legal_ha), illegal_ha=np.array(illegal_ha),
+        )
+    os.replace(staging, state_path)
+
+    # Artifacts of a previous run at this location no longer match the stats
+    for kind in ARTIFACT_FILES:
+        path = artifact_path(task_dir, kind, project_name)
+        if os.path.exists(path): os.remove(path)
+
+    return {"task_dir": task_dir, "run_id": run_id, "project_name": project_name, "stats": stats}
+
+
+def _boundary(state):
+    r_start, r_end, c_start, c_end = state["box"]
+    return [c_start, c_end, c_end, c_start, c_start], [r_start, r_start, r_end, r_end, r_start]
+
+
+def _write_full_3d_model(state, path):
+    z = state["z"]
+    fig = go.Figure(data=[go.Surface(z=z, surfacecolor=state["plot_values"], cmin=0, cmax=3, colorscale=MODEL_COLORSCALE, showscale=False)])
     
     z_top = np.max(z) + 50
-    x_b = [c_start, c_end, c_end, c_start, c_start]
-    y_b = [r_start, r_start, r_end, r_end, r_start]
+    x_b, y_b = _boundary(state)
     fig.add_trace(go.Scatter3d(x=x_b, y=y_b, z=[z_top]*5, mode='lines', line=dict(color='#00FF00', width=6), name="Authorized Limit"))
     
-    fig.update_layout(title=f"Audit: {project_name}", template="plotly_dark")
-    fig.write_html(HTML_FILE)
+    fig.update_layout(title=f"Audit: {state['project_name']}", template="plotly_dark")
+    fig.write_html(path)
+
+
+def _shared_plotlyjs(public_dir):
+    """Write plotly.js once per version under ``public_dir/vendor`` and return its URL."""
+    name = f"plotly-{get_plotlyjs_version()}.min.js"
+    path = os.path.join(public_dir, "vendor", name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(staging, "w", encoding="utf-8") as handle:
+            handle.write(get_plotlyjs())
+        os.replace(staging, path)
+    return f"{STATIC_URL_PREFIX}/vendor/{name}"
+
 
-    # PNG
+def _packed(values, dtype):
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return [f"{array.dtype.kind}{array.dtype.itemsize}", base64.b64encode(array.tobytes()).decode("ascii")]
+
+
+def _write_lean_3d_model(state, path):
+    z = state["z"]
+    plot_values = state["plot_values"]
+    classes = np.select([plot_values == 3.0, plot_values == 2.0, plot_values == 1.2], [3, 2, 1], 0)
+    nodes, faces = decimate_surface(z, classes, tolerance=MESH_TOLERANCE_M)
+    rows, cols = nodes.T
+    index_type = np.uint16 if len(nodes) <= 65536 else np.uint32
+    print(f"📊 3D mesh: {len(nodes)} of {z.size} vertices, {len(faces)} triangles")
+
+    # Colours are quantised to bytes, so the colour scale spans 0-255 instead of 0-3
+    mesh = {
+        "x": _packed(cols, np.uint16),
+        "y": _packed(rows, np.uint16),
+        "z": _packed(z[rows, cols], np.float32),
+        "intensity": _packed(np.rint(plot_values[rows, cols] / 3.0 * 255), np.uint8),
+        "i": _packed(faces[:, 0], index_type),
+        "j": _packed(faces[:, 1], index_type),
+        "k": _packed(faces[:, 2], index_type),
+    }
+    fig = go.Figure(data=[go.Mesh3d(intensitymode='vertex', cmin=0, cmax=255, colorscale=MODEL_COLORSCALE, showscale=False, hoverinfo='z', name="Terrain")])
+
+    z_top = np.max(z) + 50
+    x_b, y_b = _boundary(state)
+    fig.add_trace(go.Scatter3d(x=x_b, y=y_b, z=[z_top]*5, mode='lines', line=dict(color='#00FF00', width=6), name="Authorized Limit"))
+
+    fig.update_layout(title=f"Audit: {state['project_name']}", template="plotly_dark")
+    page = LEAN_MODEL_TEMPLATE.format(
+        title=html.escape(f"Audit: {state['project_name']}"),
+        plotlyjs=_shared_plotlyjs(os.path.dirname(state["task_dir"])),
+        figure=pio.to_json(fig).replace("</", "<\\/"),
+        mesh=json.dumps(mesh),
+    )
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(page)
+
+
+def _write_3d_model(state, path):
+    if MODEL_3D_MODE == "full":
+        _write_full_3d_model(state, path)
+    else:
+        _write_lean_3d_model(state, path)
+
+
+def _write_evidence_map(state, path):
+    plot_values = state["plot_values"]
     mpl_colors = np.array([
         [34/255, 139/255, 34/255, 1], [100/255, 120/255, 100/255, 1], 
         [10/255, 10/255, 20/255, 1], [255/255, 0, 0, 1]
@@ -209,29 +375,80 @@ def run_audit_pipeline(params, output_base_path="public"):
     mpl_data[plot_values == 2.0] = 2
     mpl_data[plot_values == 3.0] = 3
     
-    plt.figure(figsize=(10, 10))
-    plt.imshow(mpl_data, cmap=ListedColormap(mpl_colors))
-    plt.plot(x_b, y_b, 'lime', linewidth=3)
-    plt.axis('off')
-    plt.savefig(PNG_FILE, bbox_inches='tight', dpi=150)
-    plt.close()
-
-    # PDF
+    # Figure objects (not pyplot) so maps can be rendered from several threads
+    x_b, y_b = _boundary(state)
+    fig = Figure(figsize=(10, 10))
+    ax = fig.add_subplot()
+    ax.imshow(mpl_data, cmap=ListedColormap(mpl_colors))
+    ax.plot(x_b, y_b, 'lime', linewidth=3)
+    ax.axis('off')
+    fig.savefig(path, format='png', bbox_inches='tight', dpi=150)
+
+
+def _write_report(state, path):
+    # The report embeds the evidence map, so render (or reuse) it first
+    png_file = render_artifact(state["task_dir"], "map_2d")
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font('Arial', 'B', 16)
     pdf.cell(0, 10, 'Mining Compliance Audit Report', 0, 1, 'C')
     pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 10, f"Project: {project_name}", 0, 1)
-    pdf.cell(0, 10, f"Authorized: {legal_ha:.2f} Ha | Illegal: {illegal_ha:.2f} Ha", 0, 1)
-    pdf.image(PNG_FILE, x=10, w=190)
-    pdf.output(PDF_FILE)
+    pdf.cell(0, 10, f"Project: {state['project_name']}", 0, 1)
+    pdf.cell(0, 10, f"Authorized: {state['legal_ha']:.2f} Ha | Illegal: {state['illegal_ha']:.2f} Ha", 0, 1)
+    pdf.image(png_file, x=10, w=190, type='PNG')
+    pdf.output(path)
+
+
+RENDERERS = {
+    "model_3d": _write_3d_model,
+    "map_2d": _write_evidence_map,
+    "report": _write_report,
+}
+
+
+def render_artifact(task_dir, kind, run_id=None):
+    """
+    Return the path of an audit artifact, rendering it on first request.
+    Rendered files are cached in the task folder; a render for ``run_id``
+    fails with StaleAuditError once the site has been re-analysed.
+    """
+    state = load_audit_state(task_dir)
+    if run_id is not None and state["run_id"] != run_id:
+        raise StaleAuditError(f"Audit {run_id} has been superseded by a newer analysis")
+    state["task_dir"] = task_dir
+    path = artifact_path(task_dir, kind, state["project_name"])
+
+    with _render_locks_guard:
+        lock = _render_locks.setdefault(path, threading.Lock())
+    with lock:
+        if os.path.exists(path):
+            return path
+        staging = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            RENDERERS[kind](state, staging)
+            if load_audit_state(task_dir)["run_id"] != state["run_id"]:
+                raise StaleAuditError(f"Audit {state['run_id']} was re-run while rendering {kind}")
+            os.replace(staging, path)
+        finally:
+            if os.path.exists(staging): os.remove(staging)
+    print(f"🖼️ ENGINE: Rendered {kind} -> {path}")
+    return path
+
+
+def run_audit_pipeline(params, output_base_path="public", artifacts=tuple(ARTIFACT_FILES)):
+    """Analyse the site, then render the requested artifacts concurrently."""
+    analysis = analyze_site(params, output_base_path=output_base_path)
+    task_dir = analysis["task_dir"]
+
+    with ThreadPoolExecutor(max_workers=max(1, len(artifacts))) as pool:
+        futures = {kind: pool.submit(render_artifact, task_dir, kind) for kind in artifacts}
+    paths = {kind: future.result() for kind, future in futures.items()}
 
     # Return paths to all generated files
     return {
-        "html_file": HTML_FILE,
-        "png_file": PNG_FILE,
-        "pdf_file": PDF_FILE,
+        "html_file": paths.get("model_3d"),
+        "png_file": paths.get("map_2d"),
+        "pdf_file": paths.get("report"),
         "task_dir": task_dir,
-        "stats": stats
-    }
\ No newline at end of file
+        "stats": analysis["stats"]
+    }
@@ -0,0 +1,160 @@
+import numpy as np
+
+# Inside ai_engine/terrain_mesh.py
+# Adaptive decimation of a gridded terrain surface into a triangle mesh.
+
+
+def _summed_area(values):
+    """Summed-area table padded with a leading zero row and column."""
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=values.dtype)
+    table[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+    return table
+
+
+def _rect_sum(table, r0, c0, r1, c1):
+    """Sum over the nodes r0..r1, c0..c1 (inclusive) of each rectangle."""
+    return table[r1 + 1, c1 + 1] - table[r0, c1 + 1] - table[r1 + 1, c0] + table[r0, c0]
+
+
+def _plane_residual_rms(tables, r0, c0, r1, c1):
+    """
+    RMS deviation of each rectangle's elevations from their least-squares plane.
+    Uses summed-area tables of z, z², x·z and y·z, so the cost per rectangle is
+    constant. Node coordinates are their column (x) and row (y) indices.
+    """
+    sum_z, sum_zz, sum_xz, sum_yz = tables
+    h = (r1 - r0 + 1).astype(float)
+    w = (c1 - c0 + 1).astype(float)
+    n = h * w
+    z = _rect_sum(sum_z, r0, c0, r1, c1)
+    mean_x = (c0 + c1) / 2.0
+    mean_y = (r0 + r1) / 2.0
+    # Σ(x - x̄)² and Σ(y - ȳ)² over the rectangle's nodes
+    var_x = h * w * (w * w - 1) / 12.0
+    var_y = w * h * (h * h - 1) / 12.0
+    cov_x = _rect_sum(sum_xz, r0, c0, r1, c1) - mean_x * z
+    cov_y = _rect_sum(sum_yz, r0, c0, r1, c1) - mean_y * z
+    residual = _rect_sum(sum_zz, r0, c0, r1, c1) - z * z / n
+    residual -= np.divide(cov_x * cov_x, var_x, out=np.zeros_like(n), where=var_x > 0)
+    residual -= np.divide(cov_y * cov_y, var_y, out=np.zeros_like(n), where=var_y > 0)
+    return np.sqrt(np.maximum(residual, 0) / n)
+
+
+def _quadtree_leaves(z, classes, tolerance, max_cells):
+    """
+    Split the grid into rectangles of cells until each is a single cell or is
+    both one colour class and within ``tolerance`` of a plane.
+    Returns an (N, 4) array of r0, c0, r1, c1 node bounds.
+    """
+    rows, cols = z.shape
+    centred = z - z.mean()
+    yy, xx = np.mgrid[0:rows, 0:cols]
+    tables = (
+        _summed_area(centred), _summed_area(centred * centred),
+        _summed_area(xx * centred), _summed_area(yy * centred),
+    )
+    class_sum = _summed_area(classes.astype(np.int64))
+    class_sq_sum = _summed_area(classes.astype(np.int64) ** 2)
+
+    r_starts = np.arange(0, rows - 1, max_cells)
+    c_starts = np.arange(0, cols - 1, max_cells)
+    r0, c0 = [a.ravel() for a in np.meshgrid(r_starts, c_starts, indexing="ij")]
+    rects = np.stack([r0, c0, np.minimum(r0 + max_cells, rows - 1), np.minimum(c0 + max_cells, cols - 1)], axis=1)
+
+    leaves = []
+    while len(rects):
+        r0, c0, r1, c1 = rects.T
+        h, w = r1 - r0, c1 - c0
+        n = (h + 1) * (w + 1)
+        single = (h == 1) & (w == 1)
+        # Strips one cell wide have no interior node to stitch neighbours to
+        thin = (np.minimum(h, w) == 1) & ~single
+        one_class = _rect_sum(class_sq_sum, r0, c0, r1, c1) * n == _rect_sum(class_sum, r0, c0, r1, c1) ** 2
+        flat = _plane_residual_rms(tables, r0, c0, r1, c1) <= tolerance
+        done = single | (~thin & one_class & flat)
+        leaves.append(rects[done])
+
+        r0, c0, r1, c1 = rects[~done].T
+        rm = r0 + (r1 - r0) // 2
+        cm = c0 + (c1 - c0) // 2
+        children = np.concatenate([
+            np.stack([r0, c0, rm, cm], axis=1), np.stack([r0, cm, rm, c1], axis=1),
+            np.stack([rm, c0, r1, cm], axis=1), np.stack([rm, cm, r1, c1], axis=1),
+        ])
+        rects = children[(children[:, 2] > children[:, 0]) & (children[:, 3] > children[:, 1])]
+    return np.concatenate(leaves)
+
+
+def _edge_coverage(shape, lines, starts, ends):
+    """Boolean (lines, shape[1] - 1) mask of the grid edges covered by leaf sides."""
+    diff = np.zeros(shape, dtype=np.int32)
+    np.add.at(diff, (lines, starts), 1)
+    np.add.at(diff, (lines, ends), -1)
+    return diff.cumsum(axis=1)[:, :-1] > 0
+
+
+def decimate_surface(z, classes, tolerance=1.0, max_cells=32):
+    """
+    Adaptive, crack-free triangulation of a regular elevation grid.
+
+    Flat, single-class areas are merged into large cells while rough terrain
+    and class boundaries keep full resolution. Where a large cell borders
+    smaller ones, it is fanned from its centre node through every neighbour
+    corner on its sides, so no T-junction gaps appear.
+
+    Returns ``(nodes, faces)``: the (row, col) grid index of every mesh
+    vertex and an (M, 3) array of vertex indices per triangle.
+    """
+    rows, cols = z.shape
+    leaves = _quadtree_leaves(z, classes, tolerance, max_cells)
+    r0, c0, r1, c1 = leaves.T
+
+    leaf_id = np.empty((rows - 1, cols - 1), dtype=np.int64)
+    for index, (a, b, c, d) in enumerate(leaves):
+        leaf_id[a:c, b:d] = index
+
+    used = np.zeros((rows, cols), dtype=bool)
+    used[r0, c0] = used[r0, c1] = used[r1, c0] = used[r1, c1] = True
+
+    # Leaf sides between consecutive corner nodes, along rows then columns
+    horizontal = _edge_coverage((rows, cols), np.concatenate([r0, r1]), np.concatenate([c0, c0]), np.concatenate([c1, c1]))
+    vertical = _edge_coverage((cols, rows), np.concatenate([c0, c1]), np.concatenate([r0, r0]), np.concatenate([r1, r1]))
+
+    seg_a, seg_b, seg_leaf = [], [], []
+    line, pos = np.nonzero(used)
+    same = line[:-1] == line[1:]
+    r, a, b = line[:-1][same], pos[:-1][same], pos[1:][same]
+    keep = horizontal[r, a]
+    r, a, b = r[keep], a[keep], b[keep]
+    # Each side belongs to the leaf below (or right of) it and the one above (or left)
+    for offset, side in ((0, r < rows - 1), (1, r > 0)):
+        seg_a.append(r[side] * cols + a[side])
+        seg_b.append(r[side] * cols + b[side])
+        seg_leaf.append(leaf_id[r[side] - offset, a[side]])
+    line, pos = np.nonzero(used.T)
+    same = line[:-1] == line[1:]
+    c, a, b = line[:-1][same], pos[:-1][same], pos[1:][same]
+    keep = vertical[c, a]
+    c, a, b = c[keep], a[keep], b[keep]
+    for offset, side in ((0, c < cols - 1), (1, c > 0)):
+        seg_a.append(a[side] * cols + c[side])
+        seg_b.append(b[side] * cols + c[side])
+        seg_leaf.append(leaf_id[a[side], c[side] - offset])
+    seg_a, seg_b, seg_leaf = (np.concatenate(part) for part in (seg_a, seg_b, seg_leaf))
+    segments_per_leaf = np.bincount(seg_leaf, minlength=len(leaves))
+
+    plain = segments_per_leaf == 4
+    tl, tr = r0 * cols + c0, r0 * cols + c1
+    bl, br = r1 * cols + c0, r1 * cols + c1
+    faces = [
+        np.stack([tl[plain], tr[plain], br[plain]], axis=1),
+        np.stack([tl[plain], br[plain], bl[plain]], axis=1),
+    ]
+    fanned = ~plain[seg_leaf]
+    centres = ((r0 + r1) // 2) * cols + (c0 + c1) // 2
+    faces.append(np.stack([seg_a[fanned], seg_b[fanned], centres[seg_leaf[fanned]]], axis=1))
+    faces = np.concatenate(faces)
+
+    flat_nodes, faces = np.unique(faces, return_inverse=True)
+    nodes = np.stack(np.divmod(flat_nodes, cols), axis=1)
+    return nodes, faces.reshape(-1, 3)
@@ -0,0 +1,239 @@
+"""
+Background execution of lease document audits.
+An uploaded lease is queued as a job; the Gemini parameter extraction and the
+Earth Engine site analysis then run on a dedicated process pool so PDF
+parsing, exports and rendering never block the API's event loop. Job status,
+step progress and the dashboard payload are persisted by the job store.
+A job completes as soon as the compliance stats are known; the 3D model,
+evidence map and PDF report are rendered on the same pool when first
+requested (the map is pre-rendered by default) and cached on disk.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.quantitative_analysis import StepLogger
+from app.services.job_queue import JobRunner, JobStore, ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = BACKEND_DIR.parent  # Holds the ``ai_engine`` package
+PUBLIC_DIR = BACKEND_DIR / "public"
+API_BASE_URL = os.getenv("AUDIT_API_BASE_URL", "http://127.0.0.1:8000")
+
+AUDIT_JOB_DB_PATH = Path(os.getenv("AUDIT_JOB_DB", str(Path(tempfile.gettempdir()) / "khanan_jobs" / "audits.sqlite3")))
+AUDIT_UPLOAD_DIR = Path(os.getenv("AUDIT_UPLOAD_DIR", str(Path(tempfile.gettempdir()) / "khanan_jobs" / "audit_uploads")))
+AUDIT_WORKERS = max(1, int(os.getenv("AUDIT_WORKERS", "2")))
+AUDIT_JOB_RETENTION_SECONDS = float(os.getenv("AUDIT_JOB_RETENTION_HOURS", "168")) * 3600
+
+# Artifact kinds served by the API, with their media types
+ARTIFACT_MEDIA_TYPES = {
+    "model_3d": "text/html",
+    "map_2d": "image/png",
+    "report": "application/pdf",
+}
+# Artifacts rendered in the background as soon as a job completes
+AUDIT_PRERENDER = tuple(
+    kind for kind in os.getenv("AUDIT_PRERENDER", "map_2d").replace(" ", "").split(",") if kind in ARTIFACT_MEDIA_TYPES
+)
+
+
+class AuditInputError(Exception):
+    """Raised when an uploaded lease document cannot be audited."""
+
+
+class AuditArtifactGoneError(Exception):
+    """Raised when an artifact's analysis has been superseded or removed."""
+
+
+def _ensure_ai_engine_path() -> None:
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _extract_parameters(document_path: str) -> Dict[str, Any]:
+    """Worker: parse the lease document into mining parameters."""
+
+    _ensure_ai_engine_path()
+    from ai_engine.gemini_parser import extract_mining_params
+
+    return extract_mining_params(document_path) or {}
+
+
+def _analyze_site(params: Dict[str, Any], output_base_path: str) -> Dict[str, Any]:
+    """Worker: run the satellite analysis and save its state under ``output_base_path``."""
+
+    _ensure_ai_engine_path()
+    from ai_engine.audit_engine import analyze_site
+
+    return analyze_site(params, output_base_path=output_base_path)
+
+
+def _render_artifact(task_dir: str, kind: str, run_id: str) -> str:
+    """Worker: render (or reuse) one artifact of an analysed site."""
+
+    _ensure_ai_engine_path()
+    from ai_engine.audit_engine import StaleAuditError, render_artifact
+
+    try:
+        return render_artifact(task_dir, kind, run_id=run_id)
+    except (StaleAuditError, FileNotFoundError) as exc:
+        raise AuditArtifactGoneError(str(exc)) from None
+
+
+_audit_pool: Optional[ProcessPoolExecutor] = None
+_audit_pool_lock = threading.Lock()
+
+
+def get_audit_pool() -> ProcessPoolExecutor:
+    """Shared process pool for audit work (created on first use).
+
+    Workers are spawned so Earth Engine, matplotlib and GDAL state stay out of
+    the API process and CPU-bound rendering does not contend for its GIL.
+    """
+
+    global _audit_pool
+    with _audit_pool_lock:
+        if _audit_pool is None:
+            _audit_pool = ProcessPoolExecutor(
+                max_workers=AUDIT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _audit_pool
+
+
+def _reset_audit_pool(broken: ProcessPoolExecutor) -> None:
+    global _audit_pool
+    with _audit_pool_lock:
+        if _audit_pool is broken:
+            _audit_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(func, *args) -> Future:
+    pool = get_audit_pool()
+    try:
+        future = pool.submit(func, *args)
+    except BrokenProcessPool:
+        _reset_audit_pool(pool)
+        raise
+
+    def check(done: Future) -> None:
+        # A crashed worker poisons the executor; later work gets a fresh one.
+        if isinstance(done.exception(), BrokenProcessPool):
+            _reset_audit_pool(pool)
+
+    future.add_done_callback(check)
+    return future
+
+
+def _in_worker(func, *args):
+    return _submit(func, *args).result()
+
+
+_artifact_renders: Dict[Any, Future] = {}
+_artifact_renders_lock = threading.Lock()
+
+
+def request_artifact(result: Dict[str, Any], kind: str) -> Future:
+    """Future for the path of a finished audit's artifact; concurrent requests share one render."""
+
+    analysis = result["analysis"]
+    key = (analysis["runId"], kind)
+    with _artifact_renders_lock:
+        future = _artifact_renders.get(key)
+        if future is None:
+            future = _submit(_render_artifact, analysis["taskDir"], kind, analysis["runId"])
+            _artifact_renders[key] = future
+
+            def forget(_: Future) -> None:
+                with _artifact_renders_lock:
+                    _artifact_renders.pop(key, None)
+
+            future.add_done_callback(forget)
+    return future
+
+
+def audit_view(job_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Dashboard payload of a completed audit job, with artifact URLs."""
+
+    view = {key: value for key, value in result.items() if key != "analysis"}
+    view["urls"] = {kind: f"{API_BASE_URL}/api/analysis/audits/{job_id}/artifacts/{kind}" for kind in ARTIFACT_MEDIA_TYPES}
+    return view
+
+
+def _dashboard_payload(params: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "project": params.get("project_name"),
+        "location": f"{params.get('lat')}, {params.get('lon')}",
+        "compliance": "Analysis Complete",
+        "stats": analysis.get("stats", {}),
+        "analysis": {"taskDir": analysis["task_dir"], "runId": analysis["run_id"]},
+    }
+
+
+def _run_audit_job(job: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    step_logger = StepLogger(on_change=progress)
+    document = Path(job["documentPath"])
+    try:
+        with step_logger.step("Extract mining parameters") as details:
+            params = _in_worker(_extract_parameters, str(document))
+            details.append(f"Project: {params.get('project_name') or 'unknown'}")
+        if not params:
+            raise AuditInputError(
+                "Could not extract mining parameters from the uploaded document. "
+                "Please ensure the document contains valid mining site information."
+            )
+        with step_logger.step("Analyze site"):
+            PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
+            analysis = _in_worker(_analyze_site, params, str(PUBLIC_DIR))
+    finally:
+        document.unlink(missing_ok=True)
+    result = _dashboard_payload(params, analysis)
+    for kind in AUDIT_PRERENDER:
+        request_artifact(result, kind)
+    return result
+
+
+def store_upload(source, filename: str) -> Path:
+    """Copy an uploaded file object into the upload directory under a unique name."""
+
+    AUDIT_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    target = AUDIT_UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(filename or '').suffix.lower()}"
+    with open(target, "wb") as handle:
+        while chunk := source.read(1024 * 1024):
+            handle.write(chunk)
+    return target
+
+
+_audit_runner: Optional[JobRunner] = None
+_audit_runner_lock = threading.Lock()
+
+
+def get_audit_job_runner() -> JobRunner:
+    """Job runner for queued audits (created on first use)."""
+
+    global _audit_runner
+    with _audit_runner_lock:
+        if _audit_runner is None:
+            _audit_runner = JobRunner(
+                JobStore(AUDIT_JOB_DB_PATH),
+                kind="audit",
+                handler=_run_audit_job,
+                max_workers=AUDIT_WORKERS,
+                client_errors=(AuditInputError,),
+                retention_seconds=AUDIT_JOB_RETENTION_SECONDS,
+            )
+    return _audit_runner
@@ -7,33 +7,57 @@ Imported and adapted from the reference project.
 from __future__ import annotations
 
 import asyncio
+import base64
+import contextlib
+import copy
+import hashlib
+import json
 import logging
 import math
+import multiprocessing
 import os
 import shutil
-import subprocess
 import tempfile
+import threading
 import time
+import tracemalloc
+import urllib.parse
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
 
 import numpy as np
 import requests
 import rasterio
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from rasterio.enums import Resampling
 from rasterio.features import rasterize
-from rasterio.merge import merge
-from rasterio.transform import array_bounds, xy
-from rasterio.warp import calculate_default_transform, reproject
-from scipy import integrate, ndimage
-from shapely.geometry import MultiPolygon, Point, shape
-from shapely.ops import transform as shapely_transform, unary_union
+from rasterio.io import MemoryFile
+from rasterio.transform import array_bounds, from_origin, xy
+from rasterio.windows import Window, from_bounds as window_from_bounds
+from rasterio.warp import reproject
+from scipy import ndimage
+from shapely import STRtree
+from shapely.geometry import MultiPolygon, Point, box as shapely_box, shape
+from shapely.ops import unary_union
 import pyproj
+import shapely
+
+from app.services.dem_tile_cache import DemTileCache, DemTileCacheError
+from app.services.dtm_grid_cache import DtmGridCache, block_mean, extent_window, snap_extent
+from app.services.ground_extraction import percentile_filter
+from app.services.job_queue import JobNotFoundError, JobRunner, JobStore, ProgressCallback
+from app.services.result_cache import ResultCache
+from app.services.step_metrics import BYTES_PER_MB, STEP_METRICS, PeakRssSampler
+from app.services.volume_kernels import block_depth_stats, use_compiled_kernels
 
 
 logger = logging.getLogger(__name__)
@@ -47,7 +71,7 @@ DEM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 COPERNICUS_BASE_URL = os.getenv(
     "COPERNICUS_DEM_BASE_URL",
     "https://copernicus-dem-30m.s3.amazonaws.com",
-)
+)  # A local directory or file:// URL with the same layout serves as an offline mirror
 COPERNICUS_PRODUCT = os.getenv("COPERNICUS_DEM_PRODUCT", "Copernicus_DSM_COG_10")
 COPERNICUS_FALLBACK_PRODUCT = os.getenv("COPERNICUS_DEM_FALLBACK_PRODUCT", "Copernicus_DSM_COG_30")
 COPERNICUS_DATASET_LABEL = os.getenv(
@@ -58,7 +82,25 @@ COPERNICUS_DATASET_LABEL = os.getenv(
 PIXEL_RESOLUTION_METERS = 10.0  # Target DEM resolution after resampling
 RIM_MIN_WIDTH_PIXELS = 8
 RIM_DILATION_ITERATIONS = 2
+DTM_PERCENTILE = 30.0
+DTM_WINDOW_METERS = 24.0
+DTM_OPENING_METERS = 12.0
+DTM_SMOOTHING_METERS = 2.5
+DTM_CACHE_VERSION = 4
+DTM_CACHE_PADDING_METERS = 1000.0
+DEM_WARP_THREADS = max(1, int(os.getenv("QUANT_ANALYSIS_WARP_THREADS", str(os.cpu_count() or 1))))
+DEM_WARP_MEMORY_MB = int(os.getenv("QUANT_ANALYSIS_WARP_MEMORY_MB", "256"))
+COPERNICUS_ACCESS_MODE = os.getenv("COPERNICUS_DEM_ACCESS_MODE", "tiles").strip().lower()  # "tiles" or "window"
+# Per-step Python allocation peaks via tracemalloc (adds interpreter overhead).
+TRACEMALLOC_STEPS = os.getenv("QUANT_ANALYSIS_TRACEMALLOC", "").strip().lower() in ("1", "true", "yes")
 MAX_TILE_DOWNLOAD_SECONDS = int(os.getenv("COPERNICUS_DEM_TIMEOUT_SECONDS", "180"))
+MAX_TILE_DOWNLOAD_WORKERS = max(1, int(os.getenv("COPERNICUS_DEM_DOWNLOAD_WORKERS", "4")))
+MAX_TILE_DOWNLOAD_RETRIES = max(0, int(os.getenv("COPERNICUS_DEM_DOWNLOAD_RETRIES", "3")))
+TILE_RETRY_BACKOFF_SECONDS = 1.0
+# Bytes read per write while streaming a tile; a dropped connection loses at
+# most this much of the partial download.
+TILE_DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+TILE_LOCK_STALE_SECONDS = MAX_TILE_DOWNLOAD_SECONDS * (MAX_TILE_DOWNLOAD_RETRIES + 1)
 
 try:
     MAX_VISUALIZATION_DIMENSION = max(16, min(160, int(os.getenv("QUANT_ANALYSIS_MAX_GRID", "96"))))
@@ -66,6 +108,11 @@ except ValueError:  # noqa: PERF203 - tiny scope
     MAX_VISUALIZATION_DIMENSION = 96
 
 MIN_VISUALIZATION_POINTS = 12
+GRID_NODATA_INT16 = -32768  # Sentinel for cells outside the block in int16-encoded grids
+GRID_INT16_MAX = 32767
+
+GridEncoding = Literal["json", "int16", "float16"]
+QualityProfile = Literal["final", "preview"]
 
 
 def _read_float_env(name: str, default: float) -> float:
@@ -76,12 +123,74 @@ def _read_float_env(name: str, default: float) -> float:
         return float(default)
 
 
+# Quality profiles map to DTM cache levels: "final" reads the full-resolution
+# grid, coarser profiles read a block-averaged overview stored with it.
+PREVIEW_RESOLUTION_METERS = _read_float_env("QUANT_ANALYSIS_PREVIEW_RESOLUTION_METERS", 30.0)
+QUALITY_PROFILES: Dict[str, int] = {
+    "final": 1,
+    "preview": max(1, int(round(PREVIEW_RESOLUTION_METERS / PIXEL_RESOLUTION_METERS))),
+}
+DTM_OVERVIEW_FACTORS = sorted({factor for factor in QUALITY_PROFILES.values() if factor > 1})
+DTM_LATTICE_METERS = PIXEL_RESOLUTION_METERS * math.lcm(*DTM_OVERVIEW_FACTORS, 1)
+
 VOLUME_PRIORITY_THRESHOLD = _read_float_env("QUANT_ANALYSIS_VOLUME_THRESHOLD", 100_000.0)
 DEPTH_PRIORITY_THRESHOLD = _read_float_env("QUANT_ANALYSIS_DEPTH_THRESHOLD", 15.0)
+DEM_CACHE_MAX_BYTES = int(_read_float_env("QUANT_ANALYSIS_DEM_CACHE_MAX_GB", 20.0) * 1024 ** 3)
+
+DEM_TILE_CACHE = DemTileCache(DEM_CACHE_DIR, max_bytes=DEM_CACHE_MAX_BYTES)
+
+DTM_CACHE_DIR = Path(os.getenv("QUANT_ANALYSIS_DTM_CACHE", tempfile.gettempdir())) / "khanan_dtm_cache"
+DTM_CACHE_MAX_BYTES = int(_read_float_env("QUANT_ANALYSIS_DTM_CACHE_MAX_GB", 10.0) * 1024 ** 3)
+DTM_GRID_CACHE = DtmGridCache(DTM_CACHE_DIR, max_bytes=DTM_CACHE_MAX_BYTES)
+
+RESULT_CACHE_VERSION = 2  # Bump whenever block metrics or summaries change for the same inputs
+RESULT_CACHE_DIR = Path(os.getenv("QUANT_ANALYSIS_RESULT_CACHE", tempfile.gettempdir())) / "khanan_result_cache"
+RESULT_CACHE = ResultCache(
+    RESULT_CACHE_DIR,
+    max_bytes=int(_read_float_env("QUANT_ANALYSIS_RESULT_CACHE_MAX_GB", 2.0) * 1024 ** 3),
+    ttl_seconds=_read_float_env("QUANT_ANALYSIS_RESULT_CACHE_TTL_HOURS", 24.0) * 3600,
+)
+
+BLOCK_CACHE_DIR = Path(os.getenv("QUANT_ANALYSIS_BLOCK_CACHE", tempfile.gettempdir())) / "khanan_block_cache"
+BLOCK_METRIC_CACHE = ResultCache(
+    BLOCK_CACHE_DIR,
+    max_bytes=int(_read_float_env("QUANT_ANALYSIS_BLOCK_CACHE_MAX_GB", 1.0) * 1024 ** 3),
+    ttl_seconds=_read_float_env("QUANT_ANALYSIS_BLOCK_CACHE_TTL_DAYS", 30.0) * 86400,
+)
+
+JOB_DB_PATH = Path(os.getenv("QUANT_ANALYSIS_JOB_DB", str(Path(tempfile.gettempdir()) / "khanan_jobs" / "quantitative.sqlite3")))
+JOB_WORKERS = max(1, int(os.getenv("QUANT_ANALYSIS_JOB_WORKERS", "2")))
+JOB_RETENTION_SECONDS = _read_float_env("QUANT_ANALYSIS_JOB_RETENTION_HOURS", 24.0) * 3600
+JOB_EVENT_POLL_SECONDS = 1.0
+# Records buffered between the analysis thread and a slow NDJSON client
+STREAM_QUEUE_RECORDS = max(1, int(os.getenv("QUANT_ANALYSIS_STREAM_QUEUE_RECORDS", "16")))
+STREAM_PUT_POLL_SECONDS = 1.0
+
+# Grids whose estimated working set exceeds the budget are processed in
+# chunks: the DTM is memory-mapped from the grid cache and blocks are grouped
+# into overlapping windows that run on a process pool.
+MEMORY_BUDGET_BYTES = int(_read_float_env("QUANT_ANALYSIS_MEMORY_BUDGET_MB", 2048.0) * BYTES_PER_MB)
+CHUNK_WORKERS = max(1, int(os.getenv("QUANT_ANALYSIS_CHUNK_WORKERS", str(min(4, os.cpu_count() or 1)))))
+BYTES_PER_GRID_PIXEL = 24  # Surface + terrain + labels (4 B each) plus per-block working copies
+CHUNK_MARGIN_PIXELS = RIM_DILATION_ITERATIONS + 4  # Rim footprint, window padding and even alignment
+MIN_CHUNK_CORE_PIXELS = 64
+ZONE_WORKERS = max(1, int(os.getenv("QUANT_ANALYSIS_ZONE_WORKERS", "2")))  # UTM zone groups processed at once
 
 
 class QuantitativeAnalysisRequest(BaseModel):
     results: Dict[str, Any] = Field(..., description="Full analysis results payload including tiles and merged blocks")
+    gridEncoding: GridEncoding = Field(
+        "json",
+        description="Visualization grid format: nested JSON lists, or base64 little-endian int16/float16 arrays",
+    )
+    quality: QualityProfile = Field(
+        "final",
+        description="'final' runs at the full DEM resolution; 'preview' reads a coarser cached overview level",
+    )
+    incremental: bool = Field(
+        False,
+        description="Reuse stored metrics for blocks whose persistent_id, geometry and DEM inputs are unchanged",
+    )
 
     model_config = {
         "extra": "ignore"
@@ -92,6 +201,7 @@ class QuantitativeAnalysisRequest(BaseModel):
 class DemTile:
     path: Path
     product: str
+    tile_id: Optional[str] = None  # Parent Copernicus tile when ``path`` holds a block window
 
 
 @dataclass
@@ -100,28 +210,95 @@ class StepLog:
     status: str
     duration_ms: int
     details: List[str]
+    peak_rss_delta_mb: Optional[float] = None
+    tracemalloc_peak_mb: Optional[float] = None
+    arrays: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
 
 class StepLogger:
-    """Collects sequential step logs with execution time."""
+    """Collects sequential step logs with execution time and memory use.
+
+    Each step records the peak RSS growth while it ran, the tracemalloc peak
+    when ``QUANT_ANALYSIS_TRACEMALLOC`` is enabled, and the sizes of arrays
+    registered with :meth:`record_array`. Completed steps are also reported
+    to ``STEP_METRICS``. ``on_change`` receives a snapshot of all steps
+    whenever a step starts or finishes, so callers can report progress while
+    the analysis is running. Steps may run concurrently on different threads;
+    :meth:`scoped` gives each thread a view that tags its step names.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, on_change: Optional[ProgressCallback] = None) -> None:
         self._steps: List[StepLog] = []
+        self._on_change = on_change
+        self._active = threading.local()
+        self._scope: Optional[str] = None
+        if TRACEMALLOC_STEPS and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def scoped(self, scope: str) -> "StepLogger":
+        """A view recording into the same step list with `` [scope]`` appended to step names."""
+
+        view = copy.copy(self)
+        view._scope = scope
+        return view
+
+    def record_array(self, name: str, array: np.ndarray) -> None:
+        """Attach an array's shape, dtype and size to the step running on this thread."""
+
+        current = getattr(self._active, "step", None)
+        if current is not None:
+            current.arrays[name] = {
+                "shape": list(array.shape),
+                "dtype": str(array.dtype),
+                "mb": round(array.nbytes / BYTES_PER_MB, 2),
+            }
+
+    def _emit(self) -> None:
+        if self._on_change is None:
+            return
+        try:
+            self._on_change([
+                {**step.__dict__, "details": list(step.details), "arrays": dict(step.arrays)} for step in self._steps
+            ])
+        except Exception as exc:  # noqa: BLE001 - progress reporting must not fail the analysis
+            logger.warning("Step progress callback failed: %s", exc)
 
     @contextmanager
     def step(self, name: str) -> Iterable[List[str]]:
         details: List[str] = []
+        log = StepLog(
+            name=f"{name} [{self._scope}]" if self._scope else name, status="running", duration_ms=0, details=details
+        )
+        self._steps.append(log)
+        outer = getattr(self._active, "step", None)
+        self._active.step = log
+        self._emit()
+        tracing = TRACEMALLOC_STEPS and tracemalloc.is_tracing()
+        traced_start = 0
+        if tracing:
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
         start = time.perf_counter()
-        status = "completed"
+        sampler = PeakRssSampler()
         try:
-            yield details
+            with sampler:
+                yield details
+            log.status = "completed"
         except Exception as exc:  # noqa: BLE001
-            status = "failed"
+            log.status = "failed"
             details.append(f"Error: {exc}")
             raise
         finally:
-            duration_ms = int((time.perf_counter() - start) * 1000)
-            self._steps.append(StepLog(name=name, status=status, duration_ms=duration_ms, details=details))
+            log.duration_ms = int((time.perf_counter() - start) * 1000)
+            delta = sampler.delta_bytes
+            log.peak_rss_delta_mb = round(delta / BYTES_PER_MB, 1) if delta is not None else None
+            if tracing:
+                traced_peak = tracemalloc.get_traced_memory()[1] - traced_start
+                log.tracemalloc_peak_mb = round(max(0, traced_peak) / BYTES_PER_MB, 1)
+            self._active.step = outer
+            # Aggregate scoped steps under their plain name.
+            STEP_METRICS.observe({**log.__dict__, "name": name, "details": list(details)})
+            self._emit()
 
     @property
     def steps(self) -> List[Dict[str, Any]]:
@@ -151,17 +328,133 @@ def _copernicus_product_candidates() -> List[str]:
     return ordered
 
 
-def _download_copernicus_tile(url: str, cache_path: Path) -> None:
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+_tile_locks: Dict[Path, threading.Lock] = {}
+_tile_locks_guard = threading.Lock()
+
+
+class _RetryableDownloadError(QuantitativeProcessingError):
+    """Transient download failure (connection error, 5xx, throttling)."""
+
+
+class _StreamClosed(Exception):
+    """The NDJSON client went away; the analysis stops producing records."""
+
+
+def _get_http_session() -> requests.Session:
+    """Shared keep-alive session sized for the tile download pool."""
+
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=MAX_TILE_DOWNLOAD_WORKERS,
+                pool_maxsize=MAX_TILE_DOWNLOAD_WORKERS,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+@contextmanager
+def _tile_write_lock(cache_path: Path) -> Iterable[None]:
+    """Serialise writers of ``cache_path`` across threads and processes.
+
+    Threads share an in-process lock per path; other workers on the same host
+    are kept out by an exclusive ``.lock`` file, which is broken once it is
+    older than any download could legitimately take.
+    """
+
+    with _tile_locks_guard:
+        thread_lock = _tile_locks.setdefault(cache_path, threading.Lock())
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = cache_path.with_suffix(cache_path.suffix + ".lock")
+    with thread_lock:
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime > TILE_LOCK_STALE_SECONDS:
+                        lock_path.unlink(missing_ok=True)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.5)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+
+def _local_source_path(url: str) -> Optional[Path]:
+    """Filesystem path for ``file://`` or plain-path tile URLs (local mirrors), else ``None``."""
+
+    if url.startswith("file://"):
+        return Path(urllib.parse.unquote(urllib.parse.urlparse(url).path))
+    if "://" not in url:
+        return Path(url)
+    return None
+
+
+def _download_copernicus_tile(url: str, cache_path: Path) -> Path:
+    """Download ``url`` next to ``cache_path`` with retries, resuming partial ``.tmp`` files.
+
+    Returns the completed ``.tmp`` file; the tile cache validates it and moves
+    it into place.
+    """
+
     cache_path.parent.mkdir(parents=True, exist_ok=True)
     temp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
-    with requests.get(url, stream=True, timeout=MAX_TILE_DOWNLOAD_SECONDS) as response:
-        if response.status_code != 200:
-            raise QuantitativeProcessingError(f"HTTP {response.status_code} for DEM tile {url}")
-        with open(temp_path, "wb") as dst:
-            for chunk in response.iter_content(chunk_size=8 * 1024 * 1024):
-                if chunk:
-                    dst.write(chunk)
-    temp_path.replace(cache_path)
+    local_path = _local_source_path(url)
+    if local_path is not None:
+        if not local_path.is_file():
+            raise QuantitativeProcessingError(f"DEM tile {url} not found in local mirror")
+        shutil.copyfile(local_path, temp_path)
+        return temp_path
+
+    session = _get_http_session()
+
+    for attempt in range(MAX_TILE_DOWNLOAD_RETRIES + 1):
+        try:
+            _stream_to_file(session, url, temp_path)
+            return temp_path
+        except _RetryableDownloadError as exc:
+            if attempt >= MAX_TILE_DOWNLOAD_RETRIES:
+                raise QuantitativeProcessingError(str(exc)) from exc
+            delay = TILE_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+            logger.info("Retrying DEM tile %s in %.1fs after: %s", url, delay, exc)
+            time.sleep(delay)
+
+
+def _stream_to_file(session: requests.Session, url: str, temp_path: Path) -> None:
+    offset = temp_path.stat().st_size if temp_path.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    try:
+        with session.get(url, stream=True, timeout=MAX_TILE_DOWNLOAD_SECONDS, headers=headers) as response:
+            if response.status_code == 416:
+                # Partial file no longer matches the remote object; start over.
+                temp_path.unlink(missing_ok=True)
+                raise _RetryableDownloadError(f"HTTP 416 resuming DEM tile {url}")
+            if response.status_code == 429 or response.status_code >= 500:
+                raise _RetryableDownloadError(f"HTTP {response.status_code} for DEM tile {url}")
+            if response.status_code not in (200, 206):
+                temp_path.unlink(missing_ok=True)
+                raise QuantitativeProcessingError(f"HTTP {response.status_code} for DEM tile {url}")
+
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(temp_path, mode) as dst:
+                for chunk in response.iter_content(chunk_size=TILE_DOWNLOAD_CHUNK_BYTES):
+                    if chunk:
+                        dst.write(chunk)
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as exc:
+        raise _RetryableDownloadError(f"{exc.__class__.__name__} for DEM tile {url}: {exc}") from exc
 
 
 def _ensure_copernicus_tile(lat: int, lon: int, step_details: List[str]) -> DemTile:
@@ -170,60 +463,273 @@ def _ensure_copernicus_tile(lat: int, lon: int, step_details: List[str]) -> DemT
     for product in _copernicus_product_candidates():
         folder = f"{product}_{tile_key}_DEM"
         filename = f"{folder}.tif"
-        cache_path = DEM_CACHE_DIR / product / filename
-        if cache_path.exists():
+        cache_path = DEM_TILE_CACHE.lookup(product, filename)
+        if cache_path is not None:
             step_details.append(f"Cache hit for {folder}")
+            DEM_TILE_CACHE.record(hit=True)
             return DemTile(path=cache_path, product=product)
 
         url = f"{COPERNICUS_BASE_URL}/{folder}/{filename}"
-        step_details.append(f"Fetching {folder} from {url}")
         try:
-            _download_copernicus_tile(url, cache_path)
+            with _tile_write_lock(DEM_TILE_CACHE.path_for(product, filename)):
+                cache_path = DEM_TILE_CACHE.lookup(product, filename)
+                if cache_path is not None:
+                    step_details.append(f"Cache hit for {folder} (fetched concurrently)")
+                    DEM_TILE_CACHE.record(hit=True)
+                    return DemTile(path=cache_path, product=product)
+                step_details.append(f"Fetching {folder} from {url}")
+                temp_path = _download_copernicus_tile(url, DEM_TILE_CACHE.path_for(product, filename))
+                cache_path = DEM_TILE_CACHE.insert(product, temp_path, filename)
             logger.info("Fetched Copernicus tile %s (%s)", folder, url)
+            DEM_TILE_CACHE.record(hit=False)
             return DemTile(path=cache_path, product=product)
-        except QuantitativeProcessingError as exc:
+        except (QuantitativeProcessingError, DemTileCacheError) as exc:
             errors.append(str(exc))
-            cache_path.unlink(missing_ok=True)
             logger.warning("Failed to fetch Copernicus tile %s (%s): %s", folder, url, exc)
             continue
 
+    DEM_TILE_CACHE.record(hit=False)
     raise QuantitativeProcessingError(
         f"Failed to download Copernicus DEM tile {tile_key}: {'; '.join(errors) if errors else 'no sources available'}"
     )
 
 
+def _copernicus_vsicurl_env() -> rasterio.Env:
+    return rasterio.Env(
+        GDAL_DISABLE_READDIR_ON_OPEN="EMPTY_DIR",
+        CPL_VSIL_CURL_ALLOWED_EXTENSIONS=".tif",
+        GDAL_HTTP_MERGE_CONSECUTIVE_RANGES="YES",
+        GDAL_HTTP_MULTIPLEX="YES",
+        GDAL_HTTP_TIMEOUT=str(MAX_TILE_DOWNLOAD_SECONDS),
+        GDAL_HTTP_MAX_RETRY=str(MAX_TILE_DOWNLOAD_RETRIES),
+        GDAL_HTTP_RETRY_DELAY=str(TILE_RETRY_BACKOFF_SECONDS),
+    )
+
+
+def _cog_layout(src: rasterio.io.DatasetReader) -> Dict[str, Any]:
+    block_height, block_width = src.block_shapes[0]
+    return {
+        "transform": list(src.transform)[:6],
+        "width": src.width,
+        "height": src.height,
+        "blockWidth": block_width,
+        "blockHeight": block_height,
+        "crs": src.crs.to_wkt() if src.crs else None,
+        "nodata": src.nodata,
+    }
+
+
+_COG_LAYOUT_KEYS = ("transform", "width", "height", "blockWidth", "blockHeight")
+
+
+def _read_cog_layout(layout_path: Path) -> Optional[Dict[str, Any]]:
+    """Cached block layout of a tile, or ``None`` if missing or unreadable."""
+
+    try:
+        layout = json.loads(layout_path.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Discarding unreadable COG layout %s: %s", layout_path, exc)
+        return None
+    if not isinstance(layout, dict) or any(key not in layout for key in _COG_LAYOUT_KEYS):
+        logger.warning("Discarding incomplete COG layout %s", layout_path)
+        return None
+    return layout
+
+
+def _write_cog_layout(layout_path: Path, layout: Dict[str, Any]) -> None:
+    layout_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = layout_path.with_name(f".{layout_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        staging.write_text(json.dumps(layout))
+        os.replace(staging, layout_path)
+    finally:
+        staging.unlink(missing_ok=True)
+
+
+def _intersecting_blocks(layout: Dict[str, Any], aoi_bounds: Tuple[float, float, float, float]) -> List[Tuple[int, int, Window]]:
+    """Internal COG blocks of a tile that overlap ``aoi_bounds`` (tile CRS units)."""
+
+    transform = rasterio.Affine(*layout["transform"])
+    width, height = layout["width"], layout["height"]
+    block_width, block_height = layout["blockWidth"], layout["blockHeight"]
+    aoi = window_from_bounds(*aoi_bounds, transform=transform)
+    col_start = max(0, math.floor(aoi.col_off))
+    row_start = max(0, math.floor(aoi.row_off))
+    col_stop = min(width, math.ceil(aoi.col_off + aoi.width))
+    row_stop = min(height, math.ceil(aoi.row_off + aoi.height))
+    if col_start >= col_stop or row_start >= row_stop:
+        return []
+
+    blocks = []
+    for block_row in range(row_start // block_height, (row_stop - 1) // block_height + 1):
+        for block_col in range(col_start // block_width, (col_stop - 1) // block_width + 1):
+            window = Window(
+                block_col * block_width,
+                block_row * block_height,
+                min(block_width, width - block_col * block_width),
+                min(block_height, height - block_row * block_height),
+            )
+            blocks.append((block_row, block_col, window))
+    return blocks
+
+
+def _write_cog_block(src: rasterio.io.DatasetReader, window: Window, cache_path: Path) -> Path:
+    """Read one block window from the remote COG into a local ``.tmp`` GeoTIFF."""
+
+    temp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    data = src.read(1, window=window)
+    profile = {
+        "driver": "GTiff",
+        "width": int(window.width),
+        "height": int(window.height),
+        "count": 1,
+        "dtype": data.dtype,
+        "crs": src.crs,
+        "transform": src.window_transform(window),
+        "nodata": src.nodata,
+        "compress": "deflate",
+    }
+    with rasterio.open(temp_path, "w", **profile) as dst:
+        dst.write(data, 1)
+    return temp_path
+
+
+def _ensure_copernicus_window(
+    lat: int,
+    lon: int,
+    aoi_bounds: Tuple[float, float, float, float],
+    step_details: List[str],
+) -> List[DemTile]:
+    """Fetch only the internal COG blocks of one tile that intersect the AOI.
+
+    Blocks are read over HTTP range requests via ``/vsicurl/`` (or directly
+    from a local mirror) and cached as
+    small GeoTIFFs in the tile cache; the tile's block layout is cached
+    alongside them so fully cached AOIs need no network access at all.
+    """
+
+    tile_key = _copernicus_tile_key(lat, lon)
+    errors: List[str] = []
+    for product in _copernicus_product_candidates():
+        folder = f"{product}_{tile_key}_DEM"
+        url = f"{COPERNICUS_BASE_URL}/{folder}/{folder}.tif"
+        layout_path = DEM_TILE_CACHE.path_for(product, f"blocks/{folder}/layout.json")
+        try:
+            with contextlib.ExitStack() as stack:
+                src: Optional[rasterio.io.DatasetReader] = None
+
+                def remote() -> rasterio.io.DatasetReader:
+                    nonlocal src
+                    if src is None:
+                        local_path = _local_source_path(url)
+                        stack.enter_context(_copernicus_vsicurl_env())
+                        src = stack.enter_context(rasterio.open(str(local_path) if local_path else f"/vsicurl/{url}"))
+                    return src
+
+                layout = _read_cog_layout(layout_path)
+                if layout is None:
+                    layout = _cog_layout(remote())
+                    _write_cog_layout(layout_path, layout)
+
+                tiles: List[DemTile] = []
+                fetched = 0
+                for block_row, block_col, window in _intersecting_blocks(layout, aoi_bounds):
+                    block_name = f"blocks/{folder}/r{block_row:03d}_c{block_col:03d}.tif"
+                    cache_path = DEM_TILE_CACHE.lookup(product, block_name)
+                    if cache_path is None:
+                        with _tile_write_lock(DEM_TILE_CACHE.path_for(product, block_name)):
+                            cache_path = DEM_TILE_CACHE.lookup(product, block_name)
+                            if cache_path is None:
+                                temp_path = _write_cog_block(remote(), window, DEM_TILE_CACHE.path_for(product, block_name))
+                                cache_path = DEM_TILE_CACHE.insert(product, temp_path, block_name)
+                                fetched += 1
+                    tiles.append(DemTile(path=cache_path, product=product, tile_id=folder))
+
+            DEM_TILE_CACHE.record(hit=bool(tiles) and fetched == 0)
+            step_details.append(
+                f"Read {len(tiles)} COG block(s) of {folder} ({fetched} fetched, {len(tiles) - fetched} cached)"
+            )
+            return tiles
+        except rasterio.errors.RasterioIOError as exc:
+            errors.append(f"{url}: {exc}")
+            logger.warning("Failed to open Copernicus COG %s: %s", url, exc)
+            continue
+        except DemTileCacheError as exc:
+            errors.append(str(exc))
+            continue
+
+    DEM_TILE_CACHE.record(hit=False)
+    raise QuantitativeProcessingError(
+        f"Failed to read Copernicus DEM tile {tile_key}: {'; '.join(errors) if errors else 'no sources available'}"
+    )
+
+
+def _parse_block_geometries(raw_geometries: List[Any], details: List[str]) -> List[Optional[Any]]:
+    """Parse GeoJSON geometries in bulk; ``None`` marks empty or unparseable entries.
+
+    Invalid polygons (self-intersections, bow-ties) are repaired with
+    ``make_valid`` using the ring-structure method, which keeps every lobe
+    and drops collapsed parts so the result stays polygonal.
+    """
+
+    if not raw_geometries:
+        return []
+    encoded = np.array(
+        [geometry if isinstance(geometry, str) else json.dumps(geometry, default=str) for geometry in raw_geometries],
+        dtype=object,
+    )
+    geometries = shapely.from_geojson(encoded, on_invalid="ignore")
+
+    # GeoJSON the bulk reader rejects still gets the per-geometry parser, which
+    # accepts a few looser forms and reports why the rest are skipped.
+    for idx in np.flatnonzero(shapely.is_missing(geometries)):
+        try:
+            geometries[idx] = shape(raw_geometries[idx])
+        except Exception as exc:
+            details.append(f"Skipped block due to geometry error: {exc}")
+
+    present = ~shapely.is_missing(geometries)
+    invalid = present & ~shapely.is_valid(geometries)
+    if invalid.any():
+        geometries[invalid] = shapely.make_valid(geometries[invalid], method="structure", keep_collapsed=False)
+    keep = present & ~shapely.is_empty(geometries)
+    return [geometry if kept else None for geometry, kept in zip(geometries.tolist(), keep.tolist())]
+
+
 def _extract_block_features(results: Dict[str, Any], step_logger: StepLogger) -> Tuple[List[Dict[str, Any]], str]:
     with step_logger.step("Extract block geometries") as details:
         features: List[Dict[str, Any]] = []
         source = "merged_blocks"
 
+        def collect(candidates: List[Dict[str, Any]], raw_geometries: List[Any]) -> None:
+            for candidate, geometry in zip(candidates, _parse_block_geometries(raw_geometries, details)):
+                if geometry is not None:
+                    features.append({"geometry": geometry, **candidate})
+
         merged = results.get("merged_blocks") or results.get("mergedBlocks")
         if isinstance(merged, dict):
+            candidates: List[Dict[str, Any]] = []
+            raw_geometries: List[Any] = []
             for feature in merged.get("features", []) or []:
                 geometry = feature.get("geometry")
                 props = feature.get("properties") or {}
                 if not geometry:
                     continue
-                try:
-                    shapely_geom = shape(geometry)
-                    if shapely_geom.is_empty:
-                        continue
-                    # Simple buffer(0) to fix self-intersections
-                    if not shapely_geom.is_valid:
-                        shapely_geom = shapely_geom.buffer(0)
-                except Exception as exc:
-                    details.append(f"Skipped block due to geometry error: {exc}")
-                    continue
-                features.append({
-                    "geometry": shapely_geom,
+                raw_geometries.append(geometry)
+                candidates.append({
                     "properties": props,
                     "label": props.get("name") or props.get("block_id") or props.get("id") or "Merged Block",
                     "persistent_id": props.get("persistent_id") or props.get("persistentId"),
                     "source": "merged"
                 })
+            collect(candidates, raw_geometries)
 
         if not features:
             source = "tiles"
+            candidates = []
+            raw_geometries = []
             tiles = results.get("tiles") or []
             for tile in tiles:
                 tile_label = tile.get("tile_label") or tile.get("tile_id") or tile.get("tileId")
@@ -233,23 +739,17 @@ def _extract_block_features(results: Dict[str, Any], step_logger: StepLogger) ->
                     props = block.get("properties") or {}
                     if not geometry:
                         continue
-                    try:
-                        shapely_geom = shape(geometry)
-                        if shapely_geom.is_empty:
-                            continue
-                        if not shapely_geom.is_valid:
-                            shapely_geom = shapely_geom.buffer(0)
-                    except Exception as exc:
-                        details.append(f"Skipped block due to geometry error: {exc}")
-                        continue
-                    features.append({
-                        "geometry": shapely_geom,
+                    raw_geometries.append(geometry)
+                    candidates.append({
                         "properties": props,
                         "label": props.get("name") or f"{tile_label or 'Tile'} Block",
                         "persistent_id": props.get("persistent_id") or props.get("persistentId"),
                         "source": "tile"
                     })
+            collect(candidates, raw_geometries)
 
+        for ordinal, feature in enumerate(features, start=1):
+            feature["ordinal"] = ordinal
         details.append(f"Collected {len(features)} block geometries from {source}")
         if not features:
             raise QuantitativeProcessingError("No mine block geometries available for quantitative analysis")
@@ -263,15 +763,61 @@ def _union_bounds(features: List[Dict[str, Any]]) -> Tuple[float, float, float,
     return bounds[0], bounds[1], bounds[2], bounds[3], combined
 
 
+def _utm_epsg(lon: float, lat: float) -> int:
+    zone = int((lon + 180) / 6) + 1
+    return (32600 if lat >= 0 else 32700) + zone
+
+
 def _compute_utm_crs(union_geometry: MultiPolygon) -> pyproj.CRS:
     centroid: Point = union_geometry.centroid
-    lon, lat = centroid.x, centroid.y
-    zone = int((lon + 180) / 6) + 1
-    if lat >= 0:
-        epsg = 32600 + zone
-    else:
-        epsg = 32700 + zone
-    return pyproj.CRS.from_epsg(epsg)
+    return pyproj.CRS.from_epsg(_utm_epsg(centroid.x, centroid.y))
+
+
+@dataclass
+class UtmZoneGroup:
+    """Blocks sharing a native UTM zone, analysed on their own DEM grid."""
+
+    crs: pyproj.CRS
+    members: List[int]  # 0-based positions in the extracted feature list
+    bounds: Tuple[float, float, float, float]
+    chunked: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.crs.name.replace("WGS 84 / ", "")
+
+
+def _utm_zone_groups(features: List[Dict[str, Any]]) -> List[UtmZoneGroup]:
+    """Group blocks by the UTM zone of their centroid, in order of first appearance.
+
+    A single group keeps the zone of the union centroid, as before zone
+    partitioning, so single-zone results are unchanged.
+    """
+
+    geometries = np.array([feature["geometry"] for feature in features], dtype=object)
+    centroids = shapely.centroid(geometries)
+    zones: Dict[int, List[int]] = {}
+    for position, (lon, lat) in enumerate(zip(shapely.get_x(centroids).tolist(), shapely.get_y(centroids).tolist())):
+        zones.setdefault(_utm_epsg(lon, lat), []).append(position)
+
+    if len(zones) == 1:
+        minx, miny, maxx, maxy, union_geom = _union_bounds(features)
+        return [UtmZoneGroup(_compute_utm_crs(union_geom), list(range(len(features))), (minx, miny, maxx, maxy))]
+    return [
+        UtmZoneGroup(
+            pyproj.CRS.from_epsg(epsg),
+            members,
+            tuple(shapely.total_bounds(geometries[members]).tolist()),
+        )
+        for epsg, members in zones.items()
+    ]
+
+
+def _map_zone_groups(function: Callable[[UtmZoneGroup], Any], groups: List[UtmZoneGroup]) -> List[Any]:
+    if len(groups) == 1:
+        return [function(groups[0])]
+    with ThreadPoolExecutor(max_workers=min(ZONE_WORKERS, len(groups)), thread_name_prefix="utm-zone") as pool:
+        return list(pool.map(function, groups))
 
 
 @dataclass
@@ -286,6 +832,9 @@ class DemData:
     bounds_wgs84: Tuple[float, float, float, float]
     dataset_label: str
     dtm_method: str
+    overview: int = 1
+    cache_key: Optional[str] = None  # Set when the grids are memory-mapped from DTM_GRID_CACHE
+    cache_pin: Optional[Path] = None  # Keeps that entry from eviction until the analysis ends
 
     @property
     def array(self) -> np.ndarray:
@@ -296,8 +845,38 @@ class DemData:
         return [tile.path for tile in self.tiles]
 
 
-def _build_dem(bounds: Tuple[float, float, float, float], target_crs: pyproj.CRS, step_logger: StepLogger) -> DemData:
+def _target_extent(
+    bounds: Tuple[float, float, float, float],
+    target_crs: pyproj.CRS,
+    resolution: float,
+) -> Tuple[float, float, float, float]:
+    """WGS84 bounds projected to ``target_crs`` and snapped outwards to the pixel grid."""
+
+    transformer_to_target = pyproj.Transformer.from_crs(
+        pyproj.CRS.from_epsg(4326), target_crs, always_xy=True
+    )
+    minx_t, miny_t = transformer_to_target.transform(bounds[0], bounds[1])
+    maxx_t, maxy_t = transformer_to_target.transform(bounds[2], bounds[3])
+    te_minx, te_maxx = sorted([minx_t, maxx_t])
+    te_miny, te_maxy = sorted([miny_t, maxy_t])
+    return snap_extent((te_minx, te_miny, te_maxx, te_maxy), resolution)
+
+
+def _build_dem(
+    bounds: Tuple[float, float, float, float],
+    target_crs: pyproj.CRS,
+    step_logger: StepLogger,
+    overview: int = 1,
+    memory_mapped: bool = False,
+) -> DemData:
+    """Prepare the surface and terrain grids covering ``bounds``.
+
+    With ``memory_mapped`` the grids are returned as read-only views of the
+    DTM cache entry (and ``cache_key`` is set) so chunked processing can read
+    windows of a grid larger than the memory budget.
+    """
     minx, miny, maxx, maxy = bounds
+    resolution = PIXEL_RESOLUTION_METERS * overview
     buffer_deg = 0.02
     lat_min = math.floor(miny - buffer_deg)
     lat_max = math.ceil(maxy + buffer_deg)
@@ -305,14 +884,30 @@ def _build_dem(bounds: Tuple[float, float, float, float], target_crs: pyproj.CRS
     lon_max = math.ceil(maxx + buffer_deg)
 
     with step_logger.step("Acquire Copernicus DEM tiles") as details:
+        cells = [(lat, lon) for lat in range(lat_min, lat_max) for lon in range(lon_min, lon_max)]
+
+        # Window reads must also cover the DTM cache padding: cached grids are
+        # keyed by parent tile, so any window later served from them has to
+        # have been backed by fetched blocks.
+        window_buffer = buffer_deg + DTM_CACHE_PADDING_METERS / (111_320.0 * math.cos(math.radians(min(89.0, max(abs(miny), abs(maxy))))))
+        aoi_bounds = (minx - window_buffer, miny - window_buffer, maxx + window_buffer, maxy + window_buffer)
+
+        def fetch(cell: Tuple[int, int]) -> Tuple[List[DemTile], List[str]]:
+            cell_details: List[str] = []
+            try:
+                if COPERNICUS_ACCESS_MODE == "window":
+                    return _ensure_copernicus_window(cell[0], cell[1], aoi_bounds, cell_details), cell_details
+                return [_ensure_copernicus_tile(cell[0], cell[1], cell_details)], cell_details
+            except QuantitativeProcessingError as exc:
+                cell_details.append(str(exc))
+                return [], cell_details
+
         tile_records: List[DemTile] = []
-        for lat in range(lat_min, lat_max):
-            for lon in range(lon_min, lon_max):
-                try:
-                    tile = _ensure_copernicus_tile(lat, lon, details)
-                    tile_records.append(tile)
-                except QuantitativeProcessingError as exc:
-                    details.append(str(exc))
+        workers = min(MAX_TILE_DOWNLOAD_WORKERS, len(cells))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dem-tile") as pool:
+            for tiles, cell_details in pool.map(fetch, cells):
+                details.extend(cell_details)
+                tile_records.extend(tiles)
 
         if not tile_records:
             raise QuantitativeProcessingError("No DEM tiles available for requested area")
@@ -332,183 +927,321 @@ def _build_dem(bounds: Tuple[float, float, float, float], target_crs: pyproj.CRS
         )
 
     with step_logger.step("Merge & resample DEM") as details:
-        gdalbuildvrt = shutil.which("gdalbuildvrt")
-        gdalwarp = shutil.which("gdalwarp")
-
-        transformer_to_target = pyproj.Transformer.from_crs(
-            pyproj.CRS.from_epsg(4326), target_crs, always_xy=True
-        )
         transformer_to_wgs84 = pyproj.Transformer.from_crs(
             target_crs, pyproj.CRS.from_epsg(4326), always_xy=True
         )
+        extent = _target_extent(bounds, target_crs, resolution)
+
+        cache_key = _dtm_cache_key(tile_records, target_crs, PIXEL_RESOLUTION_METERS)
+        cached = DTM_GRID_CACHE.read_window(cache_key, extent, overview=overview, copy=not memory_mapped)
+        mapped_key = cache_key if memory_mapped and cached is not None else None
+        mapped_entry = cached.entry if mapped_key else None
+        if cached is not None:
+            destination, terrain, dst_transform, dtm_summary = (
+                cached.surface, cached.terrain, cached.transform, cached.dtm_method
+            )
+            details.append(f"Loaded warped DEM and terrain window from cache {cache_key[:12]} (level {overview}x)")
+        else:
+            # Warp a padded extent so nearby follow-up requests fall inside the
+            # cached grid; its origin sits on the coarsest overview lattice so
+            # every level can be read from the same entry.
+            padded_extent = snap_extent(
+                (
+                    extent[0] - DTM_CACHE_PADDING_METERS,
+                    extent[1] - DTM_CACHE_PADDING_METERS,
+                    extent[2] + DTM_CACHE_PADDING_METERS,
+                    extent[3] + DTM_CACHE_PADDING_METERS,
+                ),
+                DTM_LATTICE_METERS,
+            )
+            padded_surface, padded_transform = _warp_tiles(tile_records, target_crs, padded_extent, details)
+            padded_terrain, dtm_summary = _derive_dtm(padded_surface, PIXEL_RESOLUTION_METERS)
+            step_logger.record_array("warpedSurface", padded_surface)
+            step_logger.record_array("warpedTerrain", padded_terrain)
+            DTM_GRID_CACHE.store(
+                cache_key, padded_surface, padded_terrain, padded_transform, dtm_summary, overviews=DTM_OVERVIEW_FACTORS
+            )
 
-        minx_t, miny_t = transformer_to_target.transform(minx, miny)
-        maxx_t, maxy_t = transformer_to_target.transform(maxx, maxy)
-        te_minx, te_maxx = sorted([minx_t, maxx_t])
-        te_miny, te_maxy = sorted([miny_t, maxy_t])
+            if overview > 1:
+                padded_surface = block_mean(padded_surface, overview)
+                padded_terrain = block_mean(padded_terrain, overview)
+                padded_transform = padded_transform * rasterio.Affine.scale(overview)
+                details.append(f"Averaged terrain to the {overview}x overview level ({resolution:.0f}m)")
+            window = extent_window(padded_transform, padded_surface.shape, extent)
+            destination = padded_surface[window]
+            terrain = padded_terrain[window]
+            dst_transform = padded_transform * rasterio.Affine.translation(window[1].start, window[0].start)
+
+            if memory_mapped:
+                # Swap the in-memory grids for views of the entry just stored.
+                mapped = DTM_GRID_CACHE.read_window(cache_key, extent, overview=overview, copy=False)
+                if mapped is not None:
+                    destination, terrain, mapped_key = mapped.surface, mapped.terrain, cache_key
+                    mapped_entry = mapped.entry
+                    del padded_surface, padded_terrain
+                else:
+                    details.append("DTM cache entry unavailable; keeping the terrain grid in memory")
+
+        step_logger.record_array("surface", destination)
+        step_logger.record_array("terrain", terrain)
+        bounds_utm = array_bounds(destination.shape[0], destination.shape[1], dst_transform)
+        minx_utm, miny_utm, maxx_utm, maxy_utm = bounds_utm
+        ll_lon, ll_lat = transformer_to_wgs84.transform(minx_utm, miny_utm)
+        ur_lon, ur_lat = transformer_to_wgs84.transform(maxx_utm, maxy_utm)
+
+        details.append(f"Derived terrain model via {dtm_summary}")
+        logger.info(
+            "Prepared terrain grid %sx%s (%.1fm resolution)",
+            destination.shape[0],
+            destination.shape[1],
+            resolution,
+        )
 
-        if gdalbuildvrt and gdalwarp:
-            temp_root = Path(tempfile.mkdtemp(prefix="quant_gdal_"))
-            vrt_path = temp_root / "mosaic.vrt"
-            warped_path = temp_root / "warped.tif"
-            try:
-                build_command = [
-                    gdalbuildvrt,
-                    "-q",
-                    str(vrt_path),
-                    *[str(tile.path) for tile in tile_records],
-                ]
-                subprocess.run(build_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-                warp_command = [
-                    gdalwarp,
-                    "-q",
-                    "-multi",
-                    "-r",
-                    "bilinear",
-                    "-t_srs",
-                    target_crs.to_wkt(),
-                    "-tr",
-                    str(PIXEL_RESOLUTION_METERS),
-                    str(PIXEL_RESOLUTION_METERS),
-                    "-te",
-                    str(te_minx),
-                    str(te_miny),
-                    str(te_maxx),
-                    str(te_maxy),
-                    "-dstnodata",
-                    "-9999",
-                    "-overwrite",
-                    str(vrt_path),
-                    str(warped_path),
-                ]
-                subprocess.run(warp_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-                with rasterio.open(warped_path) as src:
-                    destination = src.read(1).astype(np.float32)
-                    destination[src.read_masks(1) == 0] = np.nan
-                    dst_transform = src.transform
-
-                bounds_utm = array_bounds(destination.shape[0], destination.shape[1], dst_transform)
-                minx_utm, miny_utm, maxx_utm, maxy_utm = bounds_utm
-                ll_lon, ll_lat = transformer_to_wgs84.transform(minx_utm, miny_utm)
-                ur_lon, ur_lat = transformer_to_wgs84.transform(maxx_utm, maxy_utm)
+        return DemData(
+            surface=destination,
+            terrain=terrain,
+            transform=dst_transform,
+            crs=target_crs,
+            resolution=resolution,
+            tiles=tile_records,
+            bounds_utm=(minx_utm, miny_utm, maxx_utm, maxy_utm),
+            bounds_wgs84=(ll_lon, ll_lat, ur_lon, ur_lat),
+            dataset_label=COPERNICUS_DATASET_LABEL,
+            dtm_method=dtm_summary,
+            overview=overview,
+            cache_key=mapped_key,
+            # Chunk workers reopen the entry by path, so keep it from eviction
+            cache_pin=DTM_GRID_CACHE.pin(mapped_entry) if mapped_entry is not None else None,
+        )
 
-                details.append(
-                    "GDAL warp completed with precise alignment and resolution control"
-                )
 
-                terrain, dtm_summary = _derive_dtm(destination, PIXEL_RESOLUTION_METERS)
-                details.append(f"Derived terrain model via {dtm_summary}")
-                logger.info(
-                    "GDAL pipeline produced terrain grid %sx%s (%.1fm resolution)",
-                    destination.shape[0],
-                    destination.shape[1],
-                    PIXEL_RESOLUTION_METERS,
-                )
+def _dtm_cache_key(tiles: List[DemTile], target_crs: pyproj.CRS, resolution: float) -> str:
+    """Hash of everything that determines the warped surface and derived terrain."""
+
+    descriptor = {
+        # Block windows are cut from immutable tiles and always cover the padded
+        # extent, so they are keyed by their parent tile rather than the block set.
+        "tiles": sorted({
+            (tile.product, tile.tile_id) if tile.tile_id else (tile.product, tile.path.name, tile.path.stat().st_size)
+            for tile in tiles
+        }),
+        "crs": target_crs.to_string(),
+        "resolution": resolution,
+        "dtm": [DTM_PERCENTILE, DTM_WINDOW_METERS, DTM_OPENING_METERS, DTM_SMOOTHING_METERS],
+        "version": DTM_CACHE_VERSION,
+    }
+    return hashlib.sha256(json.dumps(descriptor, sort_keys=True).encode("utf-8")).hexdigest()
 
-                return DemData(
-                    surface=destination,
-                    terrain=terrain,
-                    transform=dst_transform,
-                    crs=target_crs,
-                    resolution=PIXEL_RESOLUTION_METERS,
-                    tiles=tile_records,
-                    bounds_utm=(minx_utm, miny_utm, maxx_utm, maxy_utm),
-                    bounds_wgs84=(ll_lon, ll_lat, ur_lon, ur_lat),
-                    dataset_label=COPERNICUS_DATASET_LABEL,
-                    dtm_method=dtm_summary,
-                )
-            finally:
-                shutil.rmtree(temp_root, ignore_errors=True)
 
-        details.append("GDAL binaries not found, falling back to Rasterio reprojection")
-        datasets = [rasterio.open(tile.path) for tile in tile_records]
-        try:
-            mosaic, mosaic_transform = merge(datasets)
-            mosaic_array = mosaic[0].astype(np.float32, copy=False)
-            src_crs = datasets[0].crs or "EPSG:4326"
-            src_height, src_width = mosaic_array.shape
-            src_bounds = array_bounds(src_height, src_width, mosaic_transform)
-
-            dst_transform, dst_width, dst_height = calculate_default_transform(
-                src_crs,
-                target_crs,
-                src_width,
-                src_height,
-                *src_bounds,
-                resolution=PIXEL_RESOLUTION_METERS,
-            )
+def _mosaic_vrt_xml(tile_records: List[DemTile]) -> Tuple[str, Optional[float]]:
+    """Describe the tiles as one VRT mosaic at the finest tile resolution.
 
-            destination = np.full((dst_height, dst_width), np.nan, dtype=np.float32)
-            reproject(
-                source=mosaic_array,
-                destination=destination,
-                src_transform=mosaic_transform,
-                src_crs=src_crs,
-                dst_transform=dst_transform,
-                dst_crs=target_crs,
-                src_nodata=-32768,
-                dst_nodata=np.nan,
-                resampling=Resampling.bilinear,
-            )
+    Returns the VRT document and the tiles' nodata value (if any).
+    """
 
-            bounds_utm = array_bounds(destination.shape[0], destination.shape[1], dst_transform)
-            minx_utm, miny_utm, maxx_utm, maxy_utm = bounds_utm
-            ll_lon, ll_lat = transformer_to_wgs84.transform(minx_utm, miny_utm)
-            ur_lon, ur_lat = transformer_to_wgs84.transform(maxx_utm, maxy_utm)
-            details.append(
-                f"Resampled DEM to {destination.shape[1]}x{destination.shape[0]} grid @ {PIXEL_RESOLUTION_METERS:.0f}m"
-            )
+    infos = []
+    for tile in tile_records:
+        with rasterio.open(tile.path) as src:
+            infos.append((tile.path, src.bounds, src.width, src.height, src.res, src.crs, src.nodata))
+
+    res_x = min(info[4][0] for info in infos)
+    res_y = min(info[4][1] for info in infos)
+    left = min(info[1].left for info in infos)
+    top = max(info[1].top for info in infos)
+    right = max(info[1].right for info in infos)
+    bottom = min(info[1].bottom for info in infos)
+    width = int(math.ceil(round((right - left) / res_x, 6)))
+    height = int(math.ceil(round((top - bottom) / res_y, 6)))
+    crs = infos[0][5] or rasterio.crs.CRS.from_epsg(4326)
+    nodata = infos[0][6]
+
+    nodata_xml = f"<NoDataValue>{nodata!r}</NoDataValue>" if nodata is not None else ""
+    sources = []
+    for path, bounds, tile_width, tile_height, _, _, tile_nodata in infos:
+        sources.append(
+            "<ComplexSource>"
+            f'<SourceFilename relativeToVRT="0">{xml_escape(str(Path(path).resolve()))}</SourceFilename>'
+            "<SourceBand>1</SourceBand>"
+            f'<SrcRect xOff="0" yOff="0" xSize="{tile_width}" ySize="{tile_height}"/>'
+            f'<DstRect xOff="{(bounds.left - left) / res_x!r}" yOff="{(top - bounds.top) / res_y!r}" '
+            f'xSize="{(bounds.right - bounds.left) / res_x!r}" ySize="{(bounds.top - bounds.bottom) / res_y!r}"/>'
+            + (f"<NODATA>{tile_nodata!r}</NODATA>" if tile_nodata is not None else "")
+            + "</ComplexSource>"
+        )
 
-            terrain, dtm_summary = _derive_dtm(destination, PIXEL_RESOLUTION_METERS)
-            details.append(f"Derived terrain model via {dtm_summary}")
-            logger.info(
-                "Rasterio pipeline produced terrain grid %sx%s (%.1fm resolution)",
-                destination.shape[0],
-                destination.shape[1],
-                PIXEL_RESOLUTION_METERS,
-            )
+    document = (
+        f'<VRTDataset rasterXSize="{width}" rasterYSize="{height}">'
+        f"<SRS>{xml_escape(crs.to_wkt())}</SRS>"
+        f"<GeoTransform>{left!r}, {res_x!r}, 0.0, {top!r}, 0.0, {-res_y!r}</GeoTransform>"
+        f'<VRTRasterBand dataType="Float32" band="1">{nodata_xml}{"".join(sources)}</VRTRasterBand>'
+        "</VRTDataset>"
+    )
+    return document, nodata
 
-            return DemData(
-                surface=destination,
-                terrain=terrain,
-                transform=dst_transform,
-                crs=target_crs,
-                resolution=PIXEL_RESOLUTION_METERS,
-                tiles=tile_records,
-                bounds_utm=(minx_utm, miny_utm, maxx_utm, maxy_utm),
-                bounds_wgs84=(ll_lon, ll_lat, ur_lon, ur_lat),
-                dataset_label=COPERNICUS_DATASET_LABEL,
-                dtm_method=dtm_summary,
-            )
-        finally:
-            for ds in datasets:
-                ds.close()
+
+def _warp_tiles(
+    tile_records: List[DemTile],
+    target_crs: pyproj.CRS,
+    extent: Tuple[float, float, float, float],
+    details: List[str],
+) -> Tuple[np.ndarray, rasterio.Affine]:
+    """Warp the tile mosaic onto the pixel-aligned ``extent`` grid in-process.
+
+    The tiles are mosaicked through an in-memory VRT and resampled by GDAL's
+    multi-threaded warper directly into a preallocated float32 array, so no
+    subprocesses or temporary files are involved.
+    """
+
+    te_minx, te_miny, te_maxx, te_maxy = extent
+    dst_width = int(round((te_maxx - te_minx) / PIXEL_RESOLUTION_METERS))
+    dst_height = int(round((te_maxy - te_miny) / PIXEL_RESOLUTION_METERS))
+    dst_transform = from_origin(te_minx, te_maxy, PIXEL_RESOLUTION_METERS, PIXEL_RESOLUTION_METERS)
+    destination = np.full((dst_height, dst_width), np.nan, dtype=np.float32)
+
+    vrt_document, tile_nodata = _mosaic_vrt_xml(tile_records)
+    with MemoryFile(vrt_document.encode("utf-8"), ext=".vrt") as memfile, memfile.open() as mosaic:
+        reproject(
+            source=rasterio.band(mosaic, 1),
+            destination=destination,
+            dst_transform=dst_transform,
+            dst_crs=target_crs.to_wkt(),
+            src_nodata=tile_nodata if tile_nodata is not None else -32768,
+            dst_nodata=np.nan,
+            resampling=Resampling.bilinear,
+            num_threads=DEM_WARP_THREADS,
+            warp_mem_limit=DEM_WARP_MEMORY_MB,
+        )
+
+    details.append(
+        f"Warped {len(tile_records)} tile(s) in-process to {dst_width}x{dst_height} grid @ {PIXEL_RESOLUTION_METERS:.0f}m "
+        f"({DEM_WARP_THREADS} thread(s))"
+    )
+    return destination, dst_transform
 
 
 def _geometry_to_utm_transformer(target_crs: pyproj.CRS) -> pyproj.Transformer:
     return pyproj.Transformer.from_crs(pyproj.CRS.from_epsg(4326), target_crs, always_xy=True)
 
 
-def _robust_rim_elevation(dem: np.ndarray, block_mask: np.ndarray, iterations: int = RIM_DILATION_ITERATIONS) -> Optional[float]:
-    structure = ndimage.generate_binary_structure(2, 1)
-    dilated = ndimage.binary_dilation(block_mask, structure=structure, iterations=iterations)
-    rim_mask = np.logical_and(dilated, ~block_mask)
-    rim_values = dem[rim_mask]
-    rim_values = rim_values[np.isfinite(rim_values)]
+def _project_geometries(geometries: List[Any], transformer: pyproj.Transformer) -> np.ndarray:
+    """Reproject every geometry with a single vectorized transformer call."""
 
-    if rim_values.size == 0:
-        return None
+    def project(coords: np.ndarray) -> np.ndarray:
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack((x, y))
+
+    return shapely.transform(np.asarray(geometries, dtype=object), project)
+
+
+def _segment_medians(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Median of each non-empty segment of an array sorted within segments."""
+
+    lower = values[starts + (counts - 1) // 2]
+    upper = values[starts + counts // 2]
+    return (lower + upper) / 2
+
+
+def _robust_rim_elevations(
+    dem: np.ndarray,
+    label_raster: np.ndarray,
+    label_count: int,
+    iterations: int = RIM_DILATION_ITERATIONS,
+) -> np.ndarray:
+    """Median/MAD-filtered rim elevation for every label in a single pass.
+
+    A block's rim is every pixel reached by dilating its mask ``iterations``
+    times with a cross structure, minus the block itself (pixels of other blocks
+    included). Rims are gathered for all labels at once by shifting the block
+    boundary pixels across the dilation footprint, then reduced per label with
+    sort-by-label segment medians. Labels without finite rim pixels get NaN.
+    """
+
+    rim_elevations = np.full(label_count, np.nan, dtype=np.float64)
+    structure = ndimage.iterate_structure(ndimage.generate_binary_structure(2, 1), iterations)
+    offsets = np.argwhere(structure) - iterations
+
+    # Only pixels with a differently-labelled neighbour inside the footprint can
+    # contribute rim pixels; block interiors only reach their own block.
+    neighbour_max = ndimage.grey_dilation(label_raster, footprint=structure, mode="nearest")
+    neighbour_min = ndimage.grey_erosion(label_raster, footprint=structure, mode="nearest")
+    boundary = (label_raster > 0) & ((neighbour_max != label_raster) | (neighbour_min != label_raster))
+    source_rows, source_cols = np.nonzero(boundary)
+    if source_rows.size == 0:
+        return rim_elevations
+    source_labels = label_raster[source_rows, source_cols].astype(np.int64)
+
+    height, width = label_raster.shape
+    keys: List[np.ndarray] = []
+    for d_row, d_col in offsets:
+        rows = source_rows + d_row
+        cols = source_cols + d_col
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        rows, cols, labels = rows[inside], cols[inside], source_labels[inside]
+        flat = rows.astype(np.int64) * width + cols
+        rim = label_raster.ravel()[flat] != labels
+        keys.append(labels[rim] * (height * width) + flat[rim])
+
+    rim_keys = np.unique(np.concatenate(keys))
+    labels = rim_keys // (height * width)
+    values = dem.ravel()[rim_keys % (height * width)]
+    finite = np.isfinite(values)
+    labels, values = labels[finite], values[finite]
+    if values.size == 0:
+        return rim_elevations
+
+    order = np.lexsort((values, labels))
+    labels, values = labels[order], values[order]
+    counts = np.bincount(labels, minlength=label_count + 1)
+    present = np.flatnonzero(counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    medians = np.zeros(label_count + 1, dtype=values.dtype)
+    medians[present] = _segment_medians(values, starts[present], counts[present])
+
+    deviations = np.abs(values - medians[labels])
+    deviation_order = np.lexsort((deviations, labels))
+    mads = np.zeros(label_count + 1, dtype=values.dtype)
+    mads[present] = _segment_medians(deviations[deviation_order], starts[present], counts[present])
+
+    # Inlier filtering keeps the per-label value ordering, so the segment
+    # medians below still operate on sorted runs.
+    thresholds = (3.0 * 1.4826 * mads.astype(np.float64)).astype(values.dtype)
+    inliers = deviations <= thresholds[labels]
+    inlier_values = values[inliers]
+    inlier_counts = np.bincount(labels[inliers], minlength=label_count + 1)
+    inlier_starts = np.concatenate(([0], np.cumsum(inlier_counts)[:-1]))
+
+    result = medians.astype(np.float64)
+    filtered = present[(mads[present] > 0) & (inlier_counts[present] > 0)]
+    result[filtered] = _segment_medians(inlier_values, inlier_starts[filtered], inlier_counts[filtered])
+    rim_elevations[present - 1] = result[present]
+    return rim_elevations
+
+
+def _block_window(
+    bbox: Tuple[slice, slice],
+    shape: Tuple[int, int],
+    margin: int = RIM_DILATION_ITERATIONS,
+) -> Tuple[slice, slice]:
+    """Expand a block bounding box by the rim margin (``RIM_DILATION_ITERATIONS`` px), clipped to the raster.
+
+    The margin puts zero-depth rim pixels at the window edges, so the Simpson
+    end weights fall on them rather than on block pixels and windowed or
+    chunked metrics match the whole-raster result. Window origins are aligned
+    to even pixel offsets and window lengths are kept odd (unless clipped by
+    the raster edge) so Simpson weights inside the window line up with the
+    weights the same pixels receive on the full raster.
+    """
 
-    median = float(np.median(rim_values))
-    mad = float(np.median(np.abs(rim_values - median)))
-    if mad > 0:
-        threshold = 3.0 * 1.4826 * mad
-        inliers = rim_values[np.abs(rim_values - median) <= threshold]
-        if inliers.size > 0:
-            return float(np.median(inliers))
-    return median
+    window: List[slice] = []
+    for axis_slice, size in zip(bbox, shape):
+        start = max(0, axis_slice.start - margin)
+        start -= start % 2
+        stop = min(size, axis_slice.stop + margin)
+        if stop < size and (stop - start) % 2 == 0:
+            stop += 1
+        window.append(slice(start, stop))
+    return window[0], window[1]
 
 
 def _derive_dtm(dsm: np.ndarray, pixel_resolution: float) -> Tuple[np.ndarray, str]:
@@ -520,20 +1253,15 @@ def _derive_dtm(dsm: np.ndarray, pixel_resolution: float) -> Tuple[np.ndarray, s
     fill_value = float(np.nanmedian(terrain[finite_mask]))
     filled = np.where(finite_mask, terrain, fill_value).astype(np.float32)
 
-    window_meters = max(24.0, 3.0 * pixel_resolution)
+    window_meters = max(DTM_WINDOW_METERS, 3.0 * pixel_resolution)
     window_pixels = max(3, int(round(window_meters / pixel_resolution)))
     if window_pixels % 2 == 0:
         window_pixels += 1
 
-    percentile = 30.0
-    ground = ndimage.percentile_filter(
-        filled,
-        percentile=percentile,
-        size=(window_pixels, window_pixels),
-        mode="nearest",
-    ).astype(np.float32)
+    percentile = DTM_PERCENTILE
+    ground = percentile_filter(filled, percentile, window_pixels).astype(np.float32, copy=False)
 
-    opening_pixels = max(3, int(round(12.0 / pixel_resolution)))
+    opening_pixels = max(3, int(round(DTM_OPENING_METERS / pixel_resolution)))
     if opening_pixels % 2 == 0:
         opening_pixels += 1
 
@@ -546,7 +1274,7 @@ def _derive_dtm(dsm: np.ndarray, pixel_resolution: float) -> Tuple[np.ndarray, s
     except Exception:  # noqa: BLE001
         opened = ground
 
-    sigma = max(0.6, 2.5 / pixel_resolution)
+    sigma = max(0.6, DTM_SMOOTHING_METERS / pixel_resolution)
     smoothed = ndimage.gaussian_filter(opened, sigma=sigma)
     smoothed = np.minimum(smoothed, filled)
     smoothed = smoothed.astype(np.float32)
@@ -559,39 +1287,43 @@ def _derive_dtm(dsm: np.ndarray, pixel_resolution: float) -> Tuple[np.ndarray, s
     return smoothed, summary
 
 
-def _prismoidal_volume(depth_surface: np.ndarray, pixel_size: float) -> Tuple[float, float, float]:
-    """Estimate volume with prismoidal integration and supporting metrics.
-
-    Returns a tuple of (prismoidal_volume, simpson_volume, trapezoidal_volume).
-    """
-
-    try:
-        simpson_axis = integrate.simpson(depth_surface, dx=pixel_size, axis=0)
-        simpson_volume = float(integrate.simpson(simpson_axis, dx=pixel_size))
+def _array_to_serializable(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    if matrix.size == 0:
+        return []
+    values = matrix.astype(np.float64).astype(object)
+    values[~np.isfinite(matrix)] = None
+    return values.tolist()
 
-        trapezoid_axis = integrate.trapezoid(depth_surface, dx=pixel_size, axis=0)
-        trapezoid_volume = float(integrate.trapezoid(trapezoid_axis, dx=pixel_size))
 
-        prismoidal = (2.0 * simpson_volume + trapezoid_volume) / 3.0
-    except (ValueError, RuntimeError):
-        cell_area = pixel_size ** 2
-        trapezoid_volume = float(depth_surface.sum() * cell_area)
-        simpson_volume = trapezoid_volume
-        prismoidal = trapezoid_volume
+def _encode_grid(matrix: np.ndarray, encoding: GridEncoding) -> Any:
+    """Encode a visualization grid for transport.
 
-    prismoidal = float(max(0.0, prismoidal))
-    simpson_volume = float(max(0.0, simpson_volume))
-    trapezoid_volume = float(max(0.0, trapezoid_volume))
-    return prismoidal, simpson_volume, trapezoid_volume
+    ``json`` keeps the nested-list form. ``int16`` linearly quantizes finite
+    values to ``[-32767, 32767]`` (decode with ``value * scale + offset``)
+    and marks empty cells with ``GRID_NODATA_INT16``; ``float16`` stores
+    values directly with NaN as nodata. Binary forms are row-major,
+    little-endian and base64 encoded so clients can load them into typed
+    arrays without parsing.
+    """
 
+    if encoding == "json":
+        return _array_to_serializable(matrix)
 
-def _array_to_serializable(matrix: np.ndarray) -> List[List[Optional[float]]]:
-    if matrix.size == 0:
-        return []
-    return [
-        [float(value) if np.isfinite(value) else None for value in row]
-        for row in matrix
-    ]
+    finite = np.isfinite(matrix)
+    encoded: Dict[str, Any] = {"encoding": encoding, "shape": list(matrix.shape)}
+    if encoding == "float16":
+        packed = np.where(finite, matrix, np.nan).astype("<f2")
+        encoded.update({"dtype": "float16", "nodata": "NaN", "scale": 1.0, "offset": 0.0})
+    else:
+        low = float(matrix[finite].min()) if finite.any() else 0.0
+        high = float(matrix[finite].max()) if finite.any() else 0.0
+        offset = (low + high) / 2.0
+        scale = max((high - low) / (2 * GRID_INT16_MAX), 1e-6)
+        quantized = np.rint((np.where(finite, matrix, offset) - offset) / scale)
+        packed = np.where(finite, np.clip(quantized, -GRID_INT16_MAX, GRID_INT16_MAX), GRID_NODATA_INT16).astype("<i2")
+        encoded.update({"dtype": "int16", "nodata": GRID_NODATA_INT16, "scale": scale, "offset": offset})
+    encoded["data"] = base64.b64encode(packed.tobytes()).decode("ascii")
+    return encoded
 
 
 def _prepare_visualization_payload(
@@ -601,6 +1333,7 @@ def _prepare_visualization_payload(
     transform: rasterio.Affine,
     rim_elevation: float,
     pixel_resolution: float,
+    grid_encoding: GridEncoding = "json",
 ) -> Optional[Dict[str, Any]]:
     rows, cols = np.where(block_mask)
     if rows.size == 0 or cols.size == 0:
@@ -636,14 +1369,8 @@ def _prepare_visualization_payload(
     sample_row = int(row_indices[0]) if row_indices.size else row_min
     sample_col = int(col_indices[0]) if col_indices.size else col_min
 
-    x_coords = [
-        float(xy(transform, sample_row, int(col_idx), offset="center")[0])
-        for col_idx in col_indices
-    ]
-    y_coords = [
-        float(xy(transform, int(row_idx), sample_col, offset="center")[1])
-        for row_idx in row_indices
-    ]
+    x_coords = [float(value) for value in xy(transform, np.full(col_indices.size, sample_row), col_indices, offset="center")[0]]
+    y_coords = [float(value) for value in xy(transform, row_indices, np.full(row_indices.size, sample_col), offset="center")[1]]
 
     elevation_values = subset_elev[np.isfinite(subset_elev)]
     depth_values = subset_depth[np.isfinite(subset_depth)]
@@ -675,8 +1402,9 @@ def _prepare_visualization_payload(
         "grid": {
             "x": x_coords,
             "y": y_coords,
-            "elevation": _array_to_serializable(subset_elev),
-            "depth": _array_to_serializable(subset_depth),
+            "encoding": grid_encoding,
+            "elevation": _encode_grid(subset_elev, grid_encoding),
+            "depth": _encode_grid(subset_depth, grid_encoding),
             "rimElevation": float(rim_elevation),
             "resolutionX": float(pixel_resolution * col_step),
             "resolutionY": float(pixel_resolution * row_step),
@@ -688,48 +1416,52 @@ def _prepare_visualization_payload(
     }
 
 
-def _build_executive_summary(block_metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not block_metrics:
-        return {
-            "headline": {
-                "totalVolumeCubicMeters": 0.0,
-                "totalAreaHectares": 0.0,
-                "blockCount": 0,
-            },
-            "priorityBlocks": [],
-            "insights": {
-                "averageMeanDepthMeters": 0.0,
-                "averageMaxDepthMeters": 0.0,
-            },
-            "updatedAt": datetime.utcnow().isoformat(),
-        }
-
-    total_volume = sum(block["volumeCubicMeters"] for block in block_metrics)
-    total_area_hectares = sum(block["areaHectares"] for block in block_metrics)
-    block_count = len(block_metrics)
-    average_mean_depth = (
-        sum(block["meanDepthMeters"] for block in block_metrics) / block_count
-        if block_count else 0.0
-    )
-    average_max_depth = (
-        sum(block["maxDepthMeters"] for block in block_metrics) / block_count
-        if block_count else 0.0
-    )
+def _add_exact(partials: List[float], value: float) -> None:
+    # Shewchuk's non-overlapping partials, as in math.fsum: the total does
+    # not depend on the order values are added in
+    i = 0
+    for other in partials:
+        if abs(value) < abs(other):
+            value, other = other, value
+        high = value + other
+        low = other - (high - value)
+        if low:
+            partials[i] = low
+            i += 1
+        value = high
+    partials[i:] = [value]
+
+
+class BlockSummary:
+    """Running totals behind the result's summary and executive summary.
+
+    Blocks are added one at a time with their position in the result, so a
+    streamed run can drop each block once it is sent. Sums are exact and ties
+    go to the earlier position, so the outcome does not depend on the order
+    blocks arrive in.
+    """
 
-    priority_candidates = [
-        block
-        for block in block_metrics
-        if block["volumeCubicMeters"] >= VOLUME_PRIORITY_THRESHOLD
-        or block["maxDepthMeters"] >= DEPTH_PRIORITY_THRESHOLD
-    ]
-    priority_sorted = sorted(
-        priority_candidates,
-        key=lambda item: (item["volumeCubicMeters"], item["maxDepthMeters"]),
-        reverse=True,
-    )[:5]
-
-    priority_blocks = [
-        {
+    def __init__(self) -> None:
+        self.block_count = 0
+        self.visualization_available = False
+        self._volume: List[float] = []
+        self._area: List[float] = []
+        self._area_hectares: List[float] = []
+        self._max_depth: List[float] = []
+        self._mean_depth: List[float] = []
+        self._deepest: Optional[Tuple[Tuple[float, int], Dict[str, Any]]] = None
+        self._largest: Optional[Tuple[Tuple[float, int], Dict[str, Any]]] = None
+        self._priority: List[Tuple[Tuple[float, float, int], Dict[str, Any]]] = []
+
+    def add(self, block: Dict[str, Any], position: int) -> None:
+        self.block_count += 1
+        self.visualization_available = self.visualization_available or bool(block.get("visualization"))
+        _add_exact(self._volume, block["volumeCubicMeters"])
+        _add_exact(self._area, block["areaSquareMeters"])
+        _add_exact(self._area_hectares, block["areaHectares"])
+        _add_exact(self._max_depth, block["maxDepthMeters"])
+        _add_exact(self._mean_depth, block["meanDepthMeters"])
+        brief = {
             "label": block["blockLabel"],
             "blockId": block["blockId"],
             "source": block.get("source"),
@@ -737,38 +1469,398 @@ def _build_executive_summary(block_metrics: List[Dict[str, Any]]) -> Dict[str, A
             "maxDepthMeters": block["maxDepthMeters"],
             "areaHectares": block["areaHectares"],
         }
-        for block in priority_sorted
-    ]
-
-    deepest_block = max(block_metrics, key=lambda item: item["maxDepthMeters"])
-    largest_volume_block = max(block_metrics, key=lambda item: item["volumeCubicMeters"])
+        deepest_key = (block["maxDepthMeters"], -position)
+        if self._deepest is None or deepest_key > self._deepest[0]:
+            self._deepest = (deepest_key, brief)
+        largest_key = (block["volumeCubicMeters"], -position)
+        if self._largest is None or largest_key > self._largest[0]:
+            self._largest = (largest_key, brief)
+        if (
+            block["volumeCubicMeters"] >= VOLUME_PRIORITY_THRESHOLD
+            or block["maxDepthMeters"] >= DEPTH_PRIORITY_THRESHOLD
+        ):
+            self._priority.append(((block["volumeCubicMeters"], block["maxDepthMeters"], -position), brief))
+            self._priority.sort(key=lambda item: item[0], reverse=True)
+            del self._priority[5:]
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.block_count:
+            return {
+                "totalVolumeCubicMeters": 0.0,
+                "totalAreaSquareMeters": 0.0,
+                "totalAreaHectares": 0.0,
+                "averageMaxDepthMeters": 0.0,
+                "averageMeanDepthMeters": 0.0,
+                "blockCount": 0,
+                "deepestBlock": None,
+                "largestBlock": None,
+            }
 
-    return {
-        "headline": {
-            "totalVolumeCubicMeters": total_volume,
-            "totalAreaHectares": total_area_hectares,
-            "blockCount": block_count,
-        },
-        "priorityBlocks": priority_blocks,
-        "insights": {
-            "averageMeanDepthMeters": average_mean_depth,
-            "averageMaxDepthMeters": average_max_depth,
+        total_area = math.fsum(self._area)
+        deepest_block = self._deepest[1]
+        largest_block = self._largest[1]
+        return {
+            "totalVolumeCubicMeters": math.fsum(self._volume),
+            "totalAreaSquareMeters": total_area,
+            "totalAreaHectares": total_area / 10_000.0,
+            "averageMaxDepthMeters": math.fsum(self._max_depth) / self.block_count,
+            "averageMeanDepthMeters": math.fsum(self._mean_depth) / self.block_count,
+            "blockCount": self.block_count,
             "deepestBlock": {
-                "label": deepest_block["blockLabel"],
+                "label": deepest_block["label"],
                 "maxDepthMeters": deepest_block["maxDepthMeters"],
+                "volumeCubicMeters": deepest_block["volumeCubicMeters"],
             },
             "largestBlock": {
-                "label": largest_volume_block["blockLabel"],
-                "volumeCubicMeters": largest_volume_block["volumeCubicMeters"],
+                "label": largest_block["label"],
+                "volumeCubicMeters": largest_block["volumeCubicMeters"],
+                "areaHectares": largest_block["areaHectares"],
             },
+        }
+
+    def executive_summary(self) -> Dict[str, Any]:
+        if not self.block_count:
+            return {
+                "headline": {
+                    "totalVolumeCubicMeters": 0.0,
+                    "totalAreaHectares": 0.0,
+                    "blockCount": 0,
+                },
+                "priorityBlocks": [],
+                "insights": {
+                    "averageMeanDepthMeters": 0.0,
+                    "averageMaxDepthMeters": 0.0,
+                },
+                "updatedAt": datetime.utcnow().isoformat(),
+            }
+
+        priority_blocks = [dict(brief) for _, brief in self._priority]
+        deepest_block = self._deepest[1]
+        largest_volume_block = self._largest[1]
+        return {
+            "headline": {
+                "totalVolumeCubicMeters": math.fsum(self._volume),
+                "totalAreaHectares": math.fsum(self._area_hectares),
+                "blockCount": self.block_count,
+            },
+            "priorityBlocks": priority_blocks,
+            "insights": {
+                "averageMeanDepthMeters": math.fsum(self._mean_depth) / self.block_count,
+                "averageMaxDepthMeters": math.fsum(self._max_depth) / self.block_count,
+                "deepestBlock": {
+                    "label": deepest_block["label"],
+                    "maxDepthMeters": deepest_block["maxDepthMeters"],
+                },
+                "largestBlock": {
+                    "label": largest_volume_block["label"],
+                    "volumeCubicMeters": largest_volume_block["volumeCubicMeters"],
+                },
+            },
+            "policyFlags": {
+                "requiresAttention": bool(priority_blocks),
+                "highVolumeThreshold": VOLUME_PRIORITY_THRESHOLD,
+                "highDepthThreshold": DEPTH_PRIORITY_THRESHOLD,
+            },
+            "updatedAt": datetime.utcnow().isoformat(),
+        }
+
+
+def _block_fingerprints(
+    features: List[Dict[str, Any]],
+    geometries_utm: np.ndarray,
+    dem: DemData,
+    grid_encoding: GridEncoding,
+) -> List[Optional[str]]:
+    """Reuse keys for blocks with a ``persistent_id`` (``None`` otherwise).
+
+    A block's metrics depend on its own polygon, on any block close enough
+    to overlap its mask or rim (and whether that block is rasterized after
+    it), and on the DEM grid and processing parameters, so all of these go
+    into the key.
+    """
+
+    context = {
+        "crs": dem.crs.to_string(),
+        "resolution": dem.resolution,
+        "products": sorted({tile.product for tile in dem.tiles}),
+        "dataset": dem.dataset_label,
+        "dtmMethod": dem.dtm_method,
+        "overview": dem.overview,
+        "processing": _processing_descriptor(grid_encoding),
+    }
+    tree = STRtree(geometries_utm)
+    reach = (RIM_DILATION_ITERATIONS + 2) * dem.resolution
+    shapes_wkb = shapely.to_wkb(shapely.normalize(geometries_utm), hex=True).tolist()
+    neighbours: Dict[int, List[int]] = {}
+    for source, other in tree.query(geometries_utm, predicate="dwithin", distance=reach).T.tolist():
+        if source != other:
+            neighbours.setdefault(source, []).append(other)
+
+    fingerprints: List[Optional[str]] = []
+    for idx, feature in enumerate(features):
+        persistent_id = feature.get("persistent_id")
+        if not persistent_id:
+            fingerprints.append(None)
+            continue
+        descriptor = {
+            "persistentId": persistent_id,
+            "label": feature["label"],
+            "blockId": feature["properties"].get("block_id"),
+            "source": feature.get("source"),
+            "geometry": shapes_wkb[idx],
+            "neighbours": sorted([shapes_wkb[other], bool(other > idx)] for other in neighbours.get(idx, [])),
+            "context": context,
+        }
+        fingerprints.append(hashlib.sha256(json.dumps(descriptor, sort_keys=True).encode("utf-8")).hexdigest())
+    return fingerprints
+
+
+def _compute_block_metric(
+    idx: int,
+    feature: Dict[str, Any],
+    area_sq_m: float,
+    centroid: Tuple[float, float],
+    bbox: Optional[Tuple[slice, slice]],
+    label_raster: np.ndarray,
+    terrain: np.ndarray,
+    transform: rasterio.Affine,
+    resolution: float,
+    rim_elevation: float,
+    elevation_model: Dict[str, Any],
+    grid_encoding: GridEncoding,
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Metrics for block ``idx`` (its label in ``label_raster``), or ``None`` and the reason it was skipped."""
+
+    if bbox is None:
+        return None, f"Block {feature['label']} skipped (no DEM coverage)"
+
+    window = _block_window(bbox, label_raster.shape)
+    window_dem = terrain[window]
+    window_transform = transform * rasterio.Affine.translation(window[1].start, window[0].start)
+    block_mask = label_raster[window] == idx
+
+    stats = block_depth_stats(window_dem, block_mask, rim_elevation, resolution)
+    if stats.finite_count == 0:
+        return None, f"Block {feature['label']} skipped (DEM nodata)"
+
+    rim_elevation = stats.rim_elevation
+    depth_surface = stats.depth_surface
+    coverage_pixels = stats.pixel_count
+    prismoidal_volume = float(max(0.0, stats.volume_prismoidal))
+    volume_simpson = float(max(0.0, stats.volume_simpson))
+    volume_trapezoid = float(max(0.0, stats.volume_trapezoid))
+    volume_cell_sum = stats.volume_cell_sum
+    area_sq_m = float(area_sq_m)
+    max_depth = stats.max_depth
+    mean_depth = float(prismoidal_volume / area_sq_m) if area_sq_m > 0 else 0.0
+    median_depth = stats.median_depth
+
+    visualization_payload = _prepare_visualization_payload(
+        block_mask,
+        window_dem,
+        depth_surface,
+        window_transform,
+        rim_elevation,
+        resolution,
+        grid_encoding,
+    )
+
+    metric = {
+        "blockLabel": feature["label"],
+        "blockId": (
+            feature["properties"].get("block_id") or feature.get("persistent_id") or f"block-{feature.get('ordinal', idx)}"
+        ),
+        "source": feature.get("source", "unknown"),
+        "persistentId": feature.get("persistent_id"),
+        "areaSquareMeters": float(area_sq_m),
+        "areaHectares": float(area_sq_m / 10_000.0),
+        "pixelCount": coverage_pixels,
+        "rimElevationMeters": float(rim_elevation),
+        "maxDepthMeters": max_depth,
+        "meanDepthMeters": mean_depth,
+        "medianDepthMeters": median_depth,
+        "volumeCubicMeters": prismoidal_volume,
+        "volumePrismoidalCubicMeters": prismoidal_volume,
+        "volumeSimpsonCubicMeters": volume_simpson,
+        "volumeTrapezoidalCubicMeters": volume_trapezoid,
+        "volumeCellSummationCubicMeters": volume_cell_sum,
+        "centroid": {
+            "lon": float(centroid[0]),
+            "lat": float(centroid[1]),
         },
-        "policyFlags": {
-            "requiresAttention": bool(priority_blocks),
-            "highVolumeThreshold": VOLUME_PRIORITY_THRESHOLD,
-            "highDepthThreshold": DEPTH_PRIORITY_THRESHOLD,
-        },
-        "updatedAt": datetime.utcnow().isoformat(),
+        "visualization": visualization_payload,
+        "elevationModel": dict(elevation_model),
+        "computedAt": datetime.utcnow().isoformat(),
     }
+    summary_message = (
+        f"Processed {feature['label']}: area={area_sq_m:.1f} m², volume={prismoidal_volume:.1f} m³, max depth={max_depth:.2f} m"
+    )
+    return metric, summary_message
+
+
+def _log_block_result(metric: Optional[Dict[str, Any]], message: str) -> None:
+    if metric is None:
+        logger.warning(message)
+        return
+    logger.info(
+        "Processed block %s | area=%.1f m² volume=%.1f m³ maxDepth=%.2f m meanDepth=%.2f m",
+        metric["blockLabel"],
+        metric["areaSquareMeters"],
+        metric["volumeCubicMeters"],
+        metric["maxDepthMeters"],
+        metric["meanDepthMeters"],
+    )
+
+
+def _estimated_grid_bytes(extent: Tuple[float, float, float, float], resolution: float) -> int:
+    width = int(round((extent[2] - extent[0]) / resolution))
+    height = int(round((extent[3] - extent[1]) / resolution))
+    return width * height * BYTES_PER_GRID_PIXEL
+
+
+@dataclass
+class BlockChunk:
+    """A grid window holding every pixel its member blocks and their rims touch."""
+
+    rows: slice
+    cols: slice
+    members: List[int]  # 1-based labels whose metrics this chunk computes
+    context: List[int]  # 1-based labels rasterized into the window (members plus neighbours)
+
+    @property
+    def pixels(self) -> int:
+        return (self.rows.stop - self.rows.start) * (self.cols.stop - self.cols.start)
+
+
+def _plan_block_chunks(
+    geometries_utm: np.ndarray,
+    labels: List[int],
+    transform: rasterio.Affine,
+    shape: Tuple[int, int],
+    budget_bytes: int = MEMORY_BUDGET_BYTES,
+) -> List[BlockChunk]:
+    """Group blocks into overlapping grid windows sized to the memory budget.
+
+    Each block goes to the chunk whose core square contains its centre; the
+    chunk window is the union of its members' pixel boxes grown by
+    ``CHUNK_MARGIN_PIXELS``. Window origins keep even offsets from the grid
+    origin and are clipped to the grid like the full raster, so
+    ``_block_window`` and the rim footprint see the same pixels as an
+    unchunked run. A block larger than the budget still gets a window large
+    enough to hold it.
+    """
+
+    height, width = shape
+    resolution = transform.a
+    window_side = int(math.sqrt(max(1, budget_bytes // BYTES_PER_GRID_PIXEL)))
+    core = max(MIN_CHUNK_CORE_PIXELS, window_side - 2 * CHUNK_MARGIN_PIXELS)
+
+    groups: Dict[Tuple[int, int], List[Tuple[int, int, int, int, int]]] = {}
+    for label, (minx, miny, maxx, maxy) in zip(labels, shapely.bounds(geometries_utm).tolist()):
+        # One extra pixel either side covers all_touched rasterization.
+        col_start = max(0, math.floor((minx - transform.c) / resolution) - 1)
+        col_stop = min(width, math.ceil((maxx - transform.c) / resolution) + 1)
+        row_start = max(0, math.floor((transform.f - maxy) / resolution) - 1)
+        row_stop = min(height, math.ceil((transform.f - miny) / resolution) + 1)
+        if col_start >= col_stop or row_start >= row_stop:
+            # Outside the grid: any chunk reports it as having no coverage.
+            col_start, col_stop, row_start, row_stop = 0, 1, 0, 1
+        centre = ((row_start + row_stop) // 2 // core, (col_start + col_stop) // 2 // core)
+        groups.setdefault(centre, []).append((label, row_start, row_stop, col_start, col_stop))
+
+    chunks: List[BlockChunk] = []
+    for key in sorted(groups):
+        members = groups[key]
+        row_start = max(0, min(box[1] for box in members) - CHUNK_MARGIN_PIXELS)
+        row_stop = min(height, max(box[2] for box in members) + CHUNK_MARGIN_PIXELS)
+        col_start = max(0, min(box[3] for box in members) - CHUNK_MARGIN_PIXELS)
+        col_stop = min(width, max(box[4] for box in members) + CHUNK_MARGIN_PIXELS)
+        chunk = BlockChunk(
+            rows=slice(row_start - row_start % 2, row_stop),
+            cols=slice(col_start - col_start % 2, col_stop),
+            members=[box[0] for box in members],
+            context=[],
+        )
+        chunks.append(chunk)
+
+    # Neighbouring blocks that reach into a window shape its label raster
+    # (overlaps, rim pixels), so rasterize them there too, in label order.
+    tree = STRtree(geometries_utm)
+    for chunk in chunks:
+        window_box = shapely_box(
+            transform.c + chunk.cols.start * resolution,
+            transform.f - chunk.rows.stop * resolution,
+            transform.c + chunk.cols.stop * resolution,
+            transform.f - chunk.rows.start * resolution,
+        )
+        hits = tree.query(window_box, predicate="intersects")
+        chunk.context = sorted({labels[hit] for hit in hits.tolist()} | set(chunk.members))
+    return chunks
+
+
+def _process_block_chunk(task: Dict[str, Any]) -> List[Tuple[int, Optional[Dict[str, Any]], str]]:
+    """Compute the member blocks of one chunk; runs in a worker process.
+
+    The terrain window is read from the DTM cache entry the parent prepared,
+    so every chunk sees exactly the values of the full grid.
+    """
+
+    grid_cache = DtmGridCache(Path(task["cacheRoot"]), max_bytes=DTM_CACHE_MAX_BYTES)
+    cached = grid_cache.read_window(task["cacheKey"], task["extent"], overview=task["overview"])
+    if cached is None:
+        raise QuantitativeProcessingError("DTM cache entry for chunked processing is no longer available")
+
+    shapes = task["shapes"]
+    max_label = max(label for _, label in shapes)
+    label_raster = rasterize(
+        shapes,
+        out_shape=cached.terrain.shape,
+        transform=cached.transform,
+        fill=0,
+        dtype="int32",
+        all_touched=True,
+    )
+    block_slices = ndimage.find_objects(label_raster, max_label=max_label)
+    rim_elevations = _robust_rim_elevations(cached.terrain, label_raster, max_label)
+
+    results = []
+    for idx, feature, area_sq_m, centroid in task["blocks"]:
+        metric, message = _compute_block_metric(
+            idx,
+            feature,
+            area_sq_m,
+            centroid,
+            block_slices[idx - 1],
+            label_raster,
+            cached.terrain,
+            cached.transform,
+            task["resolution"],
+            rim_elevations[idx - 1],
+            task["elevationModel"],
+            task["gridEncoding"],
+        )
+        results.append((idx, metric, message))
+    return results
+
+
+_chunk_pool: Optional[ProcessPoolExecutor] = None
+_chunk_pool_lock = threading.Lock()
+
+
+def get_chunk_pool() -> ProcessPoolExecutor:
+    """Shared process pool for chunked block processing (created on first use).
+
+    Workers are spawned rather than forked so they do not inherit GDAL state
+    or the job and download threads of this process.
+    """
+
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is None:
+            _chunk_pool = ProcessPoolExecutor(
+                max_workers=CHUNK_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _chunk_pool
 
 
 def _generate_block_metrics(
@@ -776,233 +1868,479 @@ def _generate_block_metrics(
     dem: DemData,
     transformer: pyproj.Transformer,
     step_logger: StepLogger,
+    grid_encoding: GridEncoding = "json",
+    incremental: bool = False,
+    on_block: Optional[Callable[[int, Dict[str, Any]], None]] = None,
 ) -> List[Dict[str, Any]]:
-    with step_logger.step("Rasterize mine blocks") as details:
-        shapes = []
-        transformed_geometries: List[Any] = []
-        for idx, feature in enumerate(features, start=1):
-            geom_wgs84 = feature["geometry"]
-            geom_utm = shapely_transform(transformer.transform, geom_wgs84)
-            transformed_geometries.append(geom_utm)
-            shapes.append((geom_utm, idx))
-
-        label_raster = rasterize(
-            shapes,
-            out_shape=dem.array.shape,
-            transform=dem.transform,
-            fill=0,
-            dtype="int32",
-            all_touched=True,
-        )
-        details.append(
-            f"Rasterized {len(features)} block(s) to DEM grid with shape {dem.array.shape[1]}x{dem.array.shape[0]}"
-        )
+    """Per-block metrics in input order.
 
-    block_metrics: List[Dict[str, Any]] = []
-    with step_logger.step("Compute volumetric metrics") as details:
-        pixel_area = dem.resolution ** 2
-        tile_products = sorted({tile.product for tile in dem.tiles})
-        for idx, feature in enumerate(features, start=1):
-            block_mask = label_raster == idx
-            coverage_pixels = int(block_mask.sum())
-            if coverage_pixels == 0:
-                message = f"Block {feature['label']} skipped (no DEM coverage)"
-                details.append(message)
-                logger.warning(message)
-                continue
-
-            block_dem = np.where(block_mask, dem.array, np.nan)
-            elevation_values = block_dem[np.isfinite(block_dem)]
-            if elevation_values.size == 0:
-                message = f"Block {feature['label']} skipped (DEM nodata)"
-                details.append(message)
-                logger.warning(message)
-                continue
-
-            rim_elevation = _robust_rim_elevation(dem.array, block_mask)
-            if rim_elevation is None:
-                rim_elevation = float(np.nanmax(elevation_values))
-
-            depth_surface = rim_elevation - dem.array
-            depth_surface[depth_surface < 0] = 0
-            depth_surface = np.where(block_mask, depth_surface, 0)
-            depth_surface = np.nan_to_num(depth_surface, nan=0.0)
-
-            prismoidal_volume, volume_simpson, volume_trapezoid = _prismoidal_volume(depth_surface, dem.resolution)
-            volume_cell_sum = float(depth_surface.sum() * pixel_area)
-            area_sq_m = transformed_geometries[idx - 1].area
-            max_depth = float(np.nanmax(depth_surface))
-            mean_depth = float(prismoidal_volume / area_sq_m) if area_sq_m > 0 else 0.0
-            median_depth = float(np.nanmedian(depth_surface[block_mask]))
-
-            geom_wgs84 = feature["geometry"]
-            centroid = geom_wgs84.centroid
-
-            visualization_payload = _prepare_visualization_payload(
-                block_mask,
-                dem.array,
-                depth_surface,
-                dem.transform,
-                rim_elevation,
-                dem.resolution,
-            )
+    When ``dem`` is memory-mapped from the DTM cache (``cache_key`` set) the
+    blocks are processed in chunks on a process pool instead of rasterizing
+    the whole grid at once. With ``on_block`` each metric is handed to it
+    (with the block's 1-based index in ``features``) as soon as it is ready
+    and not kept, and the returned list is empty.
+    """
 
-            block_metrics.append({
-                "blockLabel": feature["label"],
-                "blockId": feature["properties"].get("block_id") or feature.get("persistent_id") or f"block-{idx}",
-                "source": feature.get("source", "unknown"),
-                "persistentId": feature.get("persistent_id"),
-                "areaSquareMeters": float(area_sq_m),
-                "areaHectares": float(area_sq_m / 10_000.0),
-                "pixelCount": coverage_pixels,
-                "rimElevationMeters": float(rim_elevation),
-                "maxDepthMeters": max_depth,
-                "meanDepthMeters": mean_depth,
-                "medianDepthMeters": median_depth,
-                "volumeCubicMeters": prismoidal_volume,
-                "volumePrismoidalCubicMeters": prismoidal_volume,
-                "volumeSimpsonCubicMeters": volume_simpson,
-                "volumeTrapezoidalCubicMeters": volume_trapezoid,
-                "volumeCellSummationCubicMeters": volume_cell_sum,
-                "centroid": {
-                    "lon": float(centroid.x),
-                    "lat": float(centroid.y),
-                },
-                "visualization": visualization_payload,
-                "elevationModel": {
-                    "dataset": dem.dataset_label,
-                    "dtmMethod": dem.dtm_method,
-                    "products": tile_products,
-                    "type": "DTM",
-                },
-                "computedAt": datetime.utcnow().isoformat(),
-            })
-            summary_message = (
-                f"Processed {feature['label']}: area={area_sq_m:.1f} m², volume={prismoidal_volume:.1f} m³, max depth={max_depth:.2f} m"
+    geometries_wgs84 = np.array([feature["geometry"] for feature in features], dtype=object)
+    transformed_geometries = _project_geometries(geometries_wgs84, transformer)
+    areas = shapely.area(transformed_geometries)
+    centroid_points = shapely.centroid(geometries_wgs84)
+    centroids = np.column_stack((shapely.get_x(centroid_points), shapely.get_y(centroid_points)))
+    labels = list(range(1, len(features) + 1))
+    chunks: List[BlockChunk] = []
+    label_raster: Optional[np.ndarray] = None
+    if dem.cache_key is not None:
+        with step_logger.step("Partition blocks into chunks") as details:
+            chunks = _plan_block_chunks(
+                transformed_geometries, labels, dem.transform, dem.array.shape, MEMORY_BUDGET_BYTES
+            )
+            largest = max(chunk.pixels for chunk in chunks)
+            details.append(
+                f"Split {len(features)} block(s) on a {dem.array.shape[1]}x{dem.array.shape[0]} grid into "
+                f"{len(chunks)} chunk(s); largest window {largest} px "
+                f"(~{largest * BYTES_PER_GRID_PIXEL / BYTES_PER_MB:.0f} MB of a {MEMORY_BUDGET_BYTES / BYTES_PER_MB:.0f} MB budget)"
+            )
+    else:
+        with step_logger.step("Rasterize mine blocks") as details:
+            label_raster = rasterize(
+                zip(transformed_geometries, labels),
+                out_shape=dem.array.shape,
+                transform=dem.transform,
+                fill=0,
+                dtype="int32",
+                all_touched=True,
             )
-            details.append(summary_message)
-            logger.info(
-                "Processed block %s | area=%.1f m² volume=%.1f m³ maxDepth=%.2f m meanDepth=%.2f m",
-                feature['label'],
-                area_sq_m,
-                prismoidal_volume,
-                max_depth,
-                mean_depth,
+            step_logger.record_array("labelRaster", label_raster)
+            details.append(
+                f"Rasterized {len(features)} block(s) to DEM grid with shape {dem.array.shape[1]}x{dem.array.shape[0]}"
             )
 
-    return block_metrics
+    messages: Dict[int, str] = {}
+    kept: Dict[int, Dict[str, Any]] = {}
+
+    def deliver(idx: int, metric: Dict[str, Any]) -> None:
+        if on_block is None:
+            kept[idx] = metric
+        else:
+            on_block(idx, metric)
+
+    fingerprints: List[Optional[str]] = [None] * len(features)
+    reused: set[int] = set()
+    if incremental:
+        with step_logger.step("Match stored block metrics") as details:
+            fingerprints = _block_fingerprints(features, transformed_geometries, dem, grid_encoding)
+            for idx, fingerprint in enumerate(fingerprints, start=1):
+                stored = BLOCK_METRIC_CACHE.get(fingerprint) if fingerprint else None
+                if stored is not None:
+                    reused.add(idx)
+                    messages[idx] = f"Reused stored metrics for {features[idx - 1]['label']}"
+                    deliver(idx, stored["value"])
+            keyed = sum(1 for fingerprint in fingerprints if fingerprint)
+            details.append(
+                f"Reusing {len(reused)} of {len(features)} block(s); "
+                f"{keyed - len(reused)} new or changed, {len(features) - keyed} without persistent_id"
+            )
 
+    elevation_model = {
+        "dataset": dem.dataset_label,
+        "dtmMethod": dem.dtm_method,
+        "products": sorted({tile.product for tile in dem.tiles}),
+        "type": "DTM",
+    }
+    with step_logger.step("Compute volumetric metrics") as details:
+        details.append(f"Depth and volume kernels: {'numba' if use_compiled_kernels() else 'numpy'}")
+
+        def finish(idx: int, metric: Optional[Dict[str, Any]], message: str) -> None:
+            messages[idx] = message
+            _log_block_result(metric, message)
+            if metric is None:
+                return
+            if fingerprints[idx - 1]:
+                BLOCK_METRIC_CACHE.put(fingerprints[idx - 1], metric, evict=False)
+            deliver(idx, metric)
+
+        if chunks:
+            tasks = []
+            for chunk in chunks:
+                members = [idx for idx in chunk.members if idx not in reused]
+                if not members:
+                    continue
+                tasks.append({
+                    "cacheRoot": str(DTM_GRID_CACHE.root),
+                    "cacheKey": dem.cache_key,
+                    "extent": (
+                        dem.transform.c + chunk.cols.start * dem.resolution,
+                        dem.transform.f - chunk.rows.stop * dem.resolution,
+                        dem.transform.c + chunk.cols.stop * dem.resolution,
+                        dem.transform.f - chunk.rows.start * dem.resolution,
+                    ),
+                    "overview": dem.overview,
+                    "resolution": dem.resolution,
+                    "shapes": [(transformed_geometries[idx - 1], idx) for idx in chunk.context],
+                    "blocks": [
+                        (idx, features[idx - 1], float(areas[idx - 1]), tuple(centroids[idx - 1])) for idx in members
+                    ],
+                    "elevationModel": elevation_model,
+                    "gridEncoding": grid_encoding,
+                })
+            workers = min(CHUNK_WORKERS, len(tasks))
+            if workers > 1:
+                futures = [get_chunk_pool().submit(_process_block_chunk, task) for task in tasks]
+                for future in as_completed(futures):
+                    for idx, metric, message in future.result():
+                        finish(idx, metric, message)
+            else:
+                for task in tasks:
+                    for idx, metric, message in _process_block_chunk(task):
+                        finish(idx, metric, message)
+            details.append(f"Processed {len(tasks)} chunk(s) on {max(1, workers)} worker process(es)")
+        else:
+            block_slices = ndimage.find_objects(label_raster, max_label=len(features))
+            rim_elevations = _robust_rim_elevations(dem.array, label_raster, len(features))
+            for idx, feature in enumerate(features, start=1):
+                if idx in reused:
+                    continue
+                metric, message = _compute_block_metric(
+                    idx,
+                    feature,
+                    float(areas[idx - 1]),
+                    tuple(centroids[idx - 1]),
+                    block_slices[idx - 1],
+                    label_raster,
+                    dem.array,
+                    dem.transform,
+                    dem.resolution,
+                    rim_elevations[idx - 1],
+                    elevation_model,
+                    grid_encoding,
+                )
+                finish(idx, metric, message)
 
-def _aggregate_summary(block_metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not block_metrics:
-        return {
-            "totalVolumeCubicMeters": 0.0,
-            "totalAreaSquareMeters": 0.0,
-            "totalAreaHectares": 0.0,
-            "averageMaxDepthMeters": 0.0,
-            "averageMeanDepthMeters": 0.0,
-            "blockCount": 0,
-            "deepestBlock": None,
-            "largestBlock": None,
-        }
+        details.extend(messages[idx] for idx in labels)
+
+    if incremental:
+        BLOCK_METRIC_CACHE.evict()
+    return [kept[idx] for idx in labels if idx in kept]
 
-    total_volume = sum(block["volumeCubicMeters"] for block in block_metrics)
-    total_area = sum(block["areaSquareMeters"] for block in block_metrics)
-    average_max_depth = (
-        sum(block["maxDepthMeters"] for block in block_metrics) / len(block_metrics)
-        if block_metrics else 0.0
-    )
-    average_mean_depth = (
-        sum(block["meanDepthMeters"] for block in block_metrics) / len(block_metrics)
-        if block_metrics else 0.0
-    )
-    deepest_block = max(block_metrics, key=lambda item: item["maxDepthMeters"])
-    largest_block = max(block_metrics, key=lambda item: item["volumeCubicMeters"])
 
+def _processing_descriptor(grid_encoding: GridEncoding, quality: QualityProfile = "final") -> Dict[str, Any]:
     return {
-        "totalVolumeCubicMeters": total_volume,
-        "totalAreaSquareMeters": total_area,
-        "totalAreaHectares": total_area / 10_000.0,
-        "averageMaxDepthMeters": average_max_depth,
-        "averageMeanDepthMeters": average_mean_depth,
-        "blockCount": len(block_metrics),
-        "deepestBlock": {
-            "label": deepest_block["blockLabel"],
-            "maxDepthMeters": deepest_block["maxDepthMeters"],
-            "volumeCubicMeters": deepest_block["volumeCubicMeters"],
+        "resolution": [PIXEL_RESOLUTION_METERS, QUALITY_PROFILES[quality]],
+        "metrics": RESULT_CACHE_VERSION,
+        "rim": [RIM_MIN_WIDTH_PIXELS, RIM_DILATION_ITERATIONS],
+        "dtm": [DTM_PERCENTILE, DTM_WINDOW_METERS, DTM_OPENING_METERS, DTM_SMOOTHING_METERS, DTM_CACHE_VERSION],
+        "visualization": [MAX_VISUALIZATION_DIMENSION, MIN_VISUALIZATION_POINTS, grid_encoding],
+        "priority": [VOLUME_PRIORITY_THRESHOLD, DEPTH_PRIORITY_THRESHOLD],
+    }
+
+
+def _result_cache_key(
+    features: List[Dict[str, Any]],
+    source: str,
+    grid_encoding: GridEncoding,
+    quality: QualityProfile = "final",
+) -> str:
+    """Hash of everything that determines an analysis result except its ID."""
+
+    geometries = np.array([feature["geometry"] for feature in features], dtype=object)
+    shapes_wkb = shapely.to_wkb(shapely.normalize(geometries), hex=True).tolist()
+    descriptor = {
+        "version": RESULT_CACHE_VERSION,
+        "source": source,
+        "blocks": [
+            [
+                shape_wkb,
+                feature["label"],
+                feature["properties"].get("block_id"),
+                feature.get("persistent_id"),
+                feature.get("source"),
+            ]
+            for feature, shape_wkb in zip(features, shapes_wkb)
+        ],
+        "dem": [COPERNICUS_BASE_URL, COPERNICUS_PRODUCT, COPERNICUS_FALLBACK_PRODUCT, COPERNICUS_DATASET_LABEL],
+        "processing": _processing_descriptor(grid_encoding, quality),
+    }
+    return hashlib.sha256(json.dumps(descriptor, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _dem_payload(dem: DemData) -> Dict[str, Any]:
+    return {
+        "crs": dem.crs.to_string(),
+        "resolutionMeters": dem.resolution,
+        "overviewLevel": dem.overview,
+        "tileCount": len(dem.tile_paths),
+        "boundsUTM": dem.bounds_utm,
+        "boundsWGS84": dem.bounds_wgs84,
+        "dataset": {
+            "label": dem.dataset_label,
+            "products": sorted({tile.product for tile in dem.tiles}),
+            "dtmMethod": dem.dtm_method,
+            "type": "DTM",
         },
-        "largestBlock": {
-            "label": largest_block["blockLabel"],
-            "volumeCubicMeters": largest_block["volumeCubicMeters"],
-            "areaHectares": largest_block["areaHectares"],
+        "tiles": [
+            {
+                "path": str(tile.path),
+                "product": tile.product,
+            }
+            for tile in dem.tiles
+        ],
+    }
+
+
+def _zone_value(values: List[Any]) -> Any:
+    """The value shared by every zone, or the per-zone list when the zones differ."""
+
+    return values[0] if all(value == values[0] for value in values) else list(values)
+
+
+def _merge_dem_payloads(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combined DEM description for a multi-zone analysis; per-zone grids are listed under ``zones``.
+
+    Settings that differ between zones (resolution, overview, dataset, DTM
+    method) are given as a list in zone order.
+    """
+
+    tiles = {tile["path"]: tile for payload in payloads for tile in payload["tiles"]}
+    bounds = np.array([payload["boundsWGS84"] for payload in payloads])
+    return {
+        "crs": ", ".join(payload["crs"] for payload in payloads),
+        "resolutionMeters": _zone_value([payload["resolutionMeters"] for payload in payloads]),
+        "overviewLevel": _zone_value([payload["overviewLevel"] for payload in payloads]),
+        "tileCount": len(tiles),
+        "boundsUTM": None,
+        "boundsWGS84": (
+            float(bounds[:, 0].min()), float(bounds[:, 1].min()), float(bounds[:, 2].max()), float(bounds[:, 3].max())
+        ),
+        "dataset": {
+            "label": _zone_value([payload["dataset"]["label"] for payload in payloads]),
+            "products": sorted({product for payload in payloads for product in payload["dataset"]["products"]}),
+            "dtmMethod": _zone_value([payload["dataset"]["dtmMethod"] for payload in payloads]),
+            "type": "DTM",
         },
+        "tiles": list(tiles.values()),
+        "zones": payloads,
+    }
+
+
+def _stream_header(analysis_id: str, block_count: int, dem: Dict[str, Any], source: str) -> Dict[str, Any]:
+    return {
+        "type": "header",
+        "analysisId": analysis_id,
+        "expectedBlockCount": block_count,
+        "dem": dem,
+        "source": {"blockCollection": source},
+    }
+
+
+def _stream_trailer(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "trailer",
+        **{key: value for key, value in result.items() if key not in ("blocks", "dem", "source")},
     }
 
 
-def _run_quantitative_sync(analysis_id: str, payload: QuantitativeAnalysisRequest) -> Dict[str, Any]:
-    step_logger = StepLogger()
+def _run_quantitative_sync(
+    analysis_id: str,
+    payload: QuantitativeAnalysisRequest,
+    step_logger: Optional[StepLogger] = None,
+    on_record: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the analysis; ``on_record`` receives header, per-block and trailer records as they are ready.
+
+    When streaming, each block is dropped once it has been passed to
+    ``on_record``: the returned result has no ``blocks`` and is not stored in
+    the result cache.
+    """
+
+    step_logger = step_logger or StepLogger()
 
     results = payload.results
     if not isinstance(results, dict):
         raise QuantitativeProcessingError("Invalid results payload supplied")
 
     features, source = _extract_block_features(results, step_logger)
-    minx, miny, maxx, maxy, union_geom = _union_bounds(features)
+    cache_key = _result_cache_key(features, source, payload.gridEncoding, payload.quality)
+    with step_logger.step("Lookup cached result") as details:
+        cached = RESULT_CACHE.get(cache_key)
+        details.append(f"Result cache {'hit' if cached else 'miss'} for key {cache_key[:12]}")
+    if cached is not None:
+        result = cached["value"]
+        result["analysisId"] = analysis_id
+        result["steps"] = step_logger.steps
+        result["metadata"]["resultCache"] = {
+            "hit": True,
+            "key": cache_key,
+            "storedAt": datetime.utcfromtimestamp(cached["storedAt"]).isoformat(),
+        }
+        if on_record is not None:
+            on_record(_stream_header(analysis_id, len(features), result["dem"], source))
+            for block in result["blocks"]:
+                on_record({"type": "block", "block": block})
+            on_record(_stream_trailer(result))
+        return result
+
+    overview = QUALITY_PROFILES[payload.quality]
+    resolution = PIXEL_RESOLUTION_METERS * overview
     with step_logger.step("Prepare analysis extent") as details:
-        details.append(
-            f"Bounding box (WGS84): {minx:.4f}, {miny:.4f} → {maxx:.4f}, {maxy:.4f}"
-        )
+        groups = _utm_zone_groups(features)
+        for group in groups:
+            minx, miny, maxx, maxy = group.bounds
+            prefix = f"{group.name}: " if len(groups) > 1 else ""
+            details.append(
+                f"{prefix}Bounding box (WGS84): {minx:.4f}, {miny:.4f} → {maxx:.4f}, {maxy:.4f}"
+            )
+            grid_bytes = _estimated_grid_bytes(_target_extent(group.bounds, group.crs, resolution), resolution)
+            group.chunked = grid_bytes > MEMORY_BUDGET_BYTES
+            if group.chunked:
+                details.append(
+                    f"{prefix}Estimated working set {grid_bytes / BYTES_PER_MB:.0f} MB exceeds the "
+                    f"{MEMORY_BUDGET_BYTES / BYTES_PER_MB:.0f} MB budget; processing in chunks"
+                )
+        if len(groups) > 1:
+            details.append(
+                f"Blocks span {len(groups)} UTM zones; building a DEM per zone "
+                f"({min(ZONE_WORKERS, len(groups))} at a time)"
+            )
 
-    target_crs = _compute_utm_crs(union_geom)
-    dem = _build_dem((minx, miny, maxx, maxy), target_crs, step_logger)
-    transformer = _geometry_to_utm_transformer(target_crs)
-    block_metrics = _generate_block_metrics(features, dem, transformer, step_logger)
-    summary = _aggregate_summary(block_metrics)
-    executive_summary = _build_executive_summary(block_metrics)
-    generated_at = datetime.utcnow().isoformat()
+    def zone_logger(group: UtmZoneGroup) -> StepLogger:
+        return step_logger.scoped(group.name) if len(groups) > 1 else step_logger
 
-    visualization_ready = any(block.get("visualization") for block in block_metrics)
+    dems = _map_zone_groups(
+        lambda group: _build_dem(group.bounds, group.crs, zone_logger(group), overview, memory_mapped=group.chunked),
+        groups,
+    )
+    try:
+        dem_payload = (
+            _dem_payload(dems[0]) if len(dems) == 1 else _merge_dem_payloads([_dem_payload(dem) for dem in dems])
+        )
+        # Blocks are listed zone by zone (zones in order of first appearance),
+        # keeping input order within each zone.
+        result_positions = {
+            position: rank
+            for rank, position in enumerate(position for group in groups for position in group.members)
+        }
+        block_summary = BlockSummary()
+        summary_lock = threading.Lock()
+        if on_record is not None:
+            on_record(_stream_header(analysis_id, len(features), dem_payload, source))
+
+        def zone_metrics(group_dem: Tuple[UtmZoneGroup, DemData]) -> List[Dict[str, Any]]:
+            group, dem = group_dem
+            on_block = None
+            if on_record is not None:
+
+                def on_block(idx: int, block: Dict[str, Any]) -> None:
+                    with summary_lock:  # Zones run concurrently
+                        block_summary.add(block, result_positions[group.members[idx - 1]])
+                        on_record({"type": "block", "block": block})
+
+            return _generate_block_metrics(
+                [features[position] for position in group.members],
+                dem,
+                _geometry_to_utm_transformer(group.crs),
+                zone_logger(group),
+                payload.gridEncoding,
+                payload.incremental,
+                on_block,
+            )
 
-    return {
-        "analysisId": analysis_id,
-        "status": "completed",
-        "blockCount": len(block_metrics),
-        "steps": step_logger.steps,
-        "summary": summary,
-        "executiveSummary": executive_summary,
-        "blocks": block_metrics,
-        "dem": {
-            "crs": dem.crs.to_string(),
-            "resolutionMeters": dem.resolution,
-            "tileCount": len(dem.tile_paths),
-            "boundsUTM": dem.bounds_utm,
-            "boundsWGS84": dem.bounds_wgs84,
-            "dataset": {
-                "label": dem.dataset_label,
-                "products": sorted({tile.product for tile in dem.tiles}),
-                "dtmMethod": dem.dtm_method,
-                "type": "DTM",
+        block_metrics = [
+            metric for metrics in _map_zone_groups(zone_metrics, list(zip(groups, dems))) for metric in metrics
+        ]
+        for position, block in enumerate(block_metrics):
+            block_summary.add(block, position)
+        generated_at = datetime.utcnow().isoformat()
+
+        result = {
+            "analysisId": analysis_id,
+            "status": "completed",
+            "blockCount": block_summary.block_count,
+            "steps": step_logger.steps,
+            "summary": block_summary.summary(),
+            "executiveSummary": block_summary.executive_summary(),
+            **({"blocks": block_metrics} if on_record is None else {}),
+            "dem": dem_payload,
+            "source": {
+                "blockCollection": source,
             },
-            "tiles": [
-                {
-                    "path": str(tile.path),
-                    "product": tile.product,
-                }
-                for tile in dem.tiles
-            ],
-        },
-        "source": {
-            "blockCollection": source,
-        },
-        "metadata": {
-            "generatedAt": generated_at,
-            "visualizationAvailable": visualization_ready,
-            "pixelResolutionMeters": dem.resolution,
-            "demDataset": dem.dataset_label,
-            "demModel": "DTM",
-            "dtmDerivation": dem.dtm_method,
-        },
-    }
+            "metadata": {
+                "generatedAt": generated_at,
+                "visualizationAvailable": block_summary.visualization_available,
+                # Taken from the (merged) DEM description, so multi-zone runs
+                # report every zone's setting where they differ
+                "pixelResolutionMeters": dem_payload["resolutionMeters"],
+                "qualityProfile": payload.quality,
+                "demOverviewLevel": dem_payload["overviewLevel"],
+                "demDataset": dem_payload["dataset"]["label"],
+                "demModel": "DTM",
+                "dtmDerivation": dem_payload["dataset"]["dtmMethod"],
+                "utmZones": [group.crs.to_string() for group in groups],
+                "resultCache": {"hit": False, "key": cache_key, "storedAt": None},
+            },
+        }
+        if on_record is not None:
+            on_record(_stream_trailer(result))
+            return result
+        RESULT_CACHE.put(cache_key, result)
+        return result
+    finally:
+        for dem in dems:
+            if dem.cache_pin is not None:
+                DTM_GRID_CACHE.unpin(dem.cache_pin)
+
+
+def _run_quantitative_job(job: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    payload = QuantitativeAnalysisRequest(**job["payload"])
+    return _run_quantitative_sync(job["analysisId"], payload, StepLogger(on_change=progress))
+
+
+_job_runner: Optional[JobRunner] = None
+_job_runner_lock = threading.Lock()
+
+
+def get_quantitative_job_runner() -> JobRunner:
+    """Shared worker pool for queued quantitative analyses (created on first use)."""
+
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(
+                JobStore(JOB_DB_PATH),
+                kind="quantitative",
+                handler=_run_quantitative_job,
+                max_workers=JOB_WORKERS,
+                client_errors=(QuantitativeProcessingError,),
+                retention_seconds=JOB_RETENTION_SECONDS,
+            )
+    return _job_runner
+
+
+def _job_status_or_404(runner: JobRunner, job_id: str) -> Dict[str, Any]:
+    try:
+        return runner.store.get(job_id)
+    except JobNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}") from exc
+
+
+@router.on_event("startup")
+async def resume_quantitative_jobs():
+    """Re-queue jobs interrupted by a restart."""
+
+    await asyncio.to_thread(get_quantitative_job_runner)
+
+
+@router.get("/admin/step-metrics")
+async def get_step_metrics():
+    """Per-step duration and memory aggregates since process start."""
+
+    return STEP_METRICS.snapshot()
+
+
+@router.get("/admin/dem-cache")
+async def get_dem_cache_stats():
+    """Report Copernicus tile cache usage and hit/miss ratios."""
+
+    return await asyncio.to_thread(DEM_TILE_CACHE.stats)
 
 
 @router.post("/{analysis_id}/quantitative")
@@ -1018,3 +2356,116 @@ async def run_quantitative_analysis(analysis_id: str, payload: QuantitativeAnaly
         raise
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/{analysis_id}/quantitative/stream")
+async def stream_quantitative_analysis(analysis_id: str, payload: QuantitativeAnalysisRequest):
+    """Run a quantitative analysis and stream it as NDJSON.
+
+    The first line is a ``header`` record with the DEM metadata, followed by
+    one ``block`` record per block as it completes and a final ``trailer``
+    record with the summary, executive summary and steps. Failures after the
+    stream has started are reported as an ``error`` record.
+    """
+
+    loop = asyncio.get_running_loop()
+    # Bounded, so the analysis waits for a slow client instead of buffering
+    # every block record
+    records: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_RECORDS)
+    closed = threading.Event()
+
+    def emit(record: Optional[Dict[str, Any]]) -> None:
+        put = asyncio.run_coroutine_threadsafe(records.put(record), loop)
+        while True:
+            try:
+                put.result(timeout=STREAM_PUT_POLL_SECONDS)
+                return
+            except FutureTimeoutError:
+                if closed.is_set():
+                    put.cancel()
+                    raise _StreamClosed() from None
+
+    def run() -> None:
+        try:
+            try:
+                _run_quantitative_sync(analysis_id, payload, on_record=emit)
+            except _StreamClosed:
+                raise
+            except QuantitativeProcessingError as exc:
+                emit({"type": "error", "statusCode": 400, "detail": str(exc)})
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Streaming quantitative analysis %s failed", analysis_id)
+                emit({"type": "error", "statusCode": 500, "detail": str(exc)})
+            emit(None)
+        except _StreamClosed:
+            logger.info("Client closed the stream of analysis %s; stopping it", analysis_id)
+
+    async def body():
+        worker = asyncio.ensure_future(asyncio.to_thread(run))
+        try:
+            while True:
+                record = await records.get()
+                if record is None:
+                    break
+                yield json.dumps(record, default=str) + "\n"
+        finally:
+            closed.set()
+        await worker
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@router.post("/{analysis_id}/quantitative/jobs", status_code=202)
+async def submit_quantitative_job(analysis_id: str, payload: QuantitativeAnalysisRequest):
+    """Queue a quantitative analysis and return its job ID immediately."""
+
+    runner = await asyncio.to_thread(get_quantitative_job_runner)
+    job_id = await asyncio.to_thread(
+        runner.submit,
+        {"analysisId": analysis_id, "payload": payload.model_dump()},
+        analysis_id,
+    )
+    return await asyncio.to_thread(runner.store.get, job_id)
+
+
+@router.get("/quantitative/jobs/{job_id}")
+async def get_quantitative_job(job_id: str):
+    """Job status with the step progress reported so far."""
+
+    runner = await asyncio.to_thread(get_quantitative_job_runner)
+    return await asyncio.to_thread(_job_status_or_404, runner, job_id)
+
+
+@router.get("/quantitative/jobs/{job_id}/events")
+async def stream_quantitative_job(job_id: str, request: Request):
+    """Server-sent events carrying the job status each time its steps change."""
+
+    runner = await asyncio.to_thread(get_quantitative_job_runner)
+    status = await asyncio.to_thread(_job_status_or_404, runner, job_id)
+
+    async def events():
+        nonlocal status
+        last_seen = None
+        while True:
+            if status["updatedAt"] != last_seen:
+                last_seen = status["updatedAt"]
+                yield f"data: {json.dumps(status)}\n\n"
+            if status["status"] not in ("queued", "running") or await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+            status = await asyncio.to_thread(runner.store.get, job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/quantitative/jobs/{job_id}/result")
+async def get_quantitative_job_result(job_id: str):
+    """Result of a finished job; 409 while it is still queued or running."""
+
+    runner = await asyncio.to_thread(get_quantitative_job_runner)
+    status = await asyncio.to_thread(_job_status_or_404, runner, job_id)
+    if status["status"] == "failed":
+        raise HTTPException(status_code=status["errorCode"] or 500, detail=status["error"])
+    if status["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {status['status']}")
+    return await asyncio.to_thread(runner.store.result, job_id)
@@ -0,0 +1,241 @@
+"""
+Size-bounded cache for Copernicus DEM tiles.
+Tracks every tile in a SQLite manifest, validates tiles before admitting them
+and evicts least-recently-used tiles once the byte budget is exceeded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import rasterio
+
+logger = logging.getLogger(__name__)
+
+# Tiles touched this recently are never evicted, so a tile acquired for an
+# analysis is not removed before that analysis has opened it.
+EVICTION_GRACE_SECONDS = 600
+QUARANTINE_KEEP_FILES = 20
+COUNTER_NAMES = ("hits", "misses", "inserts", "evictions", "quarantined")
+
+
+class DemTileCacheError(Exception):
+    """Raised when a tile cannot be admitted to the cache."""
+
+
+class DemTileCache:
+    """SQLite-manifested Copernicus tile cache with LRU eviction."""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quarantine_dir = self.root / "quarantine"
+        self.manifest_path = self.root / "manifest.sqlite3"
+        self._session_counters = {name: 0 for name in COUNTER_NAMES}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tiles ("
+                " relpath TEXT PRIMARY KEY,"
+                " product TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                [(name,) for name in COUNTER_NAMES],
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.manifest_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        self._session_counters[name] += amount
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def path_for(self, product: str, filename: str) -> Path:
+        return self.root / product / filename
+
+    def _relpath(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    def lookup(self, product: str, filename: str) -> Optional[Path]:
+        """Return the cached tile path if present and intact, else ``None``.
+
+        A manifest entry whose file is missing or has changed size is dropped
+        (and the file quarantined). Files left over from before the manifest
+        existed are validated and adopted.
+        """
+
+        path = self.path_for(product, filename)
+        relpath = self._relpath(path)
+        with self._connect() as conn:
+            row = conn.execute("SELECT size FROM tiles WHERE relpath = ?", (relpath,)).fetchone()
+
+        if row is None and path.exists():
+            try:
+                self._admit(product, path, path)
+            except DemTileCacheError as exc:
+                logger.warning("Rejected unmanifested DEM tile %s: %s", path, exc)
+            else:
+                row = (path.stat().st_size,)
+
+        hit = False
+        if row is not None:
+            try:
+                hit = path.stat().st_size == row[0]
+            except FileNotFoundError:
+                hit = False
+            if not hit:
+                self.quarantine(path, "size does not match manifest")
+
+        if not hit:
+            return None
+        with self._connect() as conn:
+            conn.execute("UPDATE tiles SET last_access = ? WHERE relpath = ?", (time.time(), relpath))
+        return path
+
+    def record(self, hit: bool) -> None:
+        """Count one tile request as served from the cache or not."""
+
+        with self._connect() as conn:
+            self._count(conn, "hits" if hit else "misses")
+
+    def insert(self, product: str, source: Path, filename: str) -> Path:
+        """Validate ``source`` and move it into the cache as ``product/filename``.
+
+        Invalid files are quarantined and :class:`DemTileCacheError` is raised.
+        """
+
+        path = self.path_for(product, filename)
+        self._admit(product, source, path)
+        self.evict(keep=path)
+        return path
+
+    def _admit(self, product: str, source: Path, path: Path) -> None:
+        try:
+            _validate_tile(source)
+        except DemTileCacheError as exc:
+            self.quarantine(source, str(exc))
+            raise
+
+        digest = _sha256(source)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if source != path:
+            source.replace(path)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tiles (relpath, product, size, sha256, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self._relpath(path), product, path.stat().st_size, digest, now, now),
+            )
+            self._count(conn, "inserts")
+
+    def quarantine(self, path: Path, reason: str) -> None:
+        """Move a bad tile out of the cache and forget it."""
+
+        self.quarantine_dir.mkdir(parents=True, exist_ok=True)
+        target = self.quarantine_dir / f"{int(time.time())}_{path.name}"
+        try:
+            path.replace(target)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("Could not quarantine DEM tile %s: %s", path, exc)
+        else:
+            logger.warning("Quarantined DEM tile %s: %s", path, reason)
+
+        if path.is_relative_to(self.root):
+            with self._connect() as conn:
+                conn.execute("DELETE FROM tiles WHERE relpath = ?", (self._relpath(path),))
+                self._count(conn, "quarantined")
+
+        stale = sorted(self.quarantine_dir.iterdir(), key=lambda item: item.stat().st_mtime)
+        for item in stale[:-QUARANTINE_KEEP_FILES]:
+            item.unlink(missing_ok=True)
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least-recently-used tiles until the cache fits its budget."""
+
+        evicted = 0
+        cutoff = time.time() - EVICTION_GRACE_SECONDS
+        keep_relpath = self._relpath(keep) if keep is not None else ""
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            candidates = conn.execute(
+                "SELECT relpath, size FROM tiles WHERE last_access < ? AND relpath != ? ORDER BY last_access ASC",
+                (cutoff, keep_relpath),
+            ).fetchall()
+            for relpath, size in candidates:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    (self.root / relpath).unlink(missing_ok=True)
+                except OSError as exc:  # e.g. still open on Windows
+                    logger.warning("Could not evict DEM tile %s: %s", relpath, exc)
+                    continue
+                conn.execute("DELETE FROM tiles WHERE relpath = ?", (relpath,))
+                total -= size
+                evicted += 1
+            if evicted:
+                self._count(conn, "evictions", evicted)
+        if evicted:
+            logger.info("Evicted %d DEM tile(s) to stay within %d bytes", evicted, self.max_bytes)
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            tile_count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tiles").fetchone()
+            totals = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+        def ratio(counters: Dict[str, int]) -> Optional[float]:
+            lookups = counters.get("hits", 0) + counters.get("misses", 0)
+            return counters.get("hits", 0) / lookups if lookups else None
+
+        return {
+            "root": str(self.root),
+            "tileCount": tile_count,
+            "totalBytes": total_bytes,
+            "maxBytes": self.max_bytes,
+            "lifetime": {**totals, "hitRatio": ratio(totals)},
+            "process": {**self._session_counters, "hitRatio": ratio(self._session_counters)},
+        }
+
+
+def _validate_tile(path: Path) -> None:
+    """Open the tile and decode every pixel so truncated files are rejected."""
+
+    try:
+        with rasterio.open(path) as src:
+            if src.count < 1 or src.width == 0 or src.height == 0:
+                raise DemTileCacheError("tile has no raster data")
+            src.read(1)
+    except rasterio.errors.RasterioError as exc:
+        raise DemTileCacheError(f"unreadable tile: {exc}") from exc
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
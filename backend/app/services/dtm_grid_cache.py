@@ -0,0 +1,243 @@
+"""
+On-disk cache of warped DEM surfaces and derived terrain grids.
+Grids are stored as memory-mapped ``.npy`` arrays on a pixel-aligned lattice,
+so a later request whose extent falls inside a cached grid reads its window
+without re-warping or re-deriving the DTM. Coarser overview levels are stored
+alongside the full-resolution grids for preview-quality reads.
+
+Eviction skips entries read within the last ``EVICTION_GRACE_SECONDS`` and
+entries pinned by a running analysis, whose chunk workers reopen the grids by
+path while another request may be storing (and evicting) concurrently.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import rasterio
+
+logger = logging.getLogger(__name__)
+
+Extent = Tuple[float, float, float, float]
+
+EVICTION_GRACE_SECONDS = 600
+PIN_MAX_AGE_SECONDS = 24 * 3600  # Pins left behind by a crashed process stop counting after this
+PIN_PREFIX = ".pin-"
+
+
+@dataclass
+class CachedGrid:
+    surface: np.ndarray
+    terrain: np.ndarray
+    transform: rasterio.Affine
+    dtm_method: str
+    entry: Optional[Path] = None
+
+
+def snap_extent(extent: Extent, resolution: float) -> Extent:
+    """Expand an extent outwards to multiples of ``resolution``."""
+
+    minx, miny, maxx, maxy = extent
+    return (
+        math.floor(minx / resolution) * resolution,
+        math.floor(miny / resolution) * resolution,
+        math.ceil(maxx / resolution) * resolution,
+        math.ceil(maxy / resolution) * resolution,
+    )
+
+
+def extent_window(
+    transform: rasterio.Affine,
+    shape: Tuple[int, int],
+    extent: Extent,
+) -> Optional[Tuple[slice, slice]]:
+    """Row/column slices of ``extent`` within a north-up grid, or ``None`` if not contained."""
+
+    resolution = transform.a
+    minx, miny, maxx, maxy = extent
+    col_start = (minx - transform.c) / resolution
+    row_start = (transform.f - maxy) / resolution
+    col_stop = col_start + (maxx - minx) / resolution
+    row_stop = row_start + (maxy - miny) / resolution
+    offsets = [col_start, row_start, col_stop, row_stop]
+    if any(abs(value - round(value)) > 1e-6 for value in offsets):
+        return None
+    col_start, row_start, col_stop, row_stop = (int(round(value)) for value in offsets)
+    if col_start < 0 or row_start < 0 or row_stop > shape[0] or col_stop > shape[1]:
+        return None
+    return slice(row_start, row_stop), slice(col_start, col_stop)
+
+
+def block_mean(grid: np.ndarray, factor: int) -> np.ndarray:
+    """Average ``factor``×``factor`` blocks, ignoring NaNs; trailing partial blocks are dropped."""
+
+    rows, cols = grid.shape[0] // factor, grid.shape[1] // factor
+    blocks = grid[:rows * factor, :cols * factor].reshape(rows, factor, cols, factor)
+    finite = np.isfinite(blocks)
+    counts = finite.sum(axis=(1, 3))
+    totals = np.where(finite, blocks, 0.0).sum(axis=(1, 3), dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / counts, np.nan).astype(np.float32)
+
+
+def _grid_name(name: str, factor: int) -> str:
+    return f"{name}.npy" if factor == 1 else f"{name}_{factor}x.npy"
+
+
+class DtmGridCache:
+    """Directory of cached surface/terrain grids grouped by cache key."""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _entries(self, key: Optional[str] = None) -> List[Path]:
+        groups = [self.root / key] if key else [path for path in self.root.iterdir() if path.is_dir()]
+        entries: List[Path] = []
+        for group in groups:
+            if group.is_dir():
+                entries.extend(path for path in group.iterdir() if not path.name.startswith("."))
+        return entries
+
+    def read_window(self, key: str, extent: Extent, overview: int = 1, copy: bool = True) -> Optional[CachedGrid]:
+        """Return the cached grids clipped to ``extent`` if any entry contains it.
+
+        ``overview`` selects a coarser level stored with the entry (``factor``
+        times the base pixel size); entries without that level are skipped.
+        With ``copy=False`` the grids are read-only memory-mapped views, so
+        only the pages a caller touches are loaded.
+        """
+
+        for entry in self._entries(key):
+            try:
+                meta = json.loads((entry / "meta.json").read_text())
+            except (OSError, ValueError):
+                continue
+            if overview != 1 and overview not in meta.get("overviews", []):
+                continue
+            transform = rasterio.Affine(*meta["transform"]) * rasterio.Affine.scale(overview)
+            shape = (meta["shape"][0] // overview, meta["shape"][1] // overview)
+            window = extent_window(transform, shape, extent)
+            if window is None:
+                continue
+            try:
+                surface = np.load(entry / _grid_name("surface", overview), mmap_mode="r")
+                terrain = np.load(entry / _grid_name("terrain", overview), mmap_mode="r")
+                result = CachedGrid(
+                    surface=np.array(surface[window], dtype=np.float32) if copy else surface[window],
+                    terrain=np.array(terrain[window], dtype=np.float32) if copy else terrain[window],
+                    transform=transform * rasterio.Affine.translation(window[1].start, window[0].start),
+                    dtm_method=meta["dtmMethod"],
+                    entry=entry,
+                )
+            except (OSError, ValueError) as exc:
+                logger.warning("Discarding unreadable DTM cache entry %s: %s", entry, exc)
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            os.utime(entry / "meta.json")
+            return result
+        return None
+
+    def store(
+        self,
+        key: str,
+        surface: np.ndarray,
+        terrain: np.ndarray,
+        transform: rasterio.Affine,
+        dtm_method: str,
+        overviews: Iterable[int] = (),
+    ) -> None:
+        """Store full-resolution grids plus block-averaged ``overviews`` levels.
+
+        Overview lattices start at the grid origin, so callers should align the
+        origin to the coarsest pixel size they intend to read.
+        """
+
+        overviews = sorted({int(factor) for factor in overviews if int(factor) > 1})
+        group = self.root / key
+        group.mkdir(parents=True, exist_ok=True)
+        entry_id = uuid.uuid4().hex
+        staging = group / f".tmp-{entry_id}"
+        staging.mkdir()
+        try:
+            np.save(staging / "surface.npy", surface.astype(np.float32, copy=False))
+            np.save(staging / "terrain.npy", terrain.astype(np.float32, copy=False))
+            for factor in overviews:
+                np.save(staging / _grid_name("surface", factor), block_mean(surface, factor))
+                np.save(staging / _grid_name("terrain", factor), block_mean(terrain, factor))
+            (staging / "meta.json").write_text(json.dumps({
+                "transform": list(transform)[:6],
+                "shape": list(surface.shape),
+                "overviews": overviews,
+                "dtmMethod": dtm_method,
+                "createdAt": time.time(),
+            }))
+            staging.rename(group / entry_id)
+        except OSError as exc:
+            logger.warning("Could not store DTM cache entry for %s: %s", key, exc)
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self.evict(keep=group / entry_id)
+
+    def pin(self, entry: Path) -> Optional[Path]:
+        """Protect ``entry`` from eviction until :meth:`unpin`; ``None`` if it is gone."""
+
+        pin = entry / f"{PIN_PREFIX}{uuid.uuid4().hex}"
+        try:
+            pin.touch(exist_ok=False)
+        except OSError:
+            return None
+        return pin
+
+    def unpin(self, pin: Path) -> None:
+        pin.unlink(missing_ok=True)
+
+    def _pinned(self, entry: Path, now: float) -> bool:
+        for pin in entry.glob(f"{PIN_PREFIX}*"):
+            try:
+                if now - pin.stat().st_mtime < PIN_MAX_AGE_SECONDS:
+                    return True
+            except OSError:
+                continue
+        return False
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least-recently-read entries until the cache fits its budget.
+
+        Entries read within ``EVICTION_GRACE_SECONDS`` or pinned are kept even
+        if that leaves the cache over budget.
+        """
+
+        now = time.time()
+        cutoff = now - EVICTION_GRACE_SECONDS
+        sized = []
+        for entry in self._entries():
+            try:
+                size = sum(path.stat().st_size for path in entry.iterdir())
+                sized.append((entry.joinpath("meta.json").stat().st_mtime, size, entry))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in sized)
+        evicted = 0
+        for last_read, size, entry in sorted(sized, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if entry == keep or last_read >= cutoff or self._pinned(entry, now):
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("Evicted %d DTM cache entries to stay within %d bytes", evicted, self.max_bytes)
+        return evicted
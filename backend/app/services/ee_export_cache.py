@@ -0,0 +1,355 @@
+"""
+Shared on-disk cache of Earth Engine GeoTIFF exports.
+Entries are keyed by everything that determines the exported pixels (dataset,
+band selection, ROI, scale, CRS and date window), so repeated audits of the
+same site reuse the download instead of re-running a multi-minute export.
+Writers hold a per-entry lock across threads and processes and publish
+entries by atomic rename; entries expire after a TTL and the least recently
+used ones are evicted once the byte budget is exceeded. Independent exports
+run concurrently on a bounded pool, each with a timeout and retries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+import ee
+import geemap
+import rasterio
+
+logger = logging.getLogger(__name__)
+
+# Entries read this recently are never evicted, so a file handed to an
+# analysis is not removed before that analysis has opened it.
+EVICTION_GRACE_SECONDS = 600
+ROI_DECIMALS = 6  # ~0.1 m; coordinates closer than this share an entry
+EXPORT_WORKERS = max(1, int(os.getenv("EE_EXPORT_WORKERS", "4")))  # Exports in flight per process
+EXPORT_TIMEOUT_SECONDS = float(os.getenv("EE_EXPORT_TIMEOUT_SECONDS", "600"))  # Per download attempt
+EXPORT_RETRIES = max(0, int(os.getenv("EE_EXPORT_RETRIES", "2")))
+EXPORT_BACKOFF_SECONDS = 2.0
+# Longest one fetch may legitimately take, including retries and back-off
+EXPORT_DEADLINE_SECONDS = (EXPORT_TIMEOUT_SECONDS + EXPORT_BACKOFF_SECONDS * 2 ** EXPORT_RETRIES) * (EXPORT_RETRIES + 1)
+EXPORT_POLL_SECONDS = 1.0  # How often fetch_all looks at exports still queued behind others
+
+
+class EarthEngineExportError(RuntimeError):
+    """Raised when an export does not produce a readable GeoTIFF."""
+
+
+class EarthEngineExportCancelled(EarthEngineExportError):
+    """Raised inside an export whose caller has given up on it."""
+
+
+@dataclass(frozen=True)
+class ExportRequest:
+    """One GeoTIFF export over the bounding box of a buffered point.
+
+    ``collection`` requests take the first image of the collection filtered to
+    the ROI (and ``date_window``, if given), ordered by ``sort_by``.
+    """
+
+    dataset: str
+    lon: float
+    lat: float
+    buffer_m: float
+    scale: float
+    crs: str
+    bands: Tuple[str, ...] = ()
+    collection: bool = False
+    sort_by: Optional[str] = None
+    date_window: Optional[Tuple[str, str]] = None
+
+    def key(self) -> str:
+        descriptor = asdict(self)
+        descriptor["lon"] = round(self.lon, ROI_DECIMALS)
+        descriptor["lat"] = round(self.lat, ROI_DECIMALS)
+        descriptor["buffer_m"] = float(self.buffer_m)
+        descriptor["scale"] = float(self.scale)
+        encoded = json.dumps(descriptor, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def roi(self):
+        return ee.Geometry.Point([self.lon, self.lat]).buffer(self.buffer_m).bounds()
+
+    def image(self, roi):
+        if not self.collection:
+            image = ee.Image(self.dataset)
+        else:
+            images = ee.ImageCollection(self.dataset).filterBounds(roi)
+            if self.date_window:
+                images = images.filterDate(*self.date_window)
+            if self.sort_by:
+                images = images.sort(self.sort_by)
+            image = images.first()
+        if self.bands:
+            image = image.select(list(self.bands))
+        return image.clip(roi)
+
+
+class EarthEngineExportCache:
+    """Directory of ``<key>.tif`` exports with TTL and size limits.
+
+    An entry's modification time is when it was exported and its access time
+    when it was last read; the TTL counts from the export, eviction order from
+    the last read.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, ttl_seconds: float, lock_stale_seconds: float) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = float(ttl_seconds)
+        self.lock_stale_seconds = float(lock_stale_seconds)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.tif"
+
+    def lookup(self, request: ExportRequest) -> Optional[Path]:
+        """Return the cached export if present and not expired, else ``None``."""
+
+        path = self._path(request.key())
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if now - stat.st_mtime > self.ttl_seconds:
+            return None
+        os.utime(path, (now, stat.st_mtime))
+        return path
+
+    @contextmanager
+    def _write_lock(self, key: str) -> Iterator[None]:
+        """Serialise exporters of one entry across threads and processes.
+
+        Other processes are kept out by an exclusive ``.lock`` file, which is
+        broken once it is older than any export could legitimately take.
+        """
+
+        with self._locks_guard:
+            thread_lock = self._locks.setdefault(key, threading.Lock())
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = path.with_suffix(".lock")
+        with thread_lock:
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    os.close(fd)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - lock_path.stat().st_mtime > self.lock_stale_seconds:
+                            lock_path.unlink(missing_ok=True)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    time.sleep(0.5)
+            try:
+                yield
+            finally:
+                lock_path.unlink(missing_ok=True)
+
+    def fetch(self, request: ExportRequest, cancelled: Optional[threading.Event] = None) -> Path:
+        """Path of the export for ``request``, running the export on a miss.
+
+        Concurrent requests for the same entry wait for the first exporter
+        instead of starting their own export. Once ``cancelled`` is set, no
+        further attempts are made.
+        """
+
+        cached = self.lookup(request)
+        if cached is not None:
+            logger.info("Earth Engine export cache hit for %s", request.dataset)
+            return cached
+
+        key = request.key()
+        with self._write_lock(key):
+            cached = self.lookup(request)
+            if cached is not None:
+                return cached
+
+            path = self._path(key)
+            staging = path.with_name(f".{key}.{uuid.uuid4().hex}.tif")
+            try:
+                self._export(request, staging, cancelled)
+                staging.replace(path)
+            finally:
+                staging.unlink(missing_ok=True)
+        self.evict(keep=path)
+        return path
+
+    def _export(self, request: ExportRequest, staging: Path, cancelled: Optional[threading.Event]) -> None:
+        for attempt in range(EXPORT_RETRIES + 1):
+            if cancelled is not None and cancelled.is_set():
+                raise EarthEngineExportCancelled(f"Export of {request.dataset} was cancelled")
+            logger.info("Exporting %s to the Earth Engine export cache (attempt %d)", request.dataset, attempt + 1)
+            try:
+                roi = request.roi()
+                geemap.ee_export_image(
+                    request.image(roi), filename=str(staging), scale=request.scale, region=roi,
+                    crs=request.crs, file_per_band=False, timeout=EXPORT_TIMEOUT_SECONDS,
+                )
+                self._validate(staging, request)
+                return
+            except Exception as exc:  # noqa: BLE001 - Earth Engine and download errors are mostly transient
+                staging.unlink(missing_ok=True)
+                if attempt >= EXPORT_RETRIES:
+                    raise
+                delay = EXPORT_BACKOFF_SECONDS * (2 ** attempt)
+                logger.info("Retrying export of %s in %.1fs after: %s", request.dataset, delay, exc)
+                if cancelled is not None:
+                    cancelled.wait(delay)
+                else:
+                    time.sleep(delay)
+
+    def fetch_async(self, request: ExportRequest, cancelled: Optional[threading.Event] = None) -> Future:
+        """:meth:`fetch` on the shared export pool."""
+
+        return get_export_pool().submit(self.fetch, request, cancelled)
+
+    def fetch_all(self, requests: Mapping[str, ExportRequest]) -> Iterator[Tuple[str, Path]]:
+        """Fetch the named requests concurrently, yielding ``(name, path)`` as each one arrives.
+
+        Raises :class:`EarthEngineExportError` once an export has been running
+        for longer than :data:`EXPORT_DEADLINE_SECONDS`. Time spent queued
+        behind other exports, or by the caller between results, does not
+        count. If the caller stops early (on a timeout, a failed export or an
+        error of its own), queued exports are cancelled and running ones make
+        no further attempts.
+        """
+
+        cancelled = threading.Event()
+        started: Dict[str, float] = {}
+
+        def run(name: str, request: ExportRequest) -> Path:
+            started[name] = time.monotonic()
+            return self.fetch(request, cancelled)
+
+        pool = get_export_pool()
+        futures = {pool.submit(run, name, request): name for name, request in requests.items()}
+        pending = set(futures)
+        try:
+            while pending:
+                deadlines = [started[futures[f]] + EXPORT_DEADLINE_SECONDS for f in pending if futures[f] in started]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else EXPORT_POLL_SECONDS
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield futures[future], future.result()
+                now = time.monotonic()
+                overdue = sorted(
+                    futures[f] for f in pending
+                    if not f.done() and futures[f] in started and now - started[futures[f]] > EXPORT_DEADLINE_SECONDS
+                )
+                if overdue:
+                    raise EarthEngineExportError(
+                        f"Earth Engine exports {', '.join(overdue)} did not finish within {EXPORT_DEADLINE_SECONDS:.0f}s"
+                    )
+        finally:
+            if pending:
+                cancelled.set()
+                running = sorted(futures[f] for f in pending if not f.cancel())
+                if running:
+                    logger.warning("Abandoning Earth Engine exports still running: %s", ", ".join(running))
+
+    @staticmethod
+    def _validate(path: Path, request: ExportRequest) -> None:
+        # geemap reports failed exports by printing, so check the file itself
+        if not path.exists():
+            raise EarthEngineExportError(f"Earth Engine export of {request.dataset} produced no file")
+        try:
+            with rasterio.open(path) as src:
+                if src.width == 0 or src.height == 0:
+                    raise EarthEngineExportError(f"Earth Engine export of {request.dataset} is empty")
+        except rasterio.errors.RasterioIOError as exc:
+            raise EarthEngineExportError(f"Earth Engine export of {request.dataset} is unreadable: {exc}") from exc
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Drop expired entries, then least-recently-read ones until under budget."""
+
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*/*.tif"):
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path == keep or now - stat.st_atime < EVICTION_GRACE_SECONDS:
+                entries.append((stat.st_atime, stat.st_size, path, False))
+            elif now - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path, True))
+
+        total = sum(size for _, size, _, _ in entries)
+        evicted = 0
+        for _, size, path, evictable in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if not evictable:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("Evicted %d Earth Engine exports to stay within %d bytes", evicted, self.max_bytes)
+        return evicted
+
+
+_export_pool: Optional[ThreadPoolExecutor] = None
+_export_pool_lock = threading.Lock()
+
+
+def get_export_pool() -> ThreadPoolExecutor:
+    """Shared pool bounding the Earth Engine exports in flight (created on first use)."""
+
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is None:
+            _export_pool = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="ee-export")
+    return _export_pool
+
+
+EE_EXPORT_CACHE = EarthEngineExportCache(
+    Path(os.getenv("EE_EXPORT_CACHE_DIR", str(Path(tempfile.gettempdir()) / "khanan_ee_exports"))),
+    max_bytes=int(float(os.getenv("EE_EXPORT_CACHE_MAX_GB", "5")) * 1024 ** 3),
+    ttl_seconds=float(os.getenv("EE_EXPORT_CACHE_TTL_DAYS", "7")) * 86400,
+    lock_stale_seconds=EXPORT_DEADLINE_SECONDS,
+)
+
+
+def srtm_dem_request(lat: float, lon: float, buffer_m: float, scale: float = 30, crs: str = "EPSG:3857") -> ExportRequest:
+    return ExportRequest("USGS/SRTMGL1_003", lon=lon, lat=lat, buffer_m=buffer_m, scale=scale, crs=crs)
+
+
+def sentinel2_red_nir_request(
+    lat: float,
+    lon: float,
+    buffer_m: float,
+    scale: float = 30,
+    crs: str = "EPSG:3857",
+    date_window: Optional[Tuple[str, str]] = None,
+) -> ExportRequest:
+    """Least cloudy Sentinel-2 scene over the ROI, red (B4) and NIR (B8) bands."""
+
+    return ExportRequest(
+        "COPERNICUS/S2_SR_HARMONIZED", lon=lon, lat=lat, buffer_m=buffer_m, scale=scale, crs=crs,
+        bands=("B4", "B8"), collection=True, sort_by="CLOUDY_PIXEL_PERCENTAGE", date_window=date_window,
+    )
@@ -1,10 +1,11 @@
 import ee
-import geemap
 import os
 import json
 import logging
 from typing import Tuple
 
+from app.services.ee_export_cache import EE_EXPORT_CACHE, sentinel2_red_nir_request, srtm_dem_request
+
 logger = logging.getLogger(__name__)
 
 # Path discovery: backend/serviceAccountKey.json (adjust if needed)
@@ -72,50 +73,16 @@ def ensure_ee_initialized() -> None:
 def get_satellite_data(lat: float, lon: float, buffer_size: float = 3000) -> Tuple[str, str]:
     """
     Fetches Sentinel-2 and DEM data for the given coordinates.
-    Returns paths to the downloaded GeoTIFF files.
+    Returns paths to the downloaded GeoTIFF files, which are shared entries
+    of the Earth Engine export cache and must not be modified.
 
     Note: This function will attempt to initialize Earth Engine lazily and will raise
     a RuntimeError with remediation instructions if initialization fails.
     """
     ensure_ee_initialized()
 
-    roi = ee.Geometry.Point([lon, lat]).buffer(buffer_size).bounds()
-
-    # Create output directory
-    output_dir = "temp_data"
-    os.makedirs(output_dir, exist_ok=True)
-
-    dem_path = os.path.join(output_dir, "dem.tif")
-    sat_path = os.path.join(output_dir, "sat.tif")
-
-    # Fetch DEM
-    if not os.path.exists(dem_path):
-        logger.info("Fetching DEM to %s", dem_path)
-        geemap.ee_export_image(
-            ee.Image("USGS/SRTMGL1_003").clip(roi),
-            filename=dem_path,
-            scale=30,
-            region=roi,
-            crs='EPSG:3857',
-            file_per_band=False
-        )
-
-    # Fetch Sentinel-2 (Optical)
-    if not os.path.exists(sat_path):
-        logger.info("Fetching Sentinel-2 to %s", sat_path)
-        s2 = (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
-              .filterBounds(roi)
-              .sort('CLOUDY_PIXEL_PERCENTAGE')
-              .first()
-              .select(['B4', 'B8']))  # Red and NIR for NDVI
-
-        geemap.ee_export_image(
-            s2.clip(roi),
-            filename=sat_path,
-            scale=30,
-            region=roi,
-            crs='EPSG:3857',
-            file_per_band=False
-        )
-
-    return dem_path, sat_path
+    paths = dict(EE_EXPORT_CACHE.fetch_all({
+        "dem": srtm_dem_request(lat, lon, buffer_size),
+        "sat": sentinel2_red_nir_request(lat, lon, buffer_size),  # Red and NIR for NDVI
+    }))
+    return str(paths["dem"]), str(paths["sat"])
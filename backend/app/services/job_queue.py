@@ -0,0 +1,372 @@
+"""
+Persistent background job queue for long-running analysis work.
+Jobs, their step progress and their results are kept in a SQLite database so
+status survives a restart. Several processes may share one database: a runner
+claims a job atomically before running it and holds a lease on it, renewed by
+a heartbeat while the job runs. Only jobs whose lease has lapsed (their
+process died) are re-queued, on start-up and periodically after.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+DEFAULT_LEASE_SECONDS = 60.0
+
+ProgressCallback = Callable[[List[Dict[str, Any]]], None]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Dict[str, Any]]
+
+
+class JobNotFoundError(KeyError):
+    """Raised when a job ID is unknown (or has expired)."""
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8")) if blob else None
+
+
+class JobStore:
+    """SQLite table of jobs with compressed payloads and results."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " subject TEXT,"
+                " status TEXT NOT NULL,"
+                " payload BLOB,"
+                " steps TEXT NOT NULL DEFAULT '[]',"
+                " result BLOB,"
+                " error TEXT,"
+                " error_code INTEGER,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " updated_at REAL NOT NULL,"
+                " owner TEXT,"
+                " lease_expires_at REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:  # Databases created before leases existed
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind: str, subject: Optional[str], payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, subject, status, payload, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, subject, JOB_QUEUED, _pack(payload), now, now),
+            )
+        return job_id
+
+    def payload(self, job_id: str) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise JobNotFoundError(job_id)
+        return _unpack(row[0])
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Atomically move a queued job to running under ``owner``; ``False`` if another runner got it."""
+
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_expires_at = ?, attempts = attempts + 1,"
+                " started_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (JOB_RUNNING, owner, now + lease_seconds, now, now, job_id, JOB_QUEUED),
+            )
+        return cursor.rowcount == 1
+
+    def renew_leases(self, job_ids: List[str], owner: str, lease_seconds: float) -> None:
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET lease_expires_at = ? WHERE owner = ? AND status = ?"
+                f" AND id IN ({', '.join('?' * len(job_ids))})",
+                (time.time() + lease_seconds, owner, JOB_RUNNING, *job_ids),
+            )
+
+    def update_steps(self, job_id: str, steps: List[Dict[str, Any]], owner: Optional[str] = None) -> None:
+        """Record step progress; with ``owner``, only while that runner still holds the job."""
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET steps = ?, updated_at = ? WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (json.dumps(steps, default=str), time.time(), job_id, owner, owner),
+            )
+
+    def complete(self, job_id: str, result: Dict[str, Any], owner: Optional[str] = None) -> None:
+        """Record the result; with ``owner``, only while that runner still holds the job."""
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, payload = NULL, owner = NULL, lease_expires_at = NULL,"
+                " finished_at = ?, updated_at = ? WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (JOB_COMPLETED, _pack(result), now, now, job_id, owner, owner),
+            )
+
+    def fail(self, job_id: str, error: str, error_code: int, owner: Optional[str] = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, error_code = ?, payload = NULL, owner = NULL,"
+                " lease_expires_at = NULL, finished_at = ?, updated_at = ? WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (JOB_FAILED, error, error_code, now, now, job_id, owner, owner),
+            )
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Job status and step progress (without the result body)."""
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, subject, status, steps, error, error_code, attempts,"
+                " created_at, started_at, finished_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            raise JobNotFoundError(job_id)
+        (job_id, kind, subject, status, steps, error, error_code, attempts,
+         created_at, started_at, finished_at, updated_at) = row
+        return {
+            "jobId": job_id,
+            "kind": kind,
+            "subject": subject,
+            "status": status,
+            "steps": json.loads(steps),
+            "error": error,
+            "errorCode": error_code,
+            "attempts": attempts,
+            "createdAt": created_at,
+            "startedAt": started_at,
+            "finishedAt": finished_at,
+            "updatedAt": updated_at,
+        }
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise JobNotFoundError(job_id)
+        return _unpack(row[0])
+
+    def latest(self, kind: str, status: str = JOB_COMPLETED) -> Optional[str]:
+        """ID of the most recently finished (or created) job of ``kind`` in ``status``."""
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND status = ?"
+                " ORDER BY COALESCE(finished_at, created_at) DESC LIMIT 1",
+                (kind, status),
+            ).fetchone()
+        return row[0] if row else None
+
+    def requeue_expired(self, kind: str) -> List[str]:
+        """Re-queue running jobs whose lease has lapsed and return their IDs.
+
+        Jobs running under a live runner keep renewing their lease and are
+        left alone.
+        """
+
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND status = ? AND COALESCE(lease_expires_at, 0) < ?"
+                " ORDER BY created_at",
+                (kind, JOB_RUNNING, now),
+            ).fetchall()
+            requeued = []
+            for (job_id,) in rows:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_expires_at = NULL, updated_at = ?"
+                    " WHERE id = ? AND status = ? AND COALESCE(lease_expires_at, 0) < ?",
+                    (JOB_QUEUED, now, job_id, JOB_RUNNING, now),
+                )
+                if cursor.rowcount == 1:
+                    requeued.append(job_id)
+        return requeued
+
+    def queued(self, kind: str, older_than: Optional[float] = None) -> List[str]:
+        """IDs of queued jobs of ``kind``, optionally only those not touched for ``older_than`` seconds."""
+
+        cutoff = time.time() - older_than if older_than is not None else None
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND status = ? AND (? IS NULL OR updated_at < ?)"
+                " ORDER BY created_at",
+                (kind, JOB_QUEUED, cutoff, cutoff),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (JOB_COMPLETED, JOB_FAILED, cutoff),
+            )
+        return cursor.rowcount
+
+
+class JobRunner:
+    """Executes one kind of job on a dedicated, bounded worker pool.
+
+    ``client_errors`` are exception types that describe a bad request rather
+    than a server fault; they are recorded with error code 400, anything else
+    with 500. Runners in other processes may share the store: each job is
+    claimed by exactly one runner, whose heartbeat renews the job's lease
+    every ``lease_seconds / 3``. The heartbeat also re-queues jobs whose
+    lease has lapsed and picks up queued jobs no runner has started.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        kind: str,
+        handler: JobHandler,
+        max_workers: int,
+        client_errors: Tuple[Type[BaseException], ...] = (),
+        max_attempts: int = 3,
+        retention_seconds: float = 24 * 3600,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ) -> None:
+        self.store = store
+        self.kind = kind
+        self.handler = handler
+        self.max_workers = max(1, int(max_workers))
+        self.client_errors = client_errors
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = float(lease_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"job-{kind}")
+        self._lock = threading.Lock()
+        self._submitted: set[str] = set()  # Handed to the pool and not finished yet
+        self._running: set[str] = set()  # Claimed by this runner
+        self._stop = threading.Event()
+
+        pruned = store.prune(retention_seconds)
+        if pruned:
+            logger.info("Pruned %d expired %s job(s)", pruned, kind)
+        for job_id in store.requeue_expired(kind):
+            logger.info("Re-queueing interrupted %s job %s", kind, job_id)
+        # Queued jobs may also sit in another live runner's pool; whichever
+        # runner claims one first runs it.
+        for job_id in store.queued(kind):
+            self._enqueue(job_id)
+        self._heartbeat = threading.Thread(target=self._beat, name=f"job-{kind}-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def submit(self, payload: Dict[str, Any], subject: Optional[str] = None) -> str:
+        job_id = self.store.create(self.kind, subject, payload)
+        self._enqueue(job_id)
+        return job_id
+
+    def close(self) -> None:
+        """Stop the heartbeat; jobs still running lose their lease and are re-queued elsewhere."""
+
+        self._stop.set()
+        self._heartbeat.join()
+
+    def _enqueue(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+        self._pool.submit(self._run, job_id)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                with self._lock:
+                    running = list(self._running)
+                self.store.renew_leases(running, self.owner, self.lease_seconds)
+                for job_id in self.store.requeue_expired(self.kind):
+                    logger.info("Re-queueing %s job %s after its lease lapsed", self.kind, job_id)
+                    self._enqueue(job_id)
+                for job_id in self.store.queued(self.kind, older_than=self.lease_seconds):
+                    self._enqueue(job_id)
+            except Exception as exc:  # noqa: BLE001 - keep beating through transient database errors
+                logger.warning("%s job heartbeat failed: %s", self.kind, exc)
+
+    def _run(self, job_id: str) -> None:
+        try:
+            self._execute(job_id)
+        finally:
+            with self._lock:
+                self._submitted.discard(job_id)
+                self._running.discard(job_id)
+
+    def _execute(self, job_id: str) -> None:
+        try:
+            status = self.store.get(job_id)
+            if status["status"] != JOB_QUEUED:
+                return
+            if status["attempts"] >= self.max_attempts:
+                self.store.fail(job_id, f"Job abandoned after {status['attempts']} interrupted attempts", 500)
+                return
+            payload = self.store.payload(job_id)
+        except JobNotFoundError:
+            return
+
+        with self._lock:
+            self._running.add(job_id)
+        if not self.store.claim(job_id, self.owner, self.lease_seconds):
+            return  # Another runner claimed it first
+
+        def progress(steps: List[Dict[str, Any]]) -> None:
+            self.store.update_steps(job_id, steps, owner=self.owner)
+
+        try:
+            result = self.handler(payload, progress)
+        except self.client_errors as exc:
+            self.store.fail(job_id, str(exc), 400, owner=self.owner)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("%s job %s failed", self.kind, job_id)
+            self.store.fail(job_id, str(exc), 500, owner=self.owner)
+        else:
+            self.store.complete(job_id, result, owner=self.owner)
@@ -0,0 +1,111 @@
+"""
+Content-addressed on-disk cache of JSON results.
+Entries are gzip-compressed JSON files named by their key. A file's
+modification time is when it was stored and its access time when it was last
+read: entries older than the TTL are ignored and removed, and the least
+recently read entries are evicted once the byte budget is exceeded.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Directory of ``<key>.json.gz`` entries with TTL and size limits."""
+
+    def __init__(self, root: Path, max_bytes: int, ttl_seconds: float) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = float(ttl_seconds)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry (with ``storedAt``) or ``None`` if missing or expired."""
+
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if now - stat.st_mtime > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Discarding unreadable result cache entry %s: %s", path, exc)
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path, (now, stat.st_mtime))
+        return {"storedAt": stat.st_mtime, "value": entry["value"]}
+
+    def put(self, key: str, value: Dict[str, Any], evict: bool = True) -> None:
+        """Store ``value``; pass ``evict=False`` when storing a batch and call :meth:`evict` once after."""
+
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with gzip.open(staging, "wt", encoding="utf-8", compresslevel=6) as handle:
+                json.dump({"value": value}, handle, default=str)
+            staging.replace(path)
+        except (OSError, TypeError, ValueError) as exc:
+            logger.warning("Could not store result cache entry %s: %s", key, exc)
+            staging.unlink(missing_ok=True)
+            return
+        if evict:
+            self.evict(keep=path)
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Drop expired entries, then least-recently-read ones until under budget."""
+
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*/*.json.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path != keep and now - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("Evicted %d result cache entries to stay within %d bytes", evicted, self.max_bytes)
+        return evicted
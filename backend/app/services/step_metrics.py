@@ -0,0 +1,158 @@
+"""
+Process memory sampling and aggregation for pipeline step metrics.
+RSS is sampled on a background thread while a step runs so short allocation
+spikes are seen; completed steps are aggregated per step name and forwarded to
+any registered exporters. RSS comes from ``/proc`` and ``resource`` where
+available, else from psutil; without either it is reported as unavailable.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource  # Unix only
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+BYTES_PER_MB = 1024 * 1024
+
+StepExporter = Callable[[Dict[str, Any]], None]
+
+
+def current_rss() -> Optional[int]:
+    """Current resident set size in bytes, or ``None`` where it cannot be read."""
+
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+def peak_rss() -> Optional[int]:
+    """Lifetime peak resident set size in bytes, or ``None`` where it cannot be read."""
+
+    if RESOURCE_AVAILABLE:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    if PSUTIL_AVAILABLE:
+        # Windows reports the peak working set; elsewhere fall back to current RSS
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    return None
+
+
+class PeakRssSampler:
+    """Track the highest RSS seen while the context is active.
+
+    Without a current RSS reading the delta falls back to how far the step
+    raised the process's lifetime peak, which under-reports steps that stay
+    below an earlier high-water mark; with neither, the delta is ``None``.
+    RSS is process-wide, so concurrent steps see each other's allocations.
+    """
+
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._sampling = current_rss() is not None
+        self.available = self._sampling or peak_rss() is not None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> int:
+        value = current_rss() if self._sampling else peak_rss()
+        return value if value is not None else 0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._sample())
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.baseline = self.peak = self._sample()
+        if self._sampling:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak = max(self.peak, self._sample())
+
+    @property
+    def delta_bytes(self) -> Optional[int]:
+        if not self.available:
+            return None
+        return max(0, self.peak - self.baseline)
+
+
+class StepMetricsRegistry:
+    """Per-step-name aggregates of duration and memory, plus exporter fan-out."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._aggregates: Dict[str, Dict[str, Any]] = {}
+        self._exporters: List[StepExporter] = []
+
+    def add_exporter(self, exporter: StepExporter) -> None:
+        with self._lock:
+            self._exporters.append(exporter)
+
+    def observe(self, step: Dict[str, Any]) -> None:
+        with self._lock:
+            aggregate = self._aggregates.setdefault(step["name"], {
+                "count": 0,
+                "failures": 0,
+                "totalDurationMs": 0,
+                "maxDurationMs": 0,
+                "maxPeakRssDeltaMb": 0.0,
+                "maxTracemallocPeakMb": None,
+                "lastPeakRssDeltaMb": None,
+            })
+            aggregate["count"] += 1
+            aggregate["failures"] += int(step["status"] == "failed")
+            aggregate["totalDurationMs"] += step["duration_ms"]
+            aggregate["maxDurationMs"] = max(aggregate["maxDurationMs"], step["duration_ms"])
+            rss = step.get("peak_rss_delta_mb")
+            if rss is not None:
+                aggregate["maxPeakRssDeltaMb"] = max(aggregate["maxPeakRssDeltaMb"], rss)
+                aggregate["lastPeakRssDeltaMb"] = rss
+            traced = step.get("tracemalloc_peak_mb")
+            if traced is not None:
+                aggregate["maxTracemallocPeakMb"] = max(aggregate["maxTracemallocPeakMb"] or 0.0, traced)
+            exporters = list(self._exporters)
+
+        for exporter in exporters:
+            try:
+                exporter(step)
+            except Exception as exc:  # noqa: BLE001 - exporters must not fail the pipeline
+                logger.warning("Step metrics exporter failed: %s", exc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {name: dict(values) for name, values in self._aggregates.items()}
+        peak = peak_rss()
+        return {"steps": steps, "processPeakRssMb": round(peak / BYTES_PER_MB, 1) if peak is not None else None}
+
+
+STEP_METRICS = StepMetricsRegistry()
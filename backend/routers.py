@@ -1,10 +1,10 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse
 
+import asyncio
 import os
 import json
 import sys
-import shutil
 from datetime import datetime, timedelta
 import ee
 import geemap
@@ -15,19 +15,25 @@ from app.imagery_router import router as imagery_router
 from app.quantitative_analysis import router as quantitative_router
 from app.officer_router import router as officer_router
 from app.auth_router import router as auth_router
+from app.audit_jobs import (
+    ARTIFACT_MEDIA_TYPES,
+    AuditArtifactGoneError,
+    audit_view,
+    get_audit_job_runner,
+    request_artifact,
+    store_upload,
+)
+from app.services.job_queue import JobNotFoundError
 
 # --- PATH FIX: Point to Root Folder ---
 # Go up 1 level (from 'backend' to 'root') to find 'ai_engine'
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
 try:
-    from ai_engine.gemini_parser import extract_mining_params
-    from ai_engine.audit_engine import run_audit_pipeline, initialize_gee
+    from ai_engine.audit_engine import initialize_gee
 except ImportError as e:
     print(f" Import Error: {e} (Check if ai_engine folder exists in root)")
     # Mock for safety
-    def extract_mining_params(p): return {}
-    def run_audit_pipeline(p, output_base_path): return {"html_file": "", "png_file": "", "pdf_file": ""}
     def initialize_gee(): pass
 
 router = APIRouter()
@@ -39,69 +45,77 @@ router.include_router(quantitative_router)
 router.include_router(officer_router)
 router.include_router(auth_router)
 
-# GLOBAL STATE (For Dashboard)
-last_analysis_result = {
-    "status": "waiting",
-    "message": "No analysis run yet."
-}
-
-@router.post("/analyze-mine")
-async def analyze_mine(file: UploadFile = File(...)):
-    global last_analysis_result
+def _audit_status_or_404(runner, job_id: str):
     try:
-        # 1. Save Uploaded File Locally
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # 2. Run Gemini
-        print(" SERVER: Calling Gemini...")
-        params = extract_mining_params(temp_path)
-        
-        # Check if parameters were extracted
-        if not params:
-            print(" ERROR: Could not extract mining parameters from document")
-            if os.path.exists(temp_path): os.remove(temp_path)
-            raise HTTPException(status_code=400, detail="Could not extract mining parameters from the uploaded document. Please ensure the document contains valid mining site information.")
-        
-        # 3. Run Audit Engine
-        # Save to 'backend/public'
-        public_dir = os.path.join(os.path.dirname(__file__), "public")
-        os.makedirs(public_dir, exist_ok=True)
-        
-        result = run_audit_pipeline(params, output_base_path=public_dir)
-        
-        # Cleanup Input
-        if os.path.exists(temp_path): os.remove(temp_path)
+        return runner.store.get(job_id)
+    except JobNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown audit {job_id}") from exc
 
-        # 4. UPDATE DASHBOARD DATA
-        safe_name = params.get('project_name', 'Project').replace(" ", "_")
-        
-        # Construct Local URLs (Assuming backend runs on port 8000)
-        base_url = "http://127.0.0.1:8000/static"
-        
-        last_analysis_result = {
-            "status": "success",
-            "project": params.get('project_name'),
-            "location": f"{params.get('lat')}, {params.get('lon')}",
-            "compliance": "Analysis Complete",
-            "stats": result.get('stats', {}),
-            "urls": {
-                "model_3d": f"{base_url}/audit_{safe_name}/{safe_name}_3D_Model.html",
-                "map_2d": f"{base_url}/audit_{safe_name}/{safe_name}_Evidence_Map.png",
-                "report": f"{base_url}/audit_{safe_name}/{safe_name}_Report.pdf"
-            }
-        }
-
-        return JSONResponse(content=last_analysis_result)
+@router.on_event("startup")
+async def resume_audit_jobs():
+    """Re-queue audits interrupted by a restart."""
+    await asyncio.to_thread(get_audit_job_runner)
 
-    except Exception as e:
-        print(f" ERROR: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@router.post("/analyze-mine", status_code=202)
+async def analyze_mine(file: UploadFile = File(...)):
+    """
+    Queue an audit of the uploaded lease document and return its job immediately.
+    Poll /api/analysis/audits/{job_id} for progress and fetch the dashboard
+    payload from /api/analysis/audits/{job_id}/result once it has completed.
+    """
+    runner = await asyncio.to_thread(get_audit_job_runner)
+    document = await asyncio.to_thread(store_upload, file.file, file.filename)
+    job_id = await asyncio.to_thread(
+        runner.submit, {"documentPath": str(document), "filename": file.filename}, file.filename
+    )
+    return await asyncio.to_thread(runner.store.get, job_id)
+
+@router.get("/api/analysis/audits/{job_id}")
+async def get_audit_job(job_id: str):
+    runner = await asyncio.to_thread(get_audit_job_runner)
+    return await asyncio.to_thread(_audit_status_or_404, runner, job_id)
+
+async def _completed_audit_result(job_id: str):
+    runner = await asyncio.to_thread(get_audit_job_runner)
+    status = await asyncio.to_thread(_audit_status_or_404, runner, job_id)
+    if status["status"] == "failed":
+        raise HTTPException(status_code=status["errorCode"] or 500, detail=status["error"])
+    if status["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Audit {job_id} is {status['status']}")
+    return await asyncio.to_thread(runner.store.result, job_id)
+
+@router.get("/api/analysis/audits/{job_id}/result")
+async def get_audit_job_result(job_id: str):
+    """Dashboard payload of a finished audit; 409 while it is still queued or running."""
+    return audit_view(job_id, await _completed_audit_result(job_id))
+
+@router.get("/api/analysis/audits/{job_id}/artifacts/{kind}")
+async def get_audit_artifact(job_id: str, kind: str):
+    """
+    3D model, evidence map or PDF report of a finished audit.
+    Each artifact is rendered on the audit worker pool on first request and
+    served from disk afterwards.
+    """
+    if kind not in ARTIFACT_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown artifact {kind}")
+    result = await _completed_audit_result(job_id)
+    try:
+        path = await asyncio.wrap_future(request_artifact(result, kind))
+    except AuditArtifactGoneError as exc:
+        raise HTTPException(status_code=410, detail=str(exc)) from exc
+    return FileResponse(
+        path, media_type=ARTIFACT_MEDIA_TYPES[kind], filename=os.path.basename(path), content_disposition_type="inline"
+    )
 
 @router.get("/api/analysis/latest")
 async def get_latest_analysis():
-    return JSONResponse(content=last_analysis_result)
+    """Dashboard payload of the most recently completed audit."""
+    runner = await asyncio.to_thread(get_audit_job_runner)
+    job_id = await asyncio.to_thread(runner.store.latest, runner.kind)
+    if job_id is None:
+        return JSONResponse(content={"status": "waiting", "message": "No analysis run yet."})
+    result = await asyncio.to_thread(runner.store.result, job_id)
+    return JSONResponse(content={**audit_view(job_id, result), "jobId": job_id})
 
 @router.get("/api/timeseries/{lat}/{lon}")
 async def get_timeseries(lat: float, lon: float):
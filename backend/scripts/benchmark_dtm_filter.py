@@ -0,0 +1,73 @@
+"""
+Benchmark the DTM ground-extraction percentile filter against
+scipy.ndimage.percentile_filter on synthetic terrain grids.
+
+Usage:
+    python scripts/benchmark_dtm_filter.py
+    python scripts/benchmark_dtm_filter.py --sizes 2048 --windows 3 5 9
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import ndimage
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ground_extraction import PARTITION_MAX_WINDOW, percentile_filter
+
+
+def synthetic_terrain(size: int, seed: int = 0) -> np.ndarray:
+    """Rolling terrain with pits and sensor noise, in metres."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32)
+    terrain = 300 + 25 * np.sin(xx / 180) + 15 * np.cos(yy / 140) + rng.normal(0, 0.8, (size, size))
+    for _ in range(size // 64):
+        row, col = rng.integers(0, size, 2)
+        radius = int(rng.integers(8, 40))
+        terrain[max(0, row - radius):row + radius, max(0, col - radius):col + radius] -= rng.uniform(5, 30)
+    return terrain.astype(np.float32)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 8192])
+    parser.add_argument("--windows", type=int, nargs="+", default=[3, 5, 9, 15])
+    parser.add_argument("--percentile", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--numpy", action="store_true", help="Time the ndimage fallback instead of the compiled kernel")
+    parser.add_argument("--skip-baseline", action="store_true", help="Only time the new engine")
+    args = parser.parse_args()
+
+    print(f"{'grid':>11} {'window':>6} {'engine':>9} {'ndimage s':>10} {'engine s':>9} {'speedup':>8} {'mean |diff|':>11} {'max |diff|':>11}")
+    for size in args.sizes:
+        grid = synthetic_terrain(size)
+        for window in args.windows:
+            engine = "partition" if window <= PARTITION_MAX_WINDOW else "ndimage" if args.numpy else "histogram"
+            result, engine_seconds = timed(
+                lambda: percentile_filter(grid, args.percentile, window, workers=args.workers, compiled=not args.numpy)
+            )
+            if args.skip_baseline:
+                print(f"{size:>5}x{size:<5} {window:>6} {engine:>9} {'-':>10} {engine_seconds:>9.2f} {'-':>8} {'-':>11} {'-':>11}")
+                continue
+            baseline, baseline_seconds = timed(
+                lambda: ndimage.percentile_filter(grid, args.percentile, size=(window, window), mode="nearest")
+            )
+            diff = np.abs(result - baseline)
+            print(
+                f"{size:>5}x{size:<5} {window:>6} {engine:>9} {baseline_seconds:>10.2f} {engine_seconds:>9.2f} "
+                f"{baseline_seconds / engine_seconds:>7.1f}x {float(diff.mean()):>11.4f} {float(diff.max()):>11.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
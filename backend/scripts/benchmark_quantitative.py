@@ -0,0 +1,233 @@
+"""
+Offline end-to-end benchmark of the quantitative volumetric pipeline.
+
+Writes synthetic Copernicus-style DEM tiles to a local mirror directory, points
+COPERNICUS_DEM_BASE_URL at it and runs ``_run_quantitative_sync`` over a grid
+of block counts and AOI sizes. Each scenario is run cold (empty DTM cache) and
+warm; the per-step wall time, peak RSS growth and array sizes reported by
+StepLogger are written as JSON so runs can be compared across commits.
+
+Usage:
+    python scripts/benchmark_quantitative.py --output bench.json
+    python scripts/benchmark_quantitative.py --blocks 10 100 --aoi-km2 1 10 --tile-pixels 1200
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import rasterio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRODUCT = "Copernicus_DSM_COG_10"
+
+
+def tile_name(lat: int, lon: int) -> str:
+    lat_prefix = "N" if lat >= 0 else "S"
+    lon_prefix = "E" if lon >= 0 else "W"
+    return f"{PRODUCT}_{lat_prefix}{abs(lat):02d}_00_{lon_prefix}{abs(lon):03d}_00_DEM"
+
+
+def write_tile(mirror: Path, lat: int, lon: int, pixels: int, seed: int) -> None:
+    """Rolling terrain with excavation pits, laid out like a Copernicus COG."""
+
+    folder = tile_name(lat, lon)
+    path = mirror / folder / f"{folder}.tif"
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    axis = (np.arange(pixels, dtype=np.float32) + 0.5) / pixels
+    lon_grid = lon + axis[None, :]
+    lat_grid = lat + 1 - axis[:, None]
+    terrain = (
+        300
+        + 60 * np.sin(lon_grid * 9.0) * np.cos(lat_grid * 7.0)
+        + 25 * np.sin(lon_grid * 41.0 + lat_grid * 23.0)
+    ).astype(np.float32)
+    terrain += rng.normal(0, 0.5, terrain.shape).astype(np.float32)
+
+    meters_per_pixel = 111_320.0 / pixels
+    for _ in range(max(1, pixels // 12)):
+        row, col = rng.integers(0, pixels, 2)
+        radius = max(2, int(rng.uniform(40, 400) / meters_per_pixel))
+        depth = rng.uniform(5, 45)
+        rows = slice(max(0, row - radius), min(pixels, row + radius))
+        cols = slice(max(0, col - radius), min(pixels, col + radius))
+        yy, xx = np.ogrid[rows, cols]
+        bowl = 1 - ((yy - row) ** 2 + (xx - col) ** 2) / float(radius ** 2)
+        terrain[rows, cols] -= (depth * np.clip(bowl, 0, None)).astype(np.float32)
+
+    profile = {
+        "driver": "GTiff",
+        "width": pixels,
+        "height": pixels,
+        "count": 1,
+        "dtype": "float32",
+        "crs": "EPSG:4326",
+        "transform": rasterio.Affine(1 / pixels, 0, lon, 0, -1 / pixels, lat + 1),
+        "tiled": True,
+        "blockxsize": 512,
+        "blockysize": 512,
+        "compress": "deflate",
+        "predictor": 3,
+    }
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(terrain, 1)
+
+
+def aoi_bounds(center_lat: float, center_lon: float, area_km2: float):
+    half_km = math.sqrt(area_km2) / 2
+    half_lat = half_km / 111.32
+    half_lon = half_km / (111.32 * math.cos(math.radians(center_lat)))
+    return center_lon - half_lon, center_lat - half_lat, center_lon + half_lon, center_lat + half_lat
+
+
+def block_features(bounds, count: int, seed: int):
+    """Randomly placed, rotated quadrilaterals covering up to ~20% of the AOI."""
+
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = bounds
+    width_deg, height_deg = maxx - minx, maxy - miny
+    side = min(width_deg, height_deg) * min(0.25, math.sqrt(0.2 / count))
+    features = []
+    for idx in range(count):
+        cx = rng.uniform(minx + side, maxx - side)
+        cy = rng.uniform(miny + side, maxy - side)
+        angle = rng.uniform(0, math.pi / 2)
+        corners = []
+        for corner in range(4):
+            theta = angle + corner * math.pi / 2
+            scale = rng.uniform(0.3, 0.6) * side
+            corners.append([cx + scale * math.cos(theta), cy + scale * math.sin(theta)])
+        corners.append(corners[0])
+        features.append({
+            "type": "Feature",
+            "properties": {"name": f"Block {idx + 1}", "persistent_id": f"bench-{seed}-{idx}"},
+            "geometry": {"type": "Polygon", "coordinates": [corners]},
+        })
+    return features
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--aoi-km2", type=float, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--center", type=float, nargs=2, default=[21.95, 81.95], metavar=("LAT", "LON"),
+                        help="AOI centre; the default straddles four 1° tiles")
+    parser.add_argument("--tile-pixels", type=int, default=3600, help="Pixels per synthetic 1° tile side")
+    parser.add_argument("--quality", choices=["final", "preview"], default="final")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Mirror and cache directory (kept if given)")
+    parser.add_argument("--output", type=Path, default=Path("quantitative_benchmark.json"))
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="quant_bench_"))
+    mirror = work_dir / "mirror"
+    dtm_cache = work_dir / "dtm"
+    os.environ.update({
+        "COPERNICUS_DEM_BASE_URL": str(mirror),
+        "COPERNICUS_DEM_PRODUCT": PRODUCT,
+        "QUANT_ANALYSIS_DEM_CACHE": str(work_dir / "tiles"),
+        "QUANT_ANALYSIS_DTM_CACHE": str(dtm_cache),
+        "QUANT_ANALYSIS_RESULT_CACHE_MAX_GB": "0",
+    })
+    from app.quantitative_analysis import QuantitativeAnalysisRequest, _run_quantitative_sync
+    from app.services.step_metrics import BYTES_PER_MB, current_rss, peak_rss
+
+    center_lat, center_lon = args.center
+    largest = aoi_bounds(center_lat, center_lon, max(args.aoi_km2))
+    cells = [
+        (lat, lon)
+        for lat in range(math.floor(largest[1] - 0.05), math.ceil(largest[3] + 0.05))
+        for lon in range(math.floor(largest[0] - 0.05), math.ceil(largest[2] + 0.05))
+    ]
+    print(f"Writing {len(cells)} synthetic tile(s) of {args.tile_pixels}px to {mirror}")
+    for seed, (lat, lon) in enumerate(cells):
+        write_tile(mirror, lat, lon, args.tile_pixels, seed)
+
+    runs = []
+    for area in args.aoi_km2:
+        bounds = aoi_bounds(center_lat, center_lon, area)
+        for count in args.blocks:
+            features = block_features(bounds, count, seed=int(area * 1000) + count)
+            payload = QuantitativeAnalysisRequest(
+                results={"merged_blocks": {"type": "FeatureCollection", "features": features}},
+                quality=args.quality,
+            )
+            shutil.rmtree(dtm_cache, ignore_errors=True)
+            for phase in ("cold", "warm"):
+                rss_before = current_rss()
+                start = time.perf_counter()
+                result = _run_quantitative_sync(f"bench-{area}-{count}-{phase}", payload)
+                wall = time.perf_counter() - start
+                peak = peak_rss()
+                run = {
+                    "aoiKm2": area,
+                    "blocks": count,
+                    "phase": phase,
+                    "wallSeconds": round(wall, 4),
+                    "rssBeforeMB": round(rss_before / BYTES_PER_MB, 1) if rss_before is not None else None,
+                    "processPeakRssMB": round(peak / BYTES_PER_MB, 1) if peak is not None else None,
+                    "blockCount": result["blockCount"],
+                    "totalVolumeCubicMeters": result["summary"]["totalVolumeCubicMeters"],
+                    "steps": [
+                        {
+                            "name": step["name"],
+                            "durationMs": step["duration_ms"],
+                            "peakRssDeltaMB": step["peak_rss_delta_mb"],
+                            "tracemallocPeakMB": step["tracemalloc_peak_mb"],
+                            "arrays": step["arrays"],
+                        }
+                        for step in result["steps"]
+                    ],
+                }
+                runs.append(run)
+                print(
+                    f"{area:>7.0f} km² {count:>5} blocks {phase:>4}: {wall:7.2f}s "
+                    + " ".join(f"{step['name'].split()[0]}={step['durationMs']}ms" for step in run["steps"])
+                )
+
+    report = {
+        "generatedAt": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpuCount": os.cpu_count(),
+        "parameters": {
+            "blocks": args.blocks,
+            "aoiKm2": args.aoi_km2,
+            "center": args.center,
+            "tilePixels": args.tile_pixels,
+            "quality": args.quality,
+        },
+        "runs": runs,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(runs)} run(s) to {args.output}")
+    if args.work_dir is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
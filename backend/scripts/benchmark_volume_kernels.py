@@ -0,0 +1,81 @@
+"""
+Benchmark the per-block depth/volume kernel: the Numba-compiled fused pass
+against the NumPy implementation, on synthetic block windows.
+Every statistic and the depth surface must match exactly between backends.
+
+Usage:
+    python scripts/benchmark_volume_kernels.py
+    python scripts/benchmark_volume_kernels.py --sizes 33 129 513 --blocks 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.volume_kernels import NUMBA_AVAILABLE, block_depth_stats
+
+
+def synthetic_windows(size: int, count: int, seed: int = 0):
+    """Pit-shaped terrain windows with elliptical block masks and a few nodata pixels."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32)
+    centre = (size - 1) / 2
+    windows = []
+    for _ in range(count):
+        radius = rng.uniform(0.3, 0.5) * size
+        bowl = np.clip(1 - ((yy - centre) ** 2 + (xx - centre) ** 2) / radius ** 2, 0, None)
+        dem = (320 - rng.uniform(5, 40) * bowl + rng.normal(0, 0.5, (size, size))).astype(np.float32)
+        dem[rng.random((size, size)) < 0.01] = np.nan
+        mask = ((yy - centre) / rng.uniform(0.3, 0.5)) ** 2 + ((xx - centre) / rng.uniform(0.3, 0.5)) ** 2 < size ** 2
+        windows.append((dem, mask, float(rng.uniform(318, 322))))
+    return windows
+
+
+def run(windows, compiled: bool):
+    start = time.perf_counter()
+    results = [block_depth_stats(dem, mask, rim, 10.0, compiled=compiled) for dem, mask, rim in windows]
+    return results, time.perf_counter() - start
+
+
+def identical(left, right) -> bool:
+    scalars = (
+        "pixel_count", "finite_count", "rim_elevation", "max_depth", "median_depth",
+        "volume_cell_sum", "volume_simpson", "volume_trapezoid",
+    )
+    return all(getattr(left, name) == getattr(right, name) for name in scalars) and np.array_equal(
+        left.depth_surface, right.depth_surface
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[17, 65, 257])
+    parser.add_argument("--blocks", type=int, default=200, help="Windows per size")
+    args = parser.parse_args()
+
+    if not NUMBA_AVAILABLE:
+        print("Numba is not installed; only the NumPy path can be timed.")
+
+    print(f"{'window':>9} {'blocks':>6} {'numpy s':>9} {'numba s':>9} {'speedup':>8} {'identical':>9}")
+    for size in args.sizes:
+        windows = synthetic_windows(size, args.blocks)
+        baseline, numpy_seconds = run(windows, compiled=False)
+        if not NUMBA_AVAILABLE:
+            print(f"{size:>4}x{size:<4} {args.blocks:>6} {numpy_seconds:>9.3f} {'-':>9} {'-':>8} {'-':>9}")
+            continue
+        run(windows[:1], compiled=True)  # JIT compile (or load from cache) outside the timing
+        compiled, numba_seconds = run(windows, compiled=True)
+        same = all(identical(left, right) for left, right in zip(baseline, compiled))
+        print(
+            f"{size:>4}x{size:<4} {args.blocks:>6} {numpy_seconds:>9.3f} {numba_seconds:>9.3f} "
+            f"{numpy_seconds / numba_seconds:>7.1f}x {str(same):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Tests import the backend as ``app.*``, the same way uvicorn runs it
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
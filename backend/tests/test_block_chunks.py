@@ -0,0 +1,96 @@
+import numpy as np
+import pyproj
+import pytest
+import rasterio
+
+import app.quantitative_analysis as qa
+from app.services.dtm_grid_cache import DtmGridCache
+
+CRS = pyproj.CRS.from_epsg(32644)
+GRID_PIXELS = 400
+
+
+def _synthetic_dem(rng: np.random.Generator):
+    """Sloping terrain with a pit under each of the blocks placed later."""
+
+    origin_x, origin_y = pyproj.Transformer.from_crs(4326, CRS, always_xy=True).transform(81.30, 21.40)
+    origin_x, origin_y = round(origin_x, -1), round(origin_y, -1)
+    resolution = qa.PIXEL_RESOLUTION_METERS
+    transform = rasterio.Affine(resolution, 0.0, origin_x, 0.0, -resolution, origin_y)
+    rows, cols = np.mgrid[0:GRID_PIXELS, 0:GRID_PIXELS]
+    terrain = (300.0 + 0.05 * rows + 0.03 * cols + rng.normal(0, 0.2, rows.shape)).astype(np.float32)
+    for _ in range(25):
+        row, col = rng.integers(40, GRID_PIXELS - 40, 2)
+        radius = rng.integers(6, 20)
+        bowl = 1.0 - ((rows - row) ** 2 + (cols - col) ** 2) / float(radius ** 2)
+        terrain -= (rng.uniform(3, 20) * np.clip(bowl, 0, None)).astype(np.float32)
+    return terrain, transform
+
+
+def _block_features(transform: rasterio.Affine, rng: np.random.Generator):
+    to_wgs84 = pyproj.Transformer.from_crs(CRS, 4326, always_xy=True)
+    features = []
+    for idx in range(30):
+        cx, cy = transform * tuple(rng.uniform(30, GRID_PIXELS - 30, 2))
+        corners = []
+        for corner in range(4):
+            theta = rng.uniform(0, 0.3) + corner * np.pi / 2
+            size = rng.uniform(40, 180)  # Some blocks overlap their neighbours
+            corners.append(list(to_wgs84.transform(cx + size * np.cos(theta), cy + size * np.sin(theta))))
+        corners.append(corners[0])
+        features.append({
+            "type": "Feature",
+            "properties": {"name": f"Block {idx + 1}"},
+            "geometry": {"type": "Polygon", "coordinates": [corners]},
+        })
+    return features
+
+
+def _strip(blocks):
+    return [{key: value for key, value in block.items() if key != "computedAt"} for block in blocks]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_chunked_metrics_match_whole_grid(tmp_path, monkeypatch, workers):
+    rng = np.random.default_rng(7)
+    terrain, transform = _synthetic_dem(rng)
+    collection = {"type": "FeatureCollection", "features": _block_features(transform, rng)}
+    features, _ = qa._extract_block_features({"merged_blocks": collection}, qa.StepLogger())
+
+    cache = DtmGridCache(tmp_path, max_bytes=1 << 30)
+    cache.store("synthetic", terrain, terrain, transform, "test")
+    extent = rasterio.transform.array_bounds(GRID_PIXELS, GRID_PIXELS, transform)
+    mapped = cache.read_window("synthetic", (extent[0], extent[1], extent[2], extent[3]), copy=False)
+    monkeypatch.setattr(qa, "DTM_GRID_CACHE", cache)
+    monkeypatch.setattr(qa, "CHUNK_WORKERS", workers)
+    monkeypatch.setattr(qa, "MEMORY_BUDGET_BYTES", 60 * 60 * qa.BYTES_PER_GRID_PIXEL)
+
+    def dem(cache_key):
+        return qa.DemData(
+            surface=mapped.surface if cache_key else np.array(mapped.surface),
+            terrain=mapped.terrain if cache_key else np.array(mapped.terrain),
+            transform=mapped.transform,
+            crs=CRS,
+            resolution=qa.PIXEL_RESOLUTION_METERS,
+            tiles=[],
+            bounds_utm=extent,
+            bounds_wgs84=(81.3, 21.36, 81.34, 21.4),
+            dataset_label="synthetic",
+            dtm_method="test",
+            cache_key=cache_key,
+        )
+
+    transformer = qa._geometry_to_utm_transformer(CRS)
+    whole = qa._generate_block_metrics(features, dem(None), transformer, qa.StepLogger())
+    geometries = qa._project_geometries(np.array([f["geometry"] for f in features], dtype=object), transformer)
+    chunks = qa._plan_block_chunks(
+        geometries, list(range(1, len(features) + 1)), transform, terrain.shape, qa.MEMORY_BUDGET_BYTES
+    )
+    assert len(chunks) > 1
+
+    runs = [qa._generate_block_metrics(features, dem("synthetic"), transformer, qa.StepLogger()) for _ in range(2)]
+
+    assert len(whole) == len(features)
+    assert [block["blockLabel"] for block in whole] == [feature["label"] for feature in features]
+    for chunked in runs:
+        assert _strip(chunked) == _strip(whole)
@@ -0,0 +1,145 @@
+import http.server
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.io import MemoryFile
+
+from app import quantitative_analysis as qa
+from app.services.dem_tile_cache import DemTileCache
+
+
+def _tile_bytes(size: int = 64) -> bytes:
+    rows, cols = np.mgrid[0:size, 0:size]
+    elevation = (300 + rows * 0.5 + cols * 0.25).astype("float32")
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver="GTiff", width=size, height=size, count=1, dtype="float32", crs="EPSG:4326",
+            transform=rasterio.Affine(1 / size, 0, 81, 0, -1 / size, 22),
+        ) as dst:
+            dst.write(elevation, 1)
+        return memfile.read()
+
+
+TILE = _tile_bytes()
+
+
+class TileServer:
+    """Serves ``TILE`` for every path; ``script`` overrides the first responses.
+
+    Each script entry is ``"ok"``, ``"truncate"`` (full Content-Length but only
+    half the body), or an HTTP status code.
+    """
+
+    def __init__(self) -> None:
+        self.requests = []
+        self.script = []
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((self.path, self.headers.get("Range")))
+                    action = server.script.pop(0) if server.script else "ok"
+                time.sleep(server.delay)
+                if isinstance(action, int):
+                    self.send_response(action)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start = 0
+                if self.headers.get("Range"):
+                    start = int(self.headers["Range"].split("=")[1].split("-")[0])
+                body = TILE[start:]
+                self.send_response(206 if start else 200)
+                if start:
+                    self.send_header("Content-Range", f"bytes {start}-{len(TILE) - 1}/{len(TILE)}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if action == "truncate":
+                    self.wfile.write(body[: len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def tile_server(tmp_path, monkeypatch):
+    server = TileServer()
+    monkeypatch.setattr(qa, "COPERNICUS_BASE_URL", server.url)
+    monkeypatch.setattr(qa, "DEM_TILE_CACHE", DemTileCache(tmp_path / "dem", max_bytes=1024 ** 3))
+    monkeypatch.setattr(qa, "TILE_RETRY_BACKOFF_SECONDS", 0.0)
+    yield server
+    server.close()
+
+
+def test_concurrent_fetches_of_one_tile_download_once(tile_server):
+    tile_server.delay = 0.2  # Keep the first download in flight while the others arrive
+    details = [[] for _ in range(8)]
+    results = [None] * 8
+
+    def fetch(index):
+        results[index] = qa._ensure_copernicus_tile(21, 81, details[index])
+
+    threads = [threading.Thread(target=fetch, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(tile_server.requests) == 1
+    assert len({str(tile.path) for tile in results}) == 1
+    assert results[0].path.read_bytes() == TILE
+    with sqlite3.connect(qa.DEM_TILE_CACHE.manifest_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] == 1
+    assert not list(results[0].path.parent.glob("*.lock"))
+
+
+def test_truncated_download_resumes_with_range_request(tile_server, tmp_path, monkeypatch):
+    tile_server.script = ["truncate"]
+    monkeypatch.setattr(qa, "TILE_DOWNLOAD_CHUNK_BYTES", 1024)  # Far smaller than the tile
+    cache_path = tmp_path / "tiles" / "tile.tif"
+
+    temp_path = qa._download_copernicus_tile(f"{tile_server.url}/tile.tif", cache_path)
+
+    assert temp_path.read_bytes() == TILE
+    assert len(tile_server.requests) == 2
+    first_range, resumed_range = (header for _, header in tile_server.requests)
+    assert first_range is None
+    offset = int(resumed_range.split("=")[1].rstrip("-"))
+    assert 0 < offset < len(TILE)
+
+
+def test_repeated_server_errors_retry_then_fail(tile_server, tmp_path):
+    tile_server.script = [503] * (qa.MAX_TILE_DOWNLOAD_RETRIES + 5)
+
+    with pytest.raises(qa.QuantitativeProcessingError, match="HTTP 503"):
+        qa._download_copernicus_tile(f"{tile_server.url}/tile.tif", tmp_path / "tile.tif")
+
+    assert len(tile_server.requests) == qa.MAX_TILE_DOWNLOAD_RETRIES + 1
+
+
+def test_server_errors_then_success_recovers(tile_server, tmp_path):
+    tile_server.script = [500, 429]
+
+    temp_path = qa._download_copernicus_tile(f"{tile_server.url}/tile.tif", tmp_path / "tile.tif")
+
+    assert temp_path.read_bytes() == TILE
+    assert len(tile_server.requests) == 3
@@ -0,0 +1,61 @@
+import os
+import time
+
+import numpy as np
+import rasterio
+
+from app.services import dtm_grid_cache
+from app.services.dtm_grid_cache import DtmGridCache
+
+TRANSFORM = rasterio.Affine(30.0, 0.0, 0.0, 0.0, -30.0, 3000.0)
+EXTENT = (0.0, 0.0, 3000.0, 3000.0)
+
+
+def _store(cache: DtmGridCache, key: str) -> None:
+    grid = np.ones((100, 100), dtype=np.float32)
+    cache.store(key, grid, grid, TRANSFORM, "test")
+
+
+def _age(cache: DtmGridCache, key: str, seconds: float) -> None:
+    for entry in cache._entries(key):
+        stamp = time.time() - seconds
+        os.utime(entry / "meta.json", (stamp, stamp))
+
+
+def test_recently_read_entries_survive_eviction(tmp_path):
+    cache = DtmGridCache(tmp_path, max_bytes=1)
+    _store(cache, "a")
+    _store(cache, "b")
+
+    assert cache.read_window("a", EXTENT) is not None
+    assert cache.read_window("b", EXTENT) is not None
+
+
+def test_pinned_entries_survive_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(dtm_grid_cache, "EVICTION_GRACE_SECONDS", 0)
+    cache = DtmGridCache(tmp_path, max_bytes=1)
+    _store(cache, "a")
+    mapped = cache.read_window("a", EXTENT, copy=False)
+    pin = cache.pin(mapped.entry)
+    _age(cache, "a", 60)
+
+    _store(cache, "b")
+    assert cache.read_window("a", EXTENT) is not None
+
+    cache.unpin(pin)
+    _age(cache, "a", 60)
+    _store(cache, "c")
+    assert cache.read_window("a", EXTENT) is None
+
+
+def test_stale_pins_are_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(dtm_grid_cache, "EVICTION_GRACE_SECONDS", 0)
+    cache = DtmGridCache(tmp_path, max_bytes=1)
+    _store(cache, "a")
+    pin = cache.pin(cache.read_window("a", EXTENT).entry)
+    stale = time.time() - dtm_grid_cache.PIN_MAX_AGE_SECONDS - 1
+    os.utime(pin, (stale, stale))
+    _age(cache, "a", 60)
+
+    _store(cache, "b")
+    assert cache.read_window("a", EXTENT) is None
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy import ndimage
+
+from app.services import ground_extraction
+from app.services.ground_extraction import percentile_filter
+from app.services.volume_kernels import NUMBA_AVAILABLE
+
+BACKENDS = [
+    pytest.param(True, marks=pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed"), id="compiled"),
+    pytest.param(False, id="numpy"),
+]
+
+
+def _terrain(rows, cols, seed):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:rows, 0:cols]
+    terrain = 300 + 10 * np.sin(xx / 9.0) + 6 * np.cos(yy / 7.0) + rng.normal(0, 0.8, (rows, cols))
+    terrain[rows // 3:rows // 2, cols // 4:cols // 2] -= 15  # A pit
+    if seed % 2:
+        terrain = np.round(terrain)  # Many ties
+    return terrain.astype(np.float32)
+
+
+@pytest.mark.parametrize("compiled", BACKENDS)
+@pytest.mark.parametrize("size", [1, 3, 5, 7, 9, 15, 21])
+@pytest.mark.parametrize("percentile", [0.0, 30.0, 50.0, 100.0])
+def test_matches_ndimage_percentile_filter(compiled, size, percentile, monkeypatch):
+    # Short strips put several strip seams inside the grid
+    monkeypatch.setattr(ground_extraction, "HISTOGRAM_STRIP_ROWS", 8)
+    monkeypatch.setattr(ground_extraction, "STRIP_BUDGET_BYTES", 1)
+    values = _terrain(67, 45, seed=size)
+    expected = ndimage.percentile_filter(values, percentile, size=(size, size), mode="nearest")
+    result = percentile_filter(values, percentile, size, workers=1, compiled=compiled)
+    assert result.dtype == values.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("compiled", BACKENDS)
+def test_threaded_strips_match_ndimage(compiled, monkeypatch):
+    monkeypatch.setattr(ground_extraction, "PARALLEL_MIN_PIXELS", 0)
+    values = _terrain(150, 90, seed=3)
+    expected = ndimage.percentile_filter(values, 30.0, size=(11, 11), mode="nearest")
+    np.testing.assert_array_equal(percentile_filter(values, 30.0, 11, workers=4, compiled=compiled), expected)
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (1, 40), (40, 1), (4, 4)])
+def test_grids_smaller_than_the_window(shape):
+    values = _terrain(*shape, seed=0)
+    expected = ndimage.percentile_filter(values, 30.0, size=(9, 9), mode="nearest")
+    np.testing.assert_array_equal(percentile_filter(values, 30.0, 9, workers=1), expected)
+
+
+def test_even_window_is_rejected():
+    with pytest.raises(ValueError):
+        percentile_filter(np.zeros((4, 4), dtype=np.float32), 30.0, 4)
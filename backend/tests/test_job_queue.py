@@ -0,0 +1,88 @@
+import threading
+import time
+
+from app.services.job_queue import JOB_COMPLETED, JOB_QUEUED, JOB_RUNNING, JobRunner, JobStore
+
+
+def _wait_for(store: JobStore, job_id: str, status: str, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stayed {store.get(job_id)['status']}")
+
+
+def test_claim_is_exclusive(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.create("test", None, {})
+
+    assert store.claim(job_id, "a", 60)
+    assert not store.claim(job_id, "b", 60)
+    assert store.get(job_id)["attempts"] == 1
+
+
+def test_requeue_only_takes_lapsed_leases(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    live = store.create("test", None, {})
+    lapsed = store.create("test", None, {})
+    store.claim(live, "alive", 60)
+    store.claim(lapsed, "dead", -1)
+
+    assert store.requeue_expired("test") == [lapsed]
+    assert store.get(live)["status"] == JOB_RUNNING
+    assert store.get(lapsed)["status"] == JOB_QUEUED
+    # A late finish from the runner that lost the lease is ignored
+    store.complete(lapsed, {"stale": True}, owner="dead")
+    assert store.get(lapsed)["status"] == JOB_QUEUED
+
+
+def test_stale_runner_progress_is_ignored(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.create("test", None, {})
+    store.claim(job_id, "stalled", -1)
+    store.requeue_expired("test")
+    store.claim(job_id, "current", 60)
+    store.update_steps(job_id, [{"name": "current step"}], owner="current")
+
+    store.update_steps(job_id, [{"name": "stale step"}], owner="stalled")
+    assert store.get(job_id)["steps"] == [{"name": "current step"}]
+
+
+def test_second_runner_does_not_rerun_live_jobs(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    release = threading.Event()
+    calls = []
+
+    def handler(payload, progress):
+        calls.append(payload["n"])
+        release.wait(10)
+        return {"n": payload["n"]}
+
+    first = JobRunner(store, "test", handler, max_workers=1, lease_seconds=0.3)
+    job_id = first.submit({"n": 1})
+    _wait_for(store, job_id, JOB_RUNNING)
+    time.sleep(0.5)  # Past the initial lease: only the heartbeat keeps it alive
+
+    second = JobRunner(store, "test", handler, max_workers=1, lease_seconds=0.3)
+    time.sleep(0.5)
+    release.set()
+    _wait_for(store, job_id, JOB_COMPLETED)
+    first.close()
+    second.close()
+
+    assert calls == [1]
+    assert store.result(job_id) == {"n": 1}
+
+
+def test_jobs_of_a_stopped_runner_are_picked_up(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.create("test", None, {"n": 2})
+    store.claim(job_id, "crashed", 0.1)
+    time.sleep(0.2)
+
+    runner = JobRunner(store, "test", lambda payload, progress: {"n": payload["n"]}, max_workers=1)
+    _wait_for(store, job_id, JOB_COMPLETED)
+    runner.close()
+    assert store.get(job_id)["attempts"] == 2
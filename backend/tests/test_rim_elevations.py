@@ -0,0 +1,81 @@
+from typing import Optional
+
+import numpy as np
+import pytest
+from scipy import ndimage
+
+from app.quantitative_analysis import RIM_DILATION_ITERATIONS, _robust_rim_elevations
+
+
+def _reference_rim_elevation(dem: np.ndarray, block_mask: np.ndarray, iterations: int = RIM_DILATION_ITERATIONS) -> Optional[float]:
+    """The original per-block implementation: dilate one mask, then median/MAD filter its rim."""
+
+    structure = ndimage.generate_binary_structure(2, 1)
+    dilated = ndimage.binary_dilation(block_mask, structure=structure, iterations=iterations)
+    rim_values = dem[np.logical_and(dilated, ~block_mask)]
+    rim_values = rim_values[np.isfinite(rim_values)]
+    if rim_values.size == 0:
+        return None
+    median = float(np.median(rim_values))
+    mad = float(np.median(np.abs(rim_values - median)))
+    if mad > 0:
+        inliers = rim_values[np.abs(rim_values - median) <= 3.0 * 1.4826 * mad]
+        if inliers.size > 0:
+            return float(np.median(inliers))
+    return median
+
+
+def _assert_matches_reference(dem: np.ndarray, labels: np.ndarray, label_count: int) -> None:
+    got = _robust_rim_elevations(dem, labels, label_count)
+    assert got.shape == (label_count,)
+    for label in range(1, label_count + 1):
+        expected = _reference_rim_elevation(dem, labels == label)
+        if expected is None:
+            assert np.isnan(got[label - 1]), label
+        else:
+            assert got[label - 1] == expected, label
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_overlapping_blocks_match_per_block_reference(seed):
+    rng = np.random.default_rng(seed)
+    height, width = rng.integers(40, 160, 2)
+    dem = rng.normal(300.0, 5.0, (height, width)).astype(np.float32)
+    if seed % 2:
+        dem = np.round(dem)  # Many ties, so some rims have a zero MAD
+    dem[rng.random((height, width)) < 0.05] = np.nan
+
+    # Later blocks overwrite earlier ones, so rims run across neighbouring
+    # blocks and some blocks are partly or wholly covered.
+    labels = np.zeros((height, width), dtype=np.int32)
+    count = int(rng.integers(10, 60))
+    for label in range(1, count + 1):
+        row, col = rng.integers(0, height), rng.integers(0, width)
+        h, w = rng.integers(1, 15, 2)
+        labels[row:row + h, col:col + w] = label
+    _assert_matches_reference(dem, labels, count + 2)  # Trailing labels absent from the raster
+
+
+def test_edge_touching_blocks_match_per_block_reference():
+    rng = np.random.default_rng(42)
+    dem = rng.normal(250.0, 3.0, (60, 80)).astype(np.float32)
+    labels = np.zeros(dem.shape, dtype=np.int32)
+    labels[:10, :15] = 1  # Corner
+    labels[25:35, :6] = 2  # Left edge
+    labels[-8:, 30:50] = 3  # Bottom edge
+    labels[20:40, -1:] = 4  # One pixel wide along the right edge
+    labels[:, 60:62] = 5  # Full height, touching top and bottom
+    labels[8:14, 12:20] = 6  # Overlaps block 1
+    labels[25:35, 6:9] = 7  # Abuts block 2
+    _assert_matches_reference(dem, labels, 7)
+
+
+def test_blocks_without_finite_rim_are_nan():
+    dem = np.full((20, 20), np.nan, dtype=np.float32)
+    dem[15:, 15:] = 100.0
+    labels = np.zeros(dem.shape, dtype=np.int32)
+    labels[2:6, 2:6] = 1
+    labels[14:17, 14:17] = 2
+    _assert_matches_reference(dem, labels, 2)
+    labels[:] = 1  # No rim at all
+    assert np.isnan(_robust_rim_elevations(dem, labels, 1)).all()
@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.volume_kernels import NUMBA_AVAILABLE, block_depth_stats
+
+pytestmark = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed")
+
+SCALAR_FIELDS = [
+    "pixel_count",
+    "finite_count",
+    "rim_elevation",
+    "max_depth",
+    "median_depth",
+    "volume_cell_sum",
+    "volume_simpson",
+    "volume_trapezoid",
+]
+
+
+def _windows():
+    rng = np.random.default_rng(20)
+    shapes = [(1, 1), (1, 7), (2, 2), (3, 5), (8, 8), (17, 12), (40, 33)]
+    for case in range(120):
+        rows, cols = shapes[case % len(shapes)]
+        dem = (300 + rng.normal(0, 8, (rows, cols))).astype(np.float32)
+        mask = rng.random((rows, cols)) < rng.uniform(0.2, 1.0)
+        if case % 3 == 0:
+            dem[rng.random((rows, cols)) < 0.25] = np.nan
+        if case % 11 == 0:
+            dem[:] = np.nan
+        if case % 7 == 0:
+            mask[:] = False
+        if case % 5 == 0:
+            rim = math.nan  # No usable rim: falls back to the highest block elevation
+        else:
+            rim = float(np.nanmedian(dem)) if np.isfinite(dem).any() else 310.0
+        yield pytest.param(dem, mask, rim, id=f"{rows}x{cols}-{case}")
+
+
+@pytest.mark.parametrize("dem, mask, rim", list(_windows()))
+def test_compiled_kernel_matches_numpy(dem, mask, rim):
+    compiled = block_depth_stats(dem, mask, rim, 10.0, compiled=True)
+    fallback = block_depth_stats(dem, mask, rim, 10.0, compiled=False)
+
+    assert compiled.depth_surface.dtype == fallback.depth_surface.dtype
+    np.testing.assert_array_equal(compiled.depth_surface, fallback.depth_surface)
+    for name in SCALAR_FIELDS:
+        got, expected = getattr(compiled, name), getattr(fallback, name)
+        assert got == expected or (math.isnan(got) and math.isnan(expected)), name
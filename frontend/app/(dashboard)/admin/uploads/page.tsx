@@ -64,6 +64,22 @@ export default function UploadPage() {
         throw new Error("Upload failed");
       }
 
+      // The audit runs in the background; poll its job until it finishes
+      let job = await response.json();
+      while (job.status === "queued" || job.status === "running") {
+        const finished = job.steps.filter((step: any) => step.status === "completed").length;
+        setProgress(Math.min(90, 10 + finished * 40));
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const poll = await fetch(`http://127.0.0.1:8000/api/analysis/audits/${job.jobId}`);
+        if (!poll.ok) {
+          throw new Error("Audit status unavailable");
+        }
+        job = await poll.json();
+      }
+      if (job.status !== "completed") {
+        throw new Error(job.error ?? "Audit failed");
+      }
+
       setProgress(100);
       await new Promise(resolve => setTimeout(resolve, 500));
       setStatus("success");